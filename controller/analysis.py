@@ -0,0 +1,114 @@
+"""
+Background analysis for the console game.
+
+While the controller waits for the next command, a daemon thread
+searches the current position with its own Searcher on a private copy
+of the board. That includes the opponent's time after a move has been
+played but before the turn is ended. The 'hint' command then reads the
+deepest completed iteration instead of starting a search of its own.
+The thread only competes with the UI for the interpreter while a
+command is being handled, which is a few milliseconds.
+"""
+import threading
+
+from model.engine.search import MAX_PLY, Searcher
+from model.game import Game
+from model.player import Player
+from model.save_game import encode_pieces, layout_from_pieces
+from model.zobrist import SIDE_KEY
+
+
+class BackgroundAnalyzer:
+    """
+    Keeps one position under analysis in a background thread.
+
+    Attributes:
+        key (int): Zobrist key of the analysed position and side to move
+        result (SearchResult): Deepest completed iteration for key, or None
+        finished (bool): True once the search of key has ended
+    """
+
+    def __init__(self, max_depth=MAX_PLY - 1, time_limit=60.0, tt_size_mb=16):
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.searcher = Searcher(tt_size_mb=tt_size_mb)
+        self.key = None
+        self.result = None
+        self.finished = False
+        self._scratch = Game(Player("*analysis*"), Player("#analysis#"))
+        self._thread = None
+        self._interrupted = False
+        self._updated = threading.Event()
+
+    @staticmethod
+    def side_to_move(game):
+        """
+        The side whose move is next: once the current player has moved,
+        the turn is only waiting to be ended.
+        """
+        side = game.whose_turn
+        return 1 - side if game.players[side].moved_this_turn else side
+
+    def position_key(self, game):
+        side = self.side_to_move(game)
+        return game.board.zobrist ^ SIDE_KEY if side else game.board.zobrist
+
+    def analyze(self, game):
+        """
+        Start analysing the position of game, unless it already is.
+        """
+        key = self.position_key(game)
+        if key == self.key:
+            return
+        self.stop()
+        self._scratch.setup_position(layout_from_pieces(encode_pieces(game.board)), self.side_to_move(game))
+        self.key = key
+        self.result = None
+        self.finished = False
+        self._updated.clear()
+        self.searcher.stopped = False
+        self._interrupted = False
+        self._thread = threading.Thread(target=self._run, args=(self._scratch,), daemon=True)
+        self._thread.start()
+
+    def _run(self, game):
+        result = self.searcher.search(game, self.max_depth, self.time_limit, on_iteration=self._publish)
+        if not self._interrupted:
+            self.result = result
+            self.finished = True
+        self._updated.set()
+
+    def _publish(self, result):
+        self.result = result
+        self._updated.set()
+
+    def wait(self, timeout):
+        """
+        Wait up to timeout seconds for a first result; returns it or None.
+        """
+        if self.result is None and self._thread is not None:
+            self._updated.wait(timeout)
+        return self.result
+
+    def stop(self):
+        """
+        End the running search, if any. An interrupted position is
+        searched again (from the warm transposition table) by the next
+        analyze call.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._interrupted = True
+            self.searcher.stop()
+            self._thread.join()
+            if not self.finished:
+                self.key = None
+        self._thread = None
+
+    def reset(self):
+        """
+        Stop and forget the analysed position.
+        """
+        self.stop()
+        self.key = None
+        self.result = None
+        self.finished = False
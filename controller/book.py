@@ -0,0 +1,90 @@
+"""
+Build the opening book from archived games and self-play files.
+
+Usage:
+    python -m controller.book --archive data --selfplay data/selfplay.games --out data/opening.book
+"""
+import argparse
+import sys
+import time
+
+from controller.replay import find_files
+from controller.selfplay import DRAW, read_games
+from model.bitboard import BIT
+from model.engine.book import BOOK_PLIES, DEFAULT_BOOK, BookBuilder, OpeningBook
+from model.engine.search import move_to_str
+from model.game import Game
+from model.player import Player
+from model.record import open_record
+
+
+def archive_games(directory):
+    """
+    Yield (start game, moves, result) for every readable record or save
+    below directory. result is the winner's index, or DRAW if the game
+    did not end on the board.
+    """
+    for path in find_files(directory):
+        try:
+            with open_record(path) as reader:
+                moves = list(reader.iter_moves())
+                result = DRAW
+                if moves:
+                    # position before the last move, to see whether it ended the game
+                    game = reader.game_at(len(moves) - 1)
+                    mover = game.board.squares[moves[-1] & 63]
+                    if mover is not None:
+                        side = game.board.side_of(mover.owner)
+                        game.whose_turn = side
+                        game.make_move(moves[-1])
+                        board = game.board
+                        if BIT[moves[-1] >> 6] & board.den_mask[1 - side] or not board.side_bb[1 - side]:
+                            result = side
+                yield reader.game_at(0), moves, result
+        except Exception as e:
+            print(f"Skipping '{path}': {e}")
+
+
+def selfplay_games(path):
+    """
+    Yield (start game, moves, result) for every game of a self-play file.
+    """
+    for _, result, moves in read_games(path):
+        yield Game(Player("*p1*"), Player("#p2#")), moves, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Jungle opening book")
+    parser.add_argument("--archive", default=None, help="directory of .record/.jungle files")
+    parser.add_argument("--selfplay", nargs="*", default=[], help="self-play files from controller.selfplay")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES, help="book depth in plies")
+    parser.add_argument("--min-played", type=int, default=1, help="drop moves played fewer times")
+    parser.add_argument("--out", default=DEFAULT_BOOK)
+    args = parser.parse_args(argv)
+    if args.archive is None and not args.selfplay:
+        parser.error("give --archive and/or --selfplay")
+
+    builder = BookBuilder(args.plies)
+    games = 0
+    start = time.perf_counter()
+    sources = [archive_games(args.archive)] if args.archive else []
+    sources += [selfplay_games(path) for path in args.selfplay]
+    for source in sources:
+        for game, moves, result in source:
+            builder.add_game(game, moves, result)
+            games += 1
+    entries = builder.write(args.out, args.min_played)
+    print(f"{games} games -> {entries} book entries in '{args.out}' ({time.perf_counter() - start:.2f}s)")
+
+    with OpeningBook(args.out) as book:
+        game = Game(Player("*p1*"), Player("#p2#"))
+        start = time.perf_counter()
+        move = book.choose(game)
+        elapsed = time.perf_counter() - start
+    if move is not None:
+        print(f"Start position book move {move_to_str(move)} found in {elapsed * 1e6:.0f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
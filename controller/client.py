@@ -0,0 +1,180 @@
+"""
+Client for the Jungle game server (controller.server).
+
+Usage:
+    python -m controller.client [--host H --port P | --unix PATH]
+        Interactive: each stdin line is a JSON request, e.g.
+        {"cmd": "create", "name": "Alice"}; responses and pushed
+        events are printed as they arrive.
+
+    python -m controller.client [...] --bench 500 [--moves 20]
+        Load test: play that many games at once, two connections per
+        game making random legal moves, and report move latency.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from model.game import Game
+from model.player import Player
+
+
+class JungleClient:
+    """
+    One connection to the server. Responses are matched to requests in
+    order; pushed events are collected in the events queue.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.events = asyncio.Queue()
+        self._responses = asyncio.Queue()
+        self._reader_task = asyncio.ensure_future(self._read())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765, unix_path=None):
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _read(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if "event" in message:
+                self.events.put_nowait(message)
+            else:
+                self._responses.put_nowait(message)
+
+    async def request(self, cmd, **fields):
+        """
+        Send one command and wait for its response.
+        """
+        fields["cmd"] = cmd
+        self.writer.write(json.dumps(fields).encode() + b"\n")
+        await self.writer.drain()
+        return await self._responses.get()
+
+    async def next_update(self, game_id):
+        """
+        Wait for the next board update of a game.
+        """
+        while True:
+            event = await self.events.get()
+            if event["event"] == "update" and event["game"] == game_id:
+                return event
+
+    async def close(self):
+        self._reader_task.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def coordinate(sq):
+    return f"{chr(ord('a') + sq % 7)}{9 - sq // 7}"
+
+
+async def play_random_game(connect, rng, max_moves, latencies):
+    """
+    Create a game on one connection, join it from another and play
+    random legal moves (picked from a local Game mirror of each update)
+    until the game ends or max_moves is reached.
+    """
+    players = [await connect(), await connect()]
+    game_id = (await players[0].request("create", name="bench-a"))["game"]
+    await players[1].request("join", game=game_id, name="bench-b")
+    update = await players[0].next_update(game_id)
+    await players[1].next_update(game_id)
+    mirror = Game(Player("a"), Player("b"))
+    for _ in range(max_moves):
+        if update["completed"]:
+            break
+        side = update["turn"]
+        mirror.setup_position(update["board"], side)
+        move = rng.choice(mirror.rules.generate_all_moves(mirror.board, side))
+        start = time.perf_counter()
+        response = await players[side].request("move", game=game_id,
+                                               **{"from": coordinate(move & 63), "to": coordinate(move >> 6)})
+        latencies.append(time.perf_counter() - start)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        update = await players[side].next_update(game_id)
+        await players[1 - side].next_update(game_id)
+    for player in players:
+        await player.close()
+
+
+async def bench(connect, games, max_moves, seed=0):
+    """
+    Play games concurrently; returns (moves, seconds, latencies).
+    """
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play_random_game(connect, random.Random(seed + i), max_moves, latencies)
+                           for i in range(games)))
+    return len(latencies), time.perf_counter() - start, latencies
+
+
+async def interactive(client):
+    async def show_events():
+        while True:
+            print(json.dumps(await client.events.get()))
+
+    printer = asyncio.ensure_future(show_events())
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            print("Enter a JSON request, e.g. {\"cmd\": \"list\"}")
+            continue
+        print(json.dumps(await client.request(**request)))
+    printer.cancel()
+    await client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jungle game server client")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None)
+    parser.add_argument("--bench", type=int, default=0, help="number of concurrent games to play")
+    parser.add_argument("--moves", type=int, default=20, help="moves per benchmark game")
+    args = parser.parse_args(argv)
+
+    def connect():
+        return JungleClient.connect(args.host, args.port, args.unix)
+
+    async def run():
+        if args.bench:
+            moves, elapsed, latencies = await bench(connect, args.bench, args.moves)
+            latencies.sort()
+            print(f"{args.bench} games, {moves} moves in {elapsed:.2f}s ({moves / elapsed:.0f} moves/s)")
+            if latencies:
+                print(f"move round trip: median {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+                      f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+        else:
+            await interactive(await connect())
+
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
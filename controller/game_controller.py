@@ -2,16 +2,45 @@ from model.game import Game
 from model.player import Player
 from model.save_game import SaveGame
 from model.piece import Position
+from model.bitboard import COL_OF, ROW_OF, square_of
+from model.engine.engine_player import EnginePlayer
+from model.record import RecordReader, apply_record_move, is_record_file, record_bytes, write_record
+from model.engine.search import move_to_str
+from controller.analysis import BackgroundAnalyzer
 import sys
-import time
 import traceback
 
 class GameController:
-    def __init__(self, ui):
+    def __init__(self, ui, ponder=True, hint_wait=2.0):
+        """
+        Args:
+            ui: The UserInterface used for all input and output
+            ponder (bool): Analyse every position in the background while
+                           waiting for commands; otherwise only on 'hint'
+            hint_wait (float): Seconds 'hint' waits for a first result
+        """
         self.ui = ui
         self.game = None
         self.display_board = True
         self.backup_game = None
+        self.playback_reader = None
+        self.playback_ply = 0
+        self.ponder = ponder
+        self.hint_wait = hint_wait
+        self._analyzer = None
+
+    @property
+    def analyzer(self):
+        """
+        The BackgroundAnalyzer, created (with its transposition table) on first use.
+        """
+        if self._analyzer is None:
+            self._analyzer = BackgroundAnalyzer()
+        return self._analyzer
+
+    def stop_analysis(self):
+        if self._analyzer is not None:
+            self._analyzer.stop()
 
 
     @staticmethod
@@ -59,14 +88,22 @@ class GameController:
             self.game = SaveGame.load_game(filename)
             if self.game is None:
                 if self.ui.confirm("Start a new game instead? (y/n):"):
-                    player1_name, player2_name = self.ui.get_player_names()
-                    self.game = Game(Player(player1_name), Player(player2_name))
+                    self.new_game()
                 else:
-                    print("No game to run. Exiting.")
+                    self.ui.output("No game to run. Exiting.")
                     sys.exit(0)
         else:
-            player1_name, player2_name = self.ui.get_player_names()
-            self.game = Game(Player(player1_name), Player(player2_name))
+            self.new_game()
+
+    def new_game(self):
+        """
+        Ask for player names and engine seats, then create a fresh game.
+        """
+        names = self.ui.get_player_names()
+        engine_sides = self.ui.prompt_engine_sides()
+        players = [EnginePlayer(name) if idx in engine_sides else Player(name)
+                   for idx, name in enumerate(names)]
+        self.game = Game(players[0], players[1])
 
     def start_game_loop(self):
         """
@@ -74,6 +111,27 @@ class GameController:
         Switches between playback mode and normal play mode,
         and handles top-level exceptions and quitting.
         """
+        try:
+            self._game_loop()
+        finally:
+            self.stop_analysis()
+            self.close_playback()
+            self.close_players(self.game)
+            self.close_players(self.backup_game)
+
+    @staticmethod
+    def close_players(game):
+        """
+        Let the engine players of game release their resources (such as
+        MCTS worker pools).
+        """
+        if game is None:
+            return
+        for player in game.players:
+            if isinstance(player, EnginePlayer):
+                player.close()
+
+    def _game_loop(self):
         while True:
             try:
                 if self.game.recording:
@@ -84,10 +142,13 @@ class GameController:
                     self.play_mode()
             except KeyboardInterrupt:
                 if self.ui.display_quit_confirmation():
-                    print("Thanks for playing!")
+                    self.ui.output("Thanks for playing!")
                     break
+            except EOFError:
+                # input ran out (end of stdin or of a script)
+                break
             except Exception as e:
-                print(f"An error occurred: {e}")
+                self.ui.output(f"An error occurred: {e}")
                 traceback.print_exc()
                 if self.ui.confirm("Continue playing? (y/n): "):
                     continue
@@ -98,40 +159,76 @@ class GameController:
     def playback_mode(self):
         """
         Playback mode: replays recorded moves of a previous game.
-        User can type 'next' to step through moves or 'exit' to leave playback.
+        User can type 'next' to step through moves, 'seek N' to jump to
+        move N or 'exit' to leave playback.
         """
         self.ui.display_board(self.game.board.grid)
-        print("\nPlayback Mode Commands: 'next' to play next move, 'exit' to return to main menu")
+        self.ui.output("\nPlayback Mode Commands: 'next' to play next move, 'seek N' to jump to move N, "
+                       "'exit' to return to main menu")
 
         try:
             user_input = self.ui.get_user_input()
             if user_input == 'next':
-                time.sleep(0.5)
+                self.ui.pause()
                 self.play_next_move()
-            elif user_input == 'exit':
+            elif user_input.startswith('seek'):
+                self.seek_playback(user_input[4:].strip())
+            elif user_input in ('exit', 'quit'):
                 self.game.recording = False
+                self.close_playback()
                 self.display_board = True
             else:
-                print("Invalid command. Type 'next' or 'exit'.")
-                time.sleep(0.5)
+                self.ui.output("Invalid command. Type 'next', 'seek N' or 'exit'.")
+                self.ui.pause()
         except Exception as e:
-            print(f"An error occurred during playback: {e}")
+            self.ui.output(f"An error occurred during playback: {e}")
 
     def play_next_move(self):
         """
-        Plays the next recorded move from move_history during playback.
+        Plays the next recorded move during playback.
+        Moves are read from the record by index, so each step is O(1).
         """
-        if not self.game.move_history:
-            print("End of playback reached.")
-            time.sleep(0.5)
+        if self.playback_ply >= len(self.playback_reader):
+            self.ui.output("End of playback reached.")
+            self.ui.pause()
+            return
+        move = self.playback_reader.move(self.playback_ply)
+        valid, message = apply_record_move(self.game, move)
+        if not valid:
+            self.ui.output(f"Recorded move {self.playback_ply + 1} cannot be played: {message}")
+            self.ui.pause()
             return
-        move = self.game.move_history.pop(0)
-        origin = Position(*self.convert_coordinate(move[1]))
-        destination = Position(*self.convert_coordinate(move[2]))
-        self.game.move_piece(origin, destination)
-        self.game.switch_turn()
-        print(f"Replaying move: {move}")
-        time.sleep(0.5)
+        self.playback_ply += 1
+        entry = self.game.move_stack[-1]
+        captured = entry["captured_piece"]
+        replayed = (entry["piece"].name,
+                    self.convert_indices_to_coordinate(entry["from_pos"].row, entry["from_pos"].col),
+                    self.convert_indices_to_coordinate(entry["to_pos"].row, entry["to_pos"].col),
+                    captured.name if captured else "None")
+        self.ui.output(f"Replaying move {self.playback_ply}/{len(self.playback_reader)}: {replayed}")
+        self.ui.pause()
+
+    def close_playback(self):
+        """
+        Close the record being played back, if any.
+        """
+        if self.playback_reader is not None:
+            self.playback_reader.close()
+            self.playback_reader = None
+
+    def seek_playback(self, argument):
+        """
+        Jump to the position after move N of the recording, using the
+        nearest keyframe instead of replaying from the start.
+        """
+        if not argument.isdigit():
+            self.ui.output("Usage: seek N (e.g. 'seek 10')")
+            return
+        ply = min(int(argument), len(self.playback_reader))
+        self.game = self.playback_reader.game_at(ply)
+        self.game.recording = True
+        self.playback_ply = ply
+        self.ui.output(f"Jumped to move {ply}/{len(self.playback_reader)}")
 
     # ---------------- Play Mode ----------------
     def play_mode(self):
@@ -146,11 +243,21 @@ class GameController:
             self.ui.display_board(self.game.board.grid)
             if not self.game.completed:
                 self.ui.display_game_status(self.game)
+            elif self.game.draw_reason:
+                self.ui.display_draw(self.game.draw_reason)
             else:
                 self.ui.display_game_result(self.game.players[self.game.whose_turn].name)
-            self.ui.display_help()
+            self.ui.display_turn_help()
         self.display_board = True
 
+        current_player = self.game.players[self.game.whose_turn]
+        if isinstance(current_player, EnginePlayer) and not self.game.completed:
+            self.handle_engine_move()
+            self.ui.pause()
+            return
+
+        if self.ponder and not self.game.completed:
+            self.analyzer.analyze(self.game)
         user_input = self.ui.get_user_input()
         command_map = {
             'help': self.ui.display_help,
@@ -165,6 +272,8 @@ class GameController:
             'save': self.handle_save,
             'record': self.handle_record,
             'playback': self.handle_playback,
+            'hint': self.handle_hint,
+            'analyze': self.handle_hint,
             'endturn': self.handle_endturn,
             'et': self.handle_endturn,
             'quit': self.handle_quit,
@@ -173,7 +282,7 @@ class GameController:
 
         handler = command_map.get(user_input, self.invalid_command)
         handler()
-        time.sleep(0.5)
+        self.ui.pause()
 
     # ---------------- Command Handlers ----------------
     def handle_move(self):
@@ -182,23 +291,130 @@ class GameController:
         validate and apply the move, and check for victory.
         """
         if self.game.completed:
-            print("The game has ended. You cannot perform new moves")
+            self.ui.output("The game has ended. You cannot perform new moves")
             return
         origin, destination = self.ui.display_move_prompt(self.game)
         origin_pos = Position(*self.convert_coordinate(origin))
         dest_pos = Position(*self.convert_coordinate(destination))
         result, message = self.game.move_piece(origin_pos, dest_pos)
-        print(message)
+        self.ui.output(message)
         if result:
             mover = self.game.players[self.game.whose_turn]
             won, winner_idx = self.game.check_victory(mover, dest_pos)
             if won:
                 self.ui.display_game_result(self.game.players[winner_idx].name)
                 self.game.completed = True
+            else:
+                self.check_draw()
             self.display_board = True
         else:
             self.display_board = False
 
+    def check_draw(self):
+        """
+        End the game as a draw if the repetition rules call for it.
+        Returns True if the game was drawn.
+        """
+        drawn, reason = self.game.check_draw()
+        if drawn:
+            self.game.completed = True
+            self.game.draw_reason = reason
+            self.ui.display_draw(reason)
+        return drawn
+
+    def handle_engine_move(self):
+        """
+        Let the engine choose and play a move for the current player,
+        then end its turn unless the move won the game.
+        """
+        player = self.game.players[self.game.whose_turn]
+        if player.moved_this_turn:
+            self.game.switch_turn()
+            return
+        self.ui.output(f"{player.name} is thinking...")
+        pondered = self.take_pondered(player)
+        # The search does not see every repetition rule (perpetual chases),
+        # so a rejected move is excluded and the engine searches again
+        rejected = set()
+        while True:
+            move = player.choose_move(self.game, pondered=pondered, exclude=rejected)
+            if move is None:
+                self.ui.output(f"{player.name} has no {'allowed' if rejected else 'legal'} move.")
+                self.game.switch_turn()
+                self.ui.display_game_result(self.game.players[self.game.whose_turn].name)
+                self.game.completed = True
+                return
+            origin_pos, dest_pos = move
+            result, message = self.game.move_piece(origin_pos, dest_pos)
+            if result:
+                break
+            self.ui.output(message)
+            rejected.add(square_of(origin_pos.row, origin_pos.col) | square_of(dest_pos.row, dest_pos.col) << 6)
+            pondered = None
+        self.ui.output(f"{player.name} moved {self.game.move_history[-1]} ({player.last_result})")
+        won, winner_idx = self.game.check_victory(player, dest_pos)
+        if won:
+            self.ui.display_game_result(self.game.players[winner_idx].name)
+            self.game.completed = True
+        elif not self.check_draw():
+            self.game.switch_turn()
+
+    def take_pondered(self, player):
+        """
+        Stop the background analysis, giving the engine's own search the
+        whole CPU, and hand its work on the current position to player.
+
+        If the position was being analysed, player's searcher takes over
+        the analyser's transposition table, so its search starts from
+        everything pondered, and the deepest result is returned for
+        EnginePlayer.choose_move. Otherwise returns None.
+        """
+        analyzer = self._analyzer
+        if analyzer is None:
+            return None
+        analyzer.stop()
+        if analyzer.key != analyzer.position_key(self.game):
+            return None
+        player.searcher.tt = analyzer.searcher.tt
+        return analyzer.result
+
+    def handle_hint(self):
+        """
+        Show the best move found so far for the side to move, from the
+        background analysis (started now if it is not running yet).
+        Without pondering the analysis is stopped once the hint is shown.
+        """
+        self.display_board = False
+        if self.game.completed:
+            self.ui.output("The game has ended. There is nothing to analyse.")
+            return
+        try:
+            self._show_hint()
+        finally:
+            if not self.ponder:
+                self.stop_analysis()
+
+    def _show_hint(self):
+        self.analyzer.analyze(self.game)
+        result = self.analyzer.wait(self.hint_wait)
+        if result is None:
+            self.ui.output("No analysis yet, try 'hint' again in a moment.")
+            return
+        player = self.game.players[self.analyzer.side_to_move(self.game)]
+        if result.best_move is None:
+            self.ui.output(f"{player.name} has no legal move.")
+            return
+        from_sq, to_sq = result.best_move & 63, result.best_move >> 6
+        origin = self.convert_indices_to_coordinate(ROW_OF[from_sq], COL_OF[from_sq])
+        destination = self.convert_indices_to_coordinate(ROW_OF[to_sq], COL_OF[to_sq])
+        if self.analyzer.finished:
+            state = "final"
+        else:
+            state = "still analysing" if self.ponder else "stopped"
+        self.ui.output(f"Hint for {player.name}: {origin} -> {destination} "
+                       f"(score {result.score}, depth {result.depth}, "
+                       f"line {' '.join(move_to_str(move) for move in result.pv)}, {state})")
+
     def handle_history(self):
         """
         Display the list of moves played so far.
@@ -211,10 +427,10 @@ class GameController:
         Handle current player resignation and end the game.
         """
         if self.game.completed:
-            print("The game has ended. You cannot resign now.")
+            self.ui.output("The game has ended. You cannot resign now.")
             return
         if self.ui.display_resignation(self.game.players[self.game.whose_turn].name):
-            print(f"{self.game.players[self.game.whose_turn].name} has resigned")
+            self.ui.output(f"{self.game.players[self.game.whose_turn].name} has resigned")
             self.game.switch_turn()
             self.ui.display_game_result(self.game.players[self.game.whose_turn].name)
             self.game.completed = True
@@ -226,23 +442,23 @@ class GameController:
         for the player who uses it.
         """
         if self.game.completed:
-            print("The game has ended. You cannot undo moves now.")
+            self.ui.output("The game has ended. You cannot undo moves now.")
             return
         if not self.game.move_stack:
-            print("No moves to undo.")
+            self.ui.output("No moves to undo.")
             return
 
         move = self.game.move_stack.pop()
         if self.game.players[move["prev_turn"]].undos <= 0:
-            print(f'No undos left for {self.game.players[move["prev_turn"]].name}.')
+            self.ui.output(f'No undos left for {self.game.players[move["prev_turn"]].name}.')
             self.game.move_stack.append(move)
             return
         else:
             self.game.move_stack.append(move)
             result, message = self.game.undo_move()
-            print(message)
+            self.ui.output(message)
             if result:
-                print(f"{self.game.players[self.game.whose_turn].name} has used an undo. Remaining undos: {self.game.players[self.game.whose_turn].undos-1}")
+                self.ui.output(f"{self.game.players[self.game.whose_turn].name} has used an undo. Remaining undos: {self.game.players[self.game.whose_turn].undos-1}")
                 self.game.players[self.game.whose_turn].undos -= 1
         self.display_board = True
 
@@ -255,10 +471,11 @@ class GameController:
             return
         loaded_game = SaveGame.load_game(filename)
         if loaded_game:
+            self.close_players(self.game)
             self.game = loaded_game
-            print(f"Game loaded from {filename}")
+            self.ui.output(f"Game loaded from {filename}")
         else:
-            print(f"Failed to load game from {filename}")
+            self.ui.output(f"Failed to load game from {filename}")
         self.display_board = True
 
     def handle_save(self):
@@ -269,7 +486,7 @@ class GameController:
         if filename in ('quit', 'exit', 'q'):
             return
         SaveGame.save_game(self.game, filename)
-        print(f"Game saved to '{filename}'")
+        self.ui.output(f"Game saved to '{filename}'")
         self.display_board = False
 
     def handle_record(self):
@@ -280,8 +497,8 @@ class GameController:
         filename = self.ui.prompt_filename_record()
         if filename == 'quit':
             return
-        SaveGame.save_game(self.game, filename)
-        print(f"Game recorded to '{filename}'")
+        if write_record(filename, self.game):
+            self.ui.output(f"Game recorded to '{filename}'")
         self.display_board = False
 
     def handle_playback(self):
@@ -292,16 +509,23 @@ class GameController:
         filename = self.ui.prompt_filename_playback()
         if filename == 'quit':
             return
-        playback_game = SaveGame.load_game(filename)
-        if playback_game:
+        if is_record_file(filename):
+            reader = RecordReader(filename)
+        else:
+            # records made before the move-list format are pickled games
+            playback_game = SaveGame.load_game(filename)
+            reader = RecordReader(record_bytes(playback_game)) if playback_game else None
+        if reader:
+            self.stop_analysis()
+            self.close_playback()
             self.backup_game = self.game
-
-            self.game = Game(playback_game.players[0], playback_game.players[1])
-            self.game.move_history = playback_game.move_history
+            self.playback_reader = reader
+            self.playback_ply = 0
+            self.game = reader.game_at(0)
             self.game.recording = True
-            print(f"Game loaded for playback from {filename}")
+            self.ui.output(f"Game loaded for playback from {filename}")
         else:
-            print(f"Failed to load game from {filename}")
+            self.ui.output(f"Failed to load game from {filename}")
         self.display_board = False
 
     def handle_endturn(self):
@@ -309,10 +533,10 @@ class GameController:
         Explicitly end the current player's turn, if they've made a move.
         """
         if self.game.completed:
-            print("The game has ended. You cannot end turns now.")
+            self.ui.output("The game has ended. You cannot end turns now.")
             return
         if not self.game.players[self.game.whose_turn].moved_this_turn:
-            print("You must make a move before ending your turn.")
+            self.ui.output("You must make a move before ending your turn.")
         else:
             self.game.switch_turn()
 
@@ -321,12 +545,12 @@ class GameController:
         Handle quitting from within the game (not via KeyboardInterrupt).
         """
         if self.ui.display_quit_confirmation():
-            print("Thanks for playing!")
+            self.ui.output("Thanks for playing!")
             sys.exit(0)
 
     def invalid_command(self):
         """
         Fallback handler when user enters an unrecognized command.
         """
-        print("Invalid command. Type 'help' or 'h' for a list of commands.")
+        self.ui.output("Invalid command. Type 'help' or 'h' for a list of commands.")
         self.display_board = False
\ No newline at end of file
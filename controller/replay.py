@@ -0,0 +1,122 @@
+"""
+Headless replay and validation of saved games and records.
+
+Every .record and .jungle file under a directory is replayed move by
+move through Game.move_piece, without the UI and without sleeps, across
+a process pool. A file is reported as:
+
+    ok        every move was legal (and record keyframes match the replay)
+    illegal   a move was rejected, or a move was played after the game ended
+    corrupt   the file could not be decoded
+
+Usage:
+    python -m controller.replay [directory] [--workers N] [--quiet]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from model.bitboard import BIT
+from model.record import apply_record_move, open_record
+
+EXTENSIONS = (".record", ".jungle")
+OK, ILLEGAL, CORRUPT = "ok", "illegal", "corrupt"
+
+
+def find_files(directory):
+    """
+    Return the paths of all record and save files below directory, sorted.
+    """
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith(EXTENSIONS))
+    return sorted(paths)
+
+
+def replay_file(path):
+    """
+    Replay one file.
+
+    Returns:
+        (path, status, plies replayed, seconds, message)
+    """
+    start = time.perf_counter()
+    plies = 0
+    try:
+        reader = open_record(path)
+    except Exception as e:
+        return path, CORRUPT, 0, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    try:
+        with reader:
+            game = reader.game_at(0)
+            finished = False
+            for move in reader.iter_moves():
+                if finished:
+                    return path, ILLEGAL, plies, time.perf_counter() - start, f"move {plies + 1} after the game ended"
+                mover = game.board.squares[move & 63]
+                valid, message = apply_record_move(game, move)
+                if not valid:
+                    return path, ILLEGAL, plies, time.perf_counter() - start, f"move {plies + 1}: {message}"
+                plies += 1
+                side = game.board.side_of(mover.owner)
+                board = game.board
+                finished = bool(BIT[move >> 6] & board.den_mask[1 - side]) or not board.side_bb[1 - side]
+                if plies % reader.interval == 0 and reader.game_at(plies).board.zobrist != board.zobrist:
+                    return path, CORRUPT, plies, time.perf_counter() - start, f"keyframe at move {plies} does not match"
+    except Exception as e:
+        return path, CORRUPT, plies, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return path, OK, plies, time.perf_counter() - start, ""
+
+
+def run_replay(paths, workers=1):
+    """
+    Replay paths across a process pool.
+
+    Returns (results in path order, stats dict with files, failed, plies,
+    elapsed, plies_per_sec and files_per_sec).
+    """
+    start = time.perf_counter()
+    if workers <= 1 or len(paths) <= 1:
+        results = list(map(replay_file, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(replay_file, paths, chunksize=max(1, len(paths) // (workers * 8))))
+    elapsed = time.perf_counter() - start
+    plies = sum(result[2] for result in results)
+    stats = {
+        "files": len(results),
+        "failed": sum(result[1] != OK for result in results),
+        "plies": plies,
+        "elapsed": elapsed,
+        "plies_per_sec": plies / elapsed if elapsed > 0 else 0.0,
+        "files_per_sec": len(results) / elapsed if elapsed > 0 else 0.0,
+    }
+    return results, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay and validate Jungle record and save files")
+    parser.add_argument("directory", nargs="?", default="data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--quiet", action="store_true", help="only list files that fail")
+    args = parser.parse_args(argv)
+
+    paths = find_files(args.directory)
+    if not paths:
+        print(f"No {' or '.join(EXTENSIONS)} files under '{args.directory}'")
+        return 0
+    results, stats = run_replay(paths, args.workers)
+    for path, status, plies, seconds, message in results:
+        if args.quiet and status == OK:
+            continue
+        print(f"{os.path.relpath(path, args.directory):40} {status:8} {plies:5} moves "
+              f"{seconds * 1000:8.2f} ms  {message}")
+    print(f"{stats['files']} files, {stats['failed']} failed, {stats['plies']} moves in {stats['elapsed']:.2f}s "
+          f"({stats['plies_per_sec']:.0f} moves/s, {stats['files_per_sec']:.1f} files/s) on {args.workers} workers")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Drive the full console game (GameController + UserInterface) from a
+script instead of the keyboard, with no pauses.
+
+A script is the sequence of lines a player would type, one answer per
+prompt, e.g.:
+
+    new
+    Alice
+    Bob
+    none
+    move
+    a7
+    a6
+    endturn
+    quit
+    y
+
+Usage:
+    python -m controller.script_driver demo.txt [--pace 0] [--quiet]
+"""
+import argparse
+import sys
+
+from controller.game_controller import GameController
+from view.userinterface import ScriptedInput, UserInterface
+
+
+def _discard(*args, **kwargs):
+    pass
+
+
+def run_script(lines, pace=0, output=print, echo=True, ponder=False):
+    """
+    Play a script through the controller until it quits or the script
+    runs out.
+
+    Args:
+        lines: Iterable of input lines
+        pace (float): Seconds per UI pause (0 = machine speed)
+        output: print()-like callable for everything the game shows
+        echo (bool): Also show each prompt with the scripted answer
+        ponder (bool): Analyse in the background between commands
+
+    Returns:
+        The GameController, so callers can inspect controller.game
+    """
+    ui = UserInterface(ScriptedInput(lines, echo=output if echo else None), output, pace)
+    controller = GameController(ui, ponder)
+    try:
+        controller.initialize_game()
+        controller.start_game_loop()
+    except (SystemExit, EOFError):
+        pass
+    return controller
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Jungle console game from a script")
+    parser.add_argument("script", help="file with one input line per prompt ('-' for stdin)")
+    parser.add_argument("--pace", type=float, default=0.0, help="seconds per UI pause")
+    parser.add_argument("--quiet", action="store_true", help="do not print the game output")
+    args = parser.parse_args(argv)
+
+    if args.script == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(args.script) as file:
+            lines = file.readlines()
+    controller = run_script(lines, args.pace, _discard if args.quiet else print, echo=not args.quiet)
+    if controller.game is not None:
+        print(f"Script finished after {len(controller.game.move_history)} moves")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
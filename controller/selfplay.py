@@ -0,0 +1,218 @@
+"""
+Headless self-play: play many games between automatic policies across a
+process pool and stream the results to a compact binary file.
+
+Usage:
+    python -m controller.selfplay --games 200 --workers 4 --p1 random --p2 search --out data/selfplay.games
+    python -m controller.selfplay --games 200 --scaling      # games/sec for 1..N workers
+
+File format: the magic b"JSP1", then one record per game:
+    struct "<IbH"  game id, result (0/1 = winning player index, -1 = draw), plies
+    plies x uint16 encoded moves (from_sq | to_sq << 6)
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from model.bitboard import BIT
+from model.engine.evaluate import evaluate
+from model.engine.search import Searcher
+from model.game import Game
+from model.piece import SQUARE_POSITIONS
+from model.player import Player
+
+MAGIC = b"JSP1"
+RECORD = struct.Struct("<IbH")
+DRAW = -1
+POLICIES = ("random", "greedy", "search")
+
+# One searcher per worker process, reused across games
+_searcher = None
+
+
+def _winning_move(board, side, move):
+    """
+    True if the (already made) move entered the enemy den or took the last enemy piece.
+    """
+    return bool(BIT[move >> 6] & board.den_mask[1 - side]) or not board.side_bb[1 - side]
+
+
+def choose_move(policy, game, moves, rng, depth=2, time_limit=None):
+    """
+    Pick one of moves for the side to move according to policy.
+    """
+    if policy == "random":
+        return rng.choice(moves)
+    side = game.whose_turn
+    if policy == "greedy":
+        # one ply: take a win if there is one, else the best static score
+        best_score, best = None, []
+        for move in moves:
+            game.make_move(move)
+            if _winning_move(game.board, side, move):
+                score = float("inf")
+            else:
+                score = evaluate(game.board, side)
+            game.unmake_move()
+            if best_score is None or score > best_score:
+                best_score, best = score, [move]
+            elif score == best_score:
+                best.append(move)
+        return rng.choice(best)
+    if policy == "search":
+        global _searcher
+        if _searcher is None:
+            _searcher = Searcher(tt_size_mb=4)
+        return _searcher.search(game, max_depth=depth, time_limit=time_limit).best_move
+    raise ValueError(f"Unknown policy '{policy}'. Choose from {', '.join(POLICIES)}.")
+
+
+def play_game(game_id, policies, seed=0, max_plies=300, depth=2, time_limit=None):
+    """
+    Play one game without any UI.
+
+    Returns:
+        (game_id, result, moves) where result is the winner's player index
+        or DRAW when max_plies is reached or the game's repetition rules
+        (Game.check_draw) call a draw
+    """
+    rng = random.Random(seed * 1000003 + game_id)
+    game = Game(Player("*p1*"), Player("#p2#"))
+    moves_played = []
+    result = DRAW
+    while len(moves_played) < max_plies:
+        side = game.whose_turn
+        moves = game.rules.generate_all_moves(game.board, side)
+        if not moves:
+            result = 1 - side
+            break
+        move = choose_move(policies[side], game, moves, rng, depth, time_limit)
+        # Played through move_piece so the undo stack has what the chase
+        # rule looks at; the default "draw" rules never reject a legal move
+        game.move_piece(SQUARE_POSITIONS[move & 63], SQUARE_POSITIONS[move >> 6])
+        moves_played.append(move)
+        if _winning_move(game.board, side, move):
+            result = side
+            break
+        if game.check_draw()[0]:
+            break
+        game.switch_turn()
+    return game_id, result, moves_played
+
+
+def _play_game_job(job):
+    return play_game(*job)
+
+
+def write_game(file, game_id, result, moves):
+    """
+    Append one game record to an open binary file.
+    """
+    file.write(RECORD.pack(game_id, result, len(moves)))
+    file.write(array("H", moves).tobytes())
+
+
+def read_games(path):
+    """
+    Yield (game_id, result, moves) from a self-play file.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a self-play file.")
+        while True:
+            header = file.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            game_id, result, plies = RECORD.unpack(header)
+            moves = array("H")
+            moves.frombytes(file.read(2 * plies))
+            yield game_id, result, list(moves)
+
+
+def run_selfplay(games, workers, policies, out=None, seed=0, max_plies=300, depth=2, time_limit=None):
+    """
+    Play games across a process pool, streaming each finished game to out.
+
+    Returns a dict with wins per player, draws, plies and games_per_sec.
+    """
+    jobs = [(game_id, policies, seed, max_plies, depth, time_limit) for game_id in range(games)]
+    stats = {"wins": [0, 0], "draws": 0, "plies": 0}
+    file = None
+    if out:
+        directory = os.path.dirname(out)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file = open(out, "wb")
+        file.write(MAGIC)
+    start = time.perf_counter()
+    pool = None
+    try:
+        if workers <= 1:
+            results = map(_play_game_job, jobs)
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(_play_game_job, jobs, chunksize=max(1, games // (workers * 8)))
+        for game_id, result, moves in results:
+            if result == DRAW:
+                stats["draws"] += 1
+            else:
+                stats["wins"][result] += 1
+            stats["plies"] += len(moves)
+            if file is not None:
+                write_game(file, game_id, result, moves)
+    finally:
+        # also reached when a worker raises, so the pool never outlives the run
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if file is not None:
+            file.close()
+    elapsed = time.perf_counter() - start
+    stats["elapsed"] = elapsed
+    stats["games_per_sec"] = games / elapsed if elapsed > 0 else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Jungle self-play farm")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--p1", choices=POLICIES, default="random", help="policy of player 1 (top)")
+    parser.add_argument("--p2", choices=POLICIES, default="random", help="policy of player 2 (bottom)")
+    parser.add_argument("--depth", type=int, default=2, help="search depth of the 'search' policy")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per 'search' move")
+    parser.add_argument("--max-plies", type=int, default=300, help="declare a draw after this many plies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="file to stream games to")
+    parser.add_argument("--scaling", action="store_true", help="measure games/sec for 1..workers processes")
+    args = parser.parse_args(argv)
+    policies = (args.p1, args.p2)
+
+    if args.scaling:
+        baseline = None
+        for workers in range(1, args.workers + 1):
+            stats = run_selfplay(args.games, workers, policies, None, args.seed,
+                                 args.max_plies, args.depth, args.time_limit)
+            baseline = baseline or stats["games_per_sec"]
+            speedup = stats["games_per_sec"] / baseline if baseline else 0.0
+            print(f"{workers:>3} workers: {stats['games_per_sec']:8.2f} games/s  "
+                  f"speedup {speedup:5.2f}x  efficiency {speedup / workers:6.1%}")
+        return 0
+
+    stats = run_selfplay(args.games, args.workers, policies, args.out, args.seed,
+                         args.max_plies, args.depth, args.time_limit)
+    print(f"{args.games} games in {stats['elapsed']:.2f}s ({stats['games_per_sec']:.2f} games/s, "
+          f"{stats['plies'] / stats['elapsed']:.0f} plies/s) on {args.workers} workers")
+    print(f"p1 ({args.p1}) wins {stats['wins'][0]}, p2 ({args.p2}) wins {stats['wins'][1]}, "
+          f"draws {stats['draws']}")
+    if args.out:
+        print(f"Games written to '{args.out}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+"""
+Headless game server: many Games in one process behind an asyncio
+socket API, with no dependency on the console UI.
+
+Protocol: one JSON object per line in each direction. Requests carry a
+"cmd" field; every request gets exactly one response with "ok" (and
+"error" when ok is false). Board changes are pushed to both players of
+a game as {"event": "update", ...} lines, which may arrive between
+responses.
+
+    {"cmd": "create", "name": "Alice"}                  -> {"ok": true, "game": 1, "side": 0}
+    {"cmd": "join", "game": 1, "name": "Bob"}           -> {"ok": true, "game": 1, "side": 1}
+    {"cmd": "move", "game": 1, "from": "a7", "to": "a6"}
+    {"cmd": "undo", "game": 1}
+    {"cmd": "resign", "game": 1}
+    {"cmd": "save", "game": 1, "filename": "match1"}    -> data/match1.jungle
+    {"cmd": "state", "game": 1}
+    {"cmd": "moves", "game": 1}                         -> {"ok": true, "moves": {"a7": ["a6", "b7"], ...}}
+    {"cmd": "moves", "game": 1, "from": "a7"}           -> legal targets of one piece
+    {"cmd": "list"}                                     -> games waiting for a second player
+
+A move ends the mover's turn (there is no separate endturn command).
+The board is sent as 9 strings in the Game.setup_position notation.
+
+Usage:
+    python -m controller.server [--host 127.0.0.1] [--port 8765] [--unix PATH]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from model.game import Game
+from model.piece import Position
+from model.player import Player
+from model.save_game import SaveGame, encode_pieces, layout_from_pieces
+
+
+class CommandError(Exception):
+    """A request that cannot be carried out; reported back to the client."""
+
+
+def parse_square(coord):
+    """
+    Convert a coordinate like 'a7' to a Position, as GameController.convert_coordinate does.
+    """
+    if not isinstance(coord, str) or len(coord) != 2 or coord[0].lower() not in "abcdefg" \
+            or coord[1] not in "123456789":
+        raise CommandError(f"Bad coordinate {coord!r}.")
+    return Position(9 - int(coord[1]), ord(coord[0].lower()) - ord("a"))
+
+
+def square_name(pos):
+    """
+    Convert a Position back to a coordinate like 'a7'.
+    """
+    return f"{chr(ord('a') + pos.col)}{9 - pos.row}"
+
+
+class Session:
+    """
+    One game hosted by the server and the clients seated at it.
+
+    Attributes:
+        game_id (int): Id used by clients to address the game
+        game (Game): The game itself
+        clients (list): Client seated as side 0 / side 1, or None
+        winner (int): Winning side once the game is over, else None
+    """
+
+    def __init__(self, game_id, game):
+        self.game_id = game_id
+        self.game = game
+        self.clients = [None, None]
+        self.winner = None
+
+    def snapshot(self):
+        game = self.game
+        return {
+            "game": self.game_id,
+            "board": layout_from_pieces(encode_pieces(game.board)),
+            "turn": game.whose_turn,
+            "players": [player.name for player in game.players],
+            "undos": [player.undos for player in game.players],
+            "completed": game.completed,
+            "winner": self.winner,
+            "draw": game.draw_reason,
+        }
+
+
+class GameServer:
+    """
+    Transport-independent command handling for many concurrent games.
+
+    A client is any object with a send(message_dict) method; the asyncio
+    front end wraps each connection in one. Everything here is
+    synchronous and touches only the addressed Game, so a command costs
+    a move validation plus the JSON encoding of the update.
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self._next_id = 1
+        self._handlers = {
+            "create": self._create,
+            "join": self._join,
+            "move": self._move,
+            "undo": self._undo,
+            "resign": self._resign,
+            "save": self._save,
+            "state": self._state,
+            "moves": self._moves,
+            "list": self._list,
+        }
+
+    def handle(self, client, request):
+        """
+        Execute one request from client and return the response dict.
+        """
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "Request must be a JSON object."}
+        command = request.get("cmd")
+        handler = self._handlers.get(command) if isinstance(command, str) else None
+        if handler is None:
+            return {"ok": False, "error": f"Unknown command {command!r}."}
+        try:
+            response = handler(client, request)
+        except CommandError as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            # A malformed request must never cost the client its connection (and seat)
+            return {"ok": False, "error": f"Internal error: {type(e).__name__}."}
+        response["ok"] = True
+        return response
+
+    def disconnect(self, client):
+        """
+        Free every seat held by client and tell the opponents.
+        """
+        for game_id, session in list(self.sessions.items()):
+            if client not in session.clients:
+                continue
+            session.clients[session.clients.index(client)] = None
+            if not any(session.clients):
+                del self.sessions[game_id]
+            else:
+                self._push(session, {"event": "left", "game": game_id})
+
+    # ---------------- helpers ----------------
+
+    def _session(self, request):
+        game_id = request.get("game")
+        if not isinstance(game_id, int) or isinstance(game_id, bool):
+            raise CommandError(f"No game {game_id!r}.")
+        session = self.sessions.get(game_id)
+        if session is None:
+            raise CommandError(f"No game {request.get('game')!r}.")
+        return session
+
+    def _seat(self, client, session):
+        if client not in session.clients:
+            raise CommandError("You are not playing this game.")
+        return session.clients.index(client)
+
+    def _push(self, session, message):
+        for seated in session.clients:
+            if seated is not None:
+                seated.send(message)
+
+    def _update(self, session, **extra):
+        message = session.snapshot()
+        message["event"] = "update"
+        message.update(extra)
+        self._push(session, message)
+
+    # ---------------- commands ----------------
+
+    def _create(self, client, request):
+        name = str(request.get("name") or "Player 1")
+        game_id = self._next_id
+        self._next_id += 1
+        session = Session(game_id, Game(Player(name), Player("Player 2")))
+        session.clients[0] = client
+        self.sessions[game_id] = session
+        return {"game": game_id, "side": 0}
+
+    def _join(self, client, request):
+        session = self._session(request)
+        if session.clients[1] is not None:
+            raise CommandError("Game is full.")
+        if session.clients[0] is client:
+            raise CommandError("You already play this game.")
+        session.clients[1] = client
+        session.game.players[1].name = str(request.get("name") or "Player 2")
+        self._update(session)
+        return {"game": session.game_id, "side": 1}
+
+    def _move(self, client, request):
+        session = self._session(request)
+        side = self._seat(client, session)
+        game = session.game
+        if game.completed:
+            raise CommandError("The game has ended.")
+        if None in session.clients:
+            raise CommandError("Waiting for an opponent.")
+        if side != game.whose_turn:
+            raise CommandError("Not your turn.")
+        from_pos, to_pos = parse_square(request.get("from")), parse_square(request.get("to"))
+        valid, message = game.move_piece(from_pos, to_pos)
+        if not valid:
+            raise CommandError(message)
+        won, winner = game.check_victory(game.players[side], to_pos)
+        drawn, reason = (False, None) if won else game.check_draw()
+        if won:
+            game.completed = True
+            session.winner = winner
+        elif drawn:
+            game.completed = True
+            game.draw_reason = reason
+        else:
+            game.switch_turn()
+        self._update(session, move=[request["from"], request["to"]])
+        return {}
+
+    def _undo(self, client, request):
+        session = self._session(request)
+        side = self._seat(client, session)
+        game = session.game
+        if game.completed:
+            raise CommandError("The game has ended.")
+        if not game.move_stack or game.move_stack[-1]["prev_turn"] != side:
+            raise CommandError("You can only undo your own last move.")
+        if game.players[side].undos <= 0:
+            raise CommandError("No undos left.")
+        game.undo_move()
+        game.players[side].undos -= 1
+        self._update(session)
+        return {}
+
+    def _resign(self, client, request):
+        session = self._session(request)
+        side = self._seat(client, session)
+        if session.game.completed:
+            raise CommandError("The game has ended.")
+        session.game.completed = True
+        session.winner = 1 - side
+        self._update(session, resigned=side)
+        return {}
+
+    def _save(self, client, request):
+        session = self._session(request)
+        self._seat(client, session)
+        filename = request.get("filename") or f"game{session.game_id}"
+        if not isinstance(filename, str):
+            raise CommandError(f"Bad filename {filename!r}.")
+        name = os.path.basename(filename)
+        if not name.endswith(".jungle"):
+            name += ".jungle"
+        path = os.path.join("data", name)
+        if not SaveGame.save_game(session.game, path):
+            raise CommandError(f"Could not save to '{path}'.")
+        return {"path": path}
+
+    def _state(self, client, request):
+        return self._session(request).snapshot()
+
+    def _moves(self, client, request):
+        game = self._session(request).game
+        if "from" in request:
+            piece = game.board.piece_at(parse_square(request["from"]))
+            if piece is None:
+                raise CommandError(f"No piece on {request['from']}.")
+            pieces = {piece: game.legal_moves(piece)}
+        else:
+            pieces = game.legal_moves()
+        return {"moves": {square_name(piece.position): [square_name(pos) for pos in targets]
+                          for piece, targets in pieces.items()}}
+
+    def _list(self, client, request):
+        return {"games": [{"game": game_id, "player": session.game.players[0].name}
+                          for game_id, session in self.sessions.items()
+                          if session.clients[1] is None and not session.game.completed]}
+
+
+class _Connection:
+    """
+    A connected socket client; messages are queued on the transport.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def send(self, message):
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+
+async def _serve_client(server, reader, writer):
+    client = _Connection(writer)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"ok": False, "error": "Invalid JSON."}
+            else:
+                response = server.handle(client, request)
+            client.send(response)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        server.disconnect(client)
+        writer.close()
+
+
+async def start(server=None, host="127.0.0.1", port=8765, unix_path=None):
+    """
+    Start listening and return the asyncio server object.
+    """
+    server = server if server is not None else GameServer()
+
+    async def on_connect(reader, writer):
+        await _serve_client(server, reader, writer)
+
+    if unix_path:
+        return await asyncio.start_unix_server(on_connect, path=unix_path)
+    return await asyncio.start_server(on_connect, host, port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jungle game server (line-delimited JSON)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on a Unix socket instead of TCP")
+    args = parser.parse_args(argv)
+
+    async def run():
+        listener = await start(host=args.host, port=args.port, unix_path=args.unix)
+        where = args.unix or f"{args.host}:{args.port}"
+        print(f"Jungle server listening on {where}")
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
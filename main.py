@@ -1,11 +1,24 @@
-from view.userinterface import UserInterface
+import argparse
+
+from view.userinterface import UserInterface, ScriptedInput
 from controller.game_controller import GameController
 
-def main():
-    ui = UserInterface()
-    controller = GameController(ui)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jungle chess")
+    parser.add_argument("--pace", type=float, default=0.5, help="seconds to pause after messages (0 = none)")
+    parser.add_argument("--script", default=None, help="read input lines from this file instead of the keyboard")
+    parser.add_argument("--ansi", action="store_true", help="redraw the board in place (ANSI terminals)")
+    parser.add_argument("--no-ponder", action="store_true", help="do not analyse in the background")
+    args = parser.parse_args(argv)
+
+    if args.script:
+        with open(args.script) as file:
+            ui = UserInterface(ScriptedInput(file.readlines(), echo=print), pace=args.pace, ansi=args.ansi)
+    else:
+        ui = UserInterface(pace=args.pace, ansi=args.ansi)
+    controller = GameController(ui, ponder=not args.no_ponder)
     controller.initialize_game()
     controller.start_game_loop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,121 @@
+"""
+Bitboard helpers for the 9x7 Jungle board.
+
+Squares are numbered row by row from the top-left corner, so square
+``row * 7 + col`` maps to bit ``1 << square`` of a 63-bit integer.
+Every set of squares (pieces of one rank, river, traps, dens...) can
+then be stored as a single int and combined with bit operations.
+"""
+
+ROWS = 9
+COLS = 7
+NUM_SQUARES = ROWS * COLS
+FULL_MASK = (1 << NUM_SQUARES) - 1
+
+# Square -> row / col / single-bit mask lookup tables
+ROW_OF = [sq // COLS for sq in range(NUM_SQUARES)]
+COL_OF = [sq % COLS for sq in range(NUM_SQUARES)]
+BIT = [1 << sq for sq in range(NUM_SQUARES)]
+
+
+def square_of(row, col):
+    """
+    Convert (row, col) indices to a square number 0..62.
+    """
+    return row * COLS + col
+
+
+def iter_bits(bb):
+    """
+    Yield the square number of every set bit, lowest square first.
+    """
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def popcount(bb):
+    """
+    Return the number of set bits.
+    """
+    return bb.bit_count()
+
+
+def mask_of(squares):
+    """
+    Build a bitboard from an iterable of square numbers.
+    """
+    bb = 0
+    for sq in squares:
+        bb |= BIT[sq]
+    return bb
+
+
+# Orthogonal neighbour squares and their combined mask for every square
+NEIGHBOURS = []
+NEIGHBOUR_MASK = []
+for _sq in range(NUM_SQUARES):
+    _row, _col = ROW_OF[_sq], COL_OF[_sq]
+    _adjacent = tuple(
+        square_of(_row + dr, _col + dc)
+        for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1))
+        if 0 <= _row + dr < ROWS and 0 <= _col + dc < COLS
+    )
+    NEIGHBOURS.append(_adjacent)
+    NEIGHBOUR_MASK.append(mask_of(_adjacent))
+del _sq, _row, _col, _adjacent
+
+_jump_tables = {}
+
+
+def jump_table(river_mask):
+    """
+    Return the Lion/Tiger jump table for a river layout.
+
+    Entry ``table[sq]`` is a tuple of ``(landing_sq, path_mask)`` pairs, one
+    per direction in which a straight line from ``sq`` crosses at least one
+    river square and lands on the first non-river square behind it.
+    ``path_mask`` holds the crossed river squares, so a jump is blocked
+    exactly when ``path_mask`` intersects the rat bitboard.
+    """
+    table = _jump_tables.get(river_mask)
+    if table is not None:
+        return table
+    table = []
+    for sq in range(NUM_SQUARES):
+        entries = []
+        if not BIT[sq] & river_mask:
+            for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                row, col = ROW_OF[sq] + dr, COL_OF[sq] + dc
+                path = 0
+                while 0 <= row < ROWS and 0 <= col < COLS and BIT[square_of(row, col)] & river_mask:
+                    path |= BIT[square_of(row, col)]
+                    row, col = row + dr, col + dc
+                if path and 0 <= row < ROWS and 0 <= col < COLS:
+                    entries.append((square_of(row, col), path))
+        table.append(tuple(entries))
+    _jump_tables[river_mask] = table
+    return table
+
+
+# Moves are packed as from_sq | (to_sq << 6)
+def encode_move(from_sq, to_sq):
+    """
+    Pack a move into a 12-bit integer.
+    """
+    return from_sq | (to_sq << 6)
+
+
+def move_from(move):
+    """
+    Return the origin square of an encoded move.
+    """
+    return move & 63
+
+
+def move_to(move):
+    """
+    Return the destination square of an encoded move.
+    """
+    return move >> 6
@@ -1,3 +1,13 @@
+from array import array
+
+from .bitboard import BIT, COL_OF, NUM_SQUARES, ROW_OF, square_of
+from .piece import SQUARE_POSITIONS
+from .zobrist import PIECE_KEYS
+
+# Size of the make/unmake undo ring buffer (power of two)
+UNDO_CAPACITY = 1024
+
+
 class Board:
     """
     A game board that manages pieces and cells on a grid.
@@ -11,9 +21,22 @@ class Board:
         cols (int): Number of columns in the board (default: 7)
         grid (list): 2D list representing the board state, where each element
                     is a tuple (piece, cell)
+        players (list): The two owners, indexed by side (0 = top, 1 = bottom)
+        squares (list): Flat list of 63 pieces (or None) indexed by square number
+        piece_bb (list): piece_bb[side][rank] is a bitboard of that side's pieces
+                    of that rank (index 0 unused)
+        side_bb (list): side_bb[side] is a bitboard of all pieces of that side
+        river_mask (int): Bitboard of river squares
+        trap_mask (list): trap_mask[side] is a bitboard of the traps owned by side
+        den_mask (list): den_mask[side] is a bitboard of the den owned by side
+        zobrist (int): Zobrist key of the piece placement (see model.zobrist)
+
+    The grid stays the source of the piece objects; the bitboards mirror it
+    and are kept in sync by every mutating method so rule checks can answer
+    occupancy and terrain questions with bit operations.
     """
     
-    def __init__(self, piece_list, cell_list):
+    def __init__(self, piece_list, cell_list, players=None):
         """
         Initialize the board with pieces and cells.
         
@@ -22,13 +45,125 @@ class Board:
                             representing initial piece placements
             cell_list (list): List of tuples in format (row, col, (cell_name, owner))
                             representing board cells and their properties
+            players (list): Optional [side0_owner, side1_owner]. When omitted the
+                            owners are taken from the cells and pieces, top first.
         """
         self.rows = 9
         self.cols = 7
         # Create grid where each position is a tuple (piece, cell)
         self.grid = [[(None, None) for _ in range(self.cols)] for _ in range(self.rows)]
         #self.move_history = []
+        self.players = list(players) if players is not None else self._derive_players(piece_list, cell_list)
         self.setup_board(piece_list, cell_list)
+        self._init_undo_buffer()
+
+    def __getstate__(self):
+        """
+        Pickle the board without the make/unmake ring buffer.
+        """
+        state = self.__dict__.copy()
+        for key in ("_undo_moves", "_undo_captured", "_undo_index", "_undo_size"):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore a pickled board. Boards saved before the bitboard backend
+        existed only carry the grid, so the bitboards are rebuilt from it.
+        """
+        self.__dict__.update(state)
+        self._init_undo_buffer()
+        if "zobrist" not in state:
+            pieces = []
+            cells = []
+            for row in range(self.rows):
+                for col in range(self.cols):
+                    piece, cell = self.grid[row][col]
+                    cells.append((row, col, cell))
+                    if piece is not None:
+                        pieces.append((row, col, piece))
+            self.players = self._derive_players(pieces, cells)
+            self._rebuild_bitboards()
+
+    @staticmethod
+    def _derive_players(piece_list, cell_list):
+        """
+        Collect the two owners in board order (top side first).
+        """
+        owners = []
+        for _, _, cell in cell_list:
+            owner = cell[1] if cell else None
+            if owner is not None and owner not in owners:
+                owners.append(owner)
+        for _, _, piece in piece_list:
+            if piece.owner not in owners:
+                owners.append(piece.owner)
+        while len(owners) < 2:
+            owners.append(None)
+        return owners[:2]
+
+    def side_of(self, owner):
+        """
+        Return the side index (0 or 1) of a piece owner.
+        """
+        return 0 if owner is self.players[0] else 1
+
+    def _rebuild_bitboards(self):
+        """
+        Recompute the flat square list, piece bitboards and terrain masks
+        from the grid.
+        """
+        self.squares = [None] * NUM_SQUARES
+        self.piece_bb = [[0] * 9, [0] * 9]
+        self.side_bb = [0, 0]
+        self.zobrist = 0
+        self.river_mask = 0
+        self.trap_mask = [0, 0]
+        self.den_mask = [0, 0]
+        for row in range(self.rows):
+            for col in range(self.cols):
+                piece, cell = self.grid[row][col]
+                sq = square_of(row, col)
+                if piece is not None:
+                    self._set_piece_bits(piece, sq)
+                if not cell:
+                    continue
+                terrain, owner = cell
+                if terrain == "~":
+                    self.river_mask |= BIT[sq]
+                elif terrain == "trap":
+                    self.trap_mask[self.side_of(owner)] |= BIT[sq]
+                elif terrain == "den":
+                    self.den_mask[self.side_of(owner)] |= BIT[sq]
+
+    def _init_undo_buffer(self):
+        """
+        Preallocate the ring buffer used by make_move / unmake_move.
+        """
+        self._undo_moves = array("H", bytes(2 * UNDO_CAPACITY))
+        self._undo_captured = [None] * UNDO_CAPACITY
+        self._undo_index = 0
+        self._undo_size = 0
+
+    def _set_piece_bits(self, piece, sq):
+        side = self.side_of(piece.owner)
+        self.squares[sq] = piece
+        self.piece_bb[side][piece.rank] |= BIT[sq]
+        self.side_bb[side] |= BIT[sq]
+        self.zobrist ^= PIECE_KEYS[side][piece.rank][sq]
+
+    def _clear_piece_bits(self, piece, sq):
+        side = self.side_of(piece.owner)
+        self.squares[sq] = None
+        self.piece_bb[side][piece.rank] &= ~BIT[sq]
+        self.side_bb[side] &= ~BIT[sq]
+        self.zobrist ^= PIECE_KEYS[side][piece.rank][sq]
+
+    def occupied(self):
+        """
+        Return a bitboard of every occupied square.
+        """
+        return self.side_bb[0] | self.side_bb[1]
         
     def setup_board(self, piece_list, cell_list):
         """
@@ -56,6 +191,8 @@ class Board:
             current_piece = self.grid[row][col][0]  # Preserve existing piece
             self.grid[row][col] = (current_piece, cell)
 
+        self._rebuild_bitboards()
+
     def place(self, piece, pos):
         """
         Place a piece at the specified position.
@@ -68,8 +205,12 @@ class Board:
             pos: Position object with row and col attributes
         """
         # place dead piece for undo
-        cell = self.grid[pos.row][pos.col][1]
+        current, cell = self.grid[pos.row][pos.col]
         self.grid[pos.row][pos.col] = (piece, cell)
+        sq = square_of(pos.row, pos.col)
+        if current is not None:
+            self._clear_piece_bits(current, sq)
+        self._set_piece_bits(piece, sq)
         piece.position = pos
 
     def remove_piece_at(self, pos):
@@ -86,6 +227,7 @@ class Board:
 
         if piece is not None:
             self.grid[pos.row][pos.col] = (None, cell)
+            self._clear_piece_bits(piece, square_of(pos.row, pos.col))
         return piece
 
     def move_piece(self, piece, to_pos):
@@ -111,6 +253,12 @@ class Board:
 
         self.grid[from_pos.row][from_pos.col] = (None, from_pos_cell)
         self.grid[to_pos.row][to_pos.col] = (piece, to_pos_cell)
+        if from_pos_piece is not None:
+            self._clear_piece_bits(from_pos_piece, square_of(from_pos.row, from_pos.col))
+        to_sq = square_of(to_pos.row, to_pos.col)
+        if to_pos_piece is not None:
+            self._clear_piece_bits(to_pos_piece, to_sq)
+        self._set_piece_bits(piece, to_sq)
         piece.position = to_pos
 
     def piece_at(self, pos):
@@ -135,4 +283,106 @@ class Board:
         Returns:
             The cell object at the position, or None if no cell is defined
         """
-        return self.grid[pos.row][pos.col][1]
\ No newline at end of file
+        return self.grid[pos.row][pos.col][1]
+
+    def make_move(self, move):
+        """
+        Apply an encoded move (from_sq | to_sq << 6) without validation.
+
+        Captures are removed from the board only; the caller owns the
+        piece bookkeeping (is_alive, player piece lists). The move and the
+        captured piece go to a preallocated ring buffer of UNDO_CAPACITY
+        entries so unmake_move can revert it without any allocation.
+
+        Args:
+            move (int): Encoded move
+
+        Returns:
+            The captured piece object, or None
+        """
+        from_sq = move & 63
+        to_sq = move >> 6
+        squares = self.squares
+        piece = squares[from_sq]
+        captured = squares[to_sq]
+        from_bit = BIT[from_sq]
+        to_bit = BIT[to_sq]
+
+        side = 0 if piece.owner is self.players[0] else 1
+        keys = PIECE_KEYS[side][piece.rank]
+        zobrist = self.zobrist ^ keys[from_sq] ^ keys[to_sq]
+        if captured is not None:
+            self.piece_bb[1 - side][captured.rank] ^= to_bit
+            self.side_bb[1 - side] ^= to_bit
+            zobrist ^= PIECE_KEYS[1 - side][captured.rank][to_sq]
+        self.zobrist = zobrist
+        self.piece_bb[side][piece.rank] ^= from_bit | to_bit
+        self.side_bb[side] ^= from_bit | to_bit
+        squares[from_sq] = None
+        squares[to_sq] = piece
+
+        from_row = self.grid[ROW_OF[from_sq]]
+        to_row = self.grid[ROW_OF[to_sq]]
+        from_col = COL_OF[from_sq]
+        to_col = COL_OF[to_sq]
+        from_row[from_col] = (None, from_row[from_col][1])
+        to_row[to_col] = (piece, to_row[to_col][1])
+        piece.position = SQUARE_POSITIONS[to_sq]
+
+        index = (self._undo_index + 1) & (UNDO_CAPACITY - 1)
+        self._undo_moves[index] = move
+        self._undo_captured[index] = captured
+        self._undo_index = index
+        if self._undo_size < UNDO_CAPACITY:
+            self._undo_size += 1
+        return captured
+
+    def unmake_move(self):
+        """
+        Revert the most recent make_move.
+
+        Returns:
+            The piece that the reverted move had captured, or None
+
+        Raises:
+            IndexError: if there is no move left in the ring buffer
+        """
+        if not self._undo_size:
+            raise IndexError("No move to unmake.")
+        index = self._undo_index
+        move = self._undo_moves[index]
+        captured = self._undo_captured[index]
+        self._undo_captured[index] = None
+        self._undo_index = (index - 1) & (UNDO_CAPACITY - 1)
+        self._undo_size -= 1
+
+        from_sq = move & 63
+        to_sq = move >> 6
+        squares = self.squares
+        piece = squares[to_sq]
+        from_bit = BIT[from_sq]
+        to_bit = BIT[to_sq]
+
+        side = 0 if piece.owner is self.players[0] else 1
+        keys = PIECE_KEYS[side][piece.rank]
+        zobrist = self.zobrist ^ keys[from_sq] ^ keys[to_sq]
+        self.piece_bb[side][piece.rank] ^= from_bit | to_bit
+        self.side_bb[side] ^= from_bit | to_bit
+        if captured is not None:
+            self.piece_bb[1 - side][captured.rank] ^= to_bit
+            self.side_bb[1 - side] ^= to_bit
+            zobrist ^= PIECE_KEYS[1 - side][captured.rank][to_sq]
+        self.zobrist = zobrist
+        squares[from_sq] = piece
+        squares[to_sq] = captured
+
+        from_row = self.grid[ROW_OF[from_sq]]
+        to_row = self.grid[ROW_OF[to_sq]]
+        from_col = COL_OF[from_sq]
+        to_col = COL_OF[to_sq]
+        from_row[from_col] = (piece, from_row[from_col][1])
+        to_row[to_col] = (captured, to_row[to_col][1])
+        piece.position = SQUARE_POSITIONS[from_sq]
+        if captured is not None:
+            captured.position = SQUARE_POSITIONS[to_sq]
+        return captured
@@ -0,0 +1,125 @@
+"""
+Vectorized evaluation of many positions at once with NumPy.
+
+Positions are encoded as an (N, 16, 9, 7) array of 0/1 piece planes:
+plane ``side * 8 + rank - 1`` marks the squares holding that side's
+pieces of that rank. Every evaluation term (material, distance to the
+den, trap exposure, rats holding the river) is linear in those planes,
+so the whole score is one tensordot with a (16, 9, 7) weight tensor.
+
+NumPy is optional for the rest of the project; this module raises
+ImportError on use when it is missing.
+"""
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from ..bitboard import COLS, NUM_SQUARES, ROWS
+from ..rank import Rank
+from .evaluate import ADVANCE, PIECE_VALUES
+
+PLANES = 16
+
+# Penalty for a piece standing in an opposing trap (any enemy may take it)
+TRAP_WEIGHT = 150
+# Bonus for a rat in the river (blocks jumps, safe from everything but rats)
+RIVER_WEIGHT = 40
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("NumPy is required for batch evaluation (pip install numpy).")
+
+
+def plane_index(side, rank):
+    """
+    Return the plane holding side's pieces of rank.
+    """
+    return side * 8 + int(rank) - 1
+
+
+def encode_boards(boards):
+    """
+    Encode Board objects into an (N, 16, 9, 7) uint8 plane array,
+    expanding every piece bitboard with one vectorized shift.
+    """
+    _require_numpy()
+    bitboards = np.array(
+        [[board.piece_bb[side][rank] for side in (0, 1) for rank in range(1, 9)] for board in boards],
+        dtype=np.uint64,
+    ).reshape(-1, PLANES)
+    shifts = np.arange(NUM_SQUARES, dtype=np.uint64)
+    bits = (bitboards[:, :, None] >> shifts) & np.uint64(1)
+    return bits.astype(np.uint8).reshape(-1, PLANES, ROWS, COLS)
+
+
+def encode_games(games):
+    """
+    Encode Game objects; returns (planes, sides_to_move).
+    """
+    _require_numpy()
+    planes = encode_boards([game.board for game in games])
+    sides = np.array([game.whose_turn for game in games], dtype=np.int8)
+    return planes, sides
+
+
+def _terrain_masks(board):
+    """
+    (river, trap[side]) masks as (9, 7) arrays from a Board's bitboards.
+    """
+    def to_grid(bb):
+        return np.array([(bb >> sq) & 1 for sq in range(NUM_SQUARES)], dtype=np.int64).reshape(ROWS, COLS)
+
+    return to_grid(board.river_mask), [to_grid(board.trap_mask[0]), to_grid(board.trap_mask[1])]
+
+
+class BatchEvaluator:
+    """
+    Scores batches of encoded positions.
+
+    The weight tensor reproduces evaluate.evaluate (material + den
+    distance) and adds the trap-exposure and river-control terms, all from
+    side 0's point of view.
+
+    Attributes:
+        weights (ndarray): (16, 9, 7) int64 weight per plane and square
+    """
+
+    def __init__(self, board, trap_weight=TRAP_WEIGHT, river_weight=RIVER_WEIGHT):
+        """
+        Args:
+            board: Any Board with the standard terrain; only its masks are read
+            trap_weight (int): Penalty per piece standing in an opposing trap
+            river_weight (int): Bonus per rat in the river
+        """
+        _require_numpy()
+        river, traps = _terrain_masks(board)
+        advance = [np.array(ADVANCE[side], dtype=np.int64).reshape(ROWS, COLS) for side in (0, 1)]
+        weights = np.zeros((PLANES, ROWS, COLS), dtype=np.int64)
+        for side in (0, 1):
+            sign = 1 if side == 0 else -1
+            for rank in Rank:
+                plane = weights[plane_index(side, rank)]
+                plane += sign * (PIECE_VALUES[rank] + advance[side])
+                plane -= sign * trap_weight * traps[1 - side]
+                if rank == Rank.RAT:
+                    plane += sign * river_weight * river
+        self.weights = weights
+
+    def evaluate(self, planes, sides=None):
+        """
+        Score an (N, 16, 9, 7) plane array.
+
+        Args:
+            planes: Encoded positions
+            sides: Optional (N,) array of sides to move; when given each score
+                   is from that side's point of view instead of side 0's
+
+        Returns:
+            (N,) int64 score array
+        """
+        scores = np.tensordot(planes.astype(np.int64), self.weights, axes=3)
+        if sides is not None:
+            scores = np.where(np.asarray(sides) == 0, scores, -scores)
+        return scores
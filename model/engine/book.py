@@ -0,0 +1,174 @@
+"""
+Opening book: moves played from early positions in archived and
+self-play games, with how often each was played and won.
+
+File format (little-endian), designed to be searched in place through
+mmap without loading it:
+
+    header:  magic b"JBK1", u32 entry count
+    entries: struct "<QHII" (position key, move, played, won),
+             sorted by key then move
+
+Keys are Game.position_key() of the position before the move, with the
+mover to move.
+"""
+import mmap
+import os
+import struct
+
+from ..game_rules import GameRules
+
+MAGIC = b"JBK1"
+HEADER = struct.Struct("<4sI")
+ENTRY = struct.Struct("<QHII")
+BOOK_PLIES = 16
+DEFAULT_BOOK = os.path.join("data", "opening.book")
+
+
+class BookBuilder:
+    """
+    Aggregates (position, move) counts from finished games.
+
+    Attributes:
+        max_plies (int): Only the first max_plies moves of a game are counted
+        stats (dict): (key, move) -> [played, won]
+    """
+
+    def __init__(self, max_plies=BOOK_PLIES):
+        self.max_plies = max_plies
+        self.stats = {}
+        self.rules = GameRules()
+
+    def add_game(self, game, moves, result):
+        """
+        Count the opening moves of one game.
+
+        Args:
+            game: Game in the starting position of moves (it is played forward)
+            moves: Encoded moves (from_sq | to_sq << 6)
+            result: Index of the winning player, or anything else if nobody won
+
+        Returns the number of moves counted; counting stops at the first
+        move that is not legal in the replayed position.
+        """
+        counted = 0
+        board = game.board
+        for move in moves[:self.max_plies]:
+            mover = board.squares[move & 63]
+            if mover is None:
+                break
+            side = board.side_of(mover.owner)
+            game.whose_turn = side
+            if move not in self.rules.generate_all_moves(board, side):
+                break
+            entry = self.stats.setdefault((game.position_key(), move), [0, 0])
+            entry[0] += 1
+            if result == side:
+                entry[1] += 1
+            game.make_move(move)
+            counted += 1
+        return counted
+
+    def to_bytes(self, min_played=1):
+        """
+        Encode the book, dropping moves played fewer than min_played times.
+        """
+        entries = sorted((key, move, played, won) for (key, move), (played, won) in self.stats.items()
+                         if played >= min_played)
+        parts = [HEADER.pack(MAGIC, len(entries))]
+        parts.extend(ENTRY.pack(*entry) for entry in entries)
+        return b"".join(parts)
+
+    def write(self, filename, min_played=1):
+        """
+        Write the book file. Returns the number of entries written.
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = self.to_bytes(min_played)
+        with open(filename, "wb") as file:
+            file.write(data)
+        return HEADER.unpack_from(data)[1]
+
+
+class OpeningBook:
+    """
+    Read-only book searched in place: a lookup is a binary search over
+    the memory-mapped entries, O(log n) with no parsing up front.
+
+    Attributes:
+        entries (int): Number of (position, move) entries
+    """
+
+    def __init__(self, source):
+        """
+        Args:
+            source: A book filename, or the bytes of a book
+        """
+        if isinstance(source, (bytes, bytearray)):
+            self._file = None
+            self._data = bytes(source)
+        else:
+            self._file = open(source, "rb")
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.entries = HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("Not a Jungle opening book.")
+
+    def close(self):
+        if self._file is not None:
+            self._data.close()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _key_at(self, index):
+        return struct.unpack_from("<Q", self._data, HEADER.size + index * ENTRY.size)[0]
+
+    def lookup(self, key):
+        """
+        Return [(move, played, won)] stored for a position key.
+        """
+        lo, hi = 0, self.entries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        moves = []
+        offset = HEADER.size + lo * ENTRY.size
+        while lo < self.entries:
+            entry_key, move, played, won = ENTRY.unpack_from(self._data, offset)
+            if entry_key != key:
+                break
+            moves.append((move, played, won))
+            lo += 1
+            offset += ENTRY.size
+        return moves
+
+    def choose(self, game, rng=None, min_played=1):
+        """
+        Pick a book move for the side to move, or None when out of book.
+
+        Without rng the most played move is returned (ties broken by wins);
+        with rng a move is drawn with probability proportional to how often
+        it was played. Moves that are not legal here (a key collision) are
+        ignored.
+        """
+        legal = set(game.rules.generate_all_moves(game.board, game.whose_turn))
+        candidates = [(move, played, won) for move, played, won in self.lookup(game.position_key())
+                      if played >= min_played and move in legal]
+        if not candidates:
+            return None
+        if rng is None:
+            return max(candidates, key=lambda entry: (entry[1], entry[2], -entry[0]))[0]
+        return rng.choices([entry[0] for entry in candidates], weights=[entry[1] for entry in candidates])[0]
+
@@ -0,0 +1,93 @@
+import os
+
+from ..player import Player
+from ..piece import SQUARE_POSITIONS
+from .book import DEFAULT_BOOK, OpeningBook
+from .search import Searcher
+from .tablebase import DEFAULT_DIR, Tablebase
+
+
+class EnginePlayer(Player):
+    """
+    A Player whose moves are chosen by the alpha-beta Searcher.
+
+    The controller asks choose_move for a move whenever it is this
+    player's turn and plays it like a human move. While the position is
+    in the opening book (book_path, if the file exists) the book move is
+    played without searching, and endgames covered by the tablebase
+    files in tablebase_dir (if the directory exists) are played exactly.
+    """
+
+    def __init__(self, name, max_depth=6, time_limit=1.0, tt_size_mb=16, book_path=DEFAULT_BOOK,
+                 tablebase_dir=DEFAULT_DIR):
+        super().__init__(name)
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.tt_size_mb = tt_size_mb
+        self.book_path = book_path
+        self.tablebase_dir = tablebase_dir
+        self.searcher = self._new_searcher()
+        self.book = None
+        self.last_result = None
+
+    def __getstate__(self):
+        # The searcher only holds scratch tables (and tablebase file
+        # mappings) and the book is a file mapping; all are rebuilt after loading
+        state = super().__getstate__()
+        state.pop("searcher", None)
+        state["book"] = None
+        state["last_result"] = None
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.__dict__.setdefault("book_path", DEFAULT_BOOK)
+        self.__dict__.setdefault("book", None)
+        self.__dict__.setdefault("tablebase_dir", DEFAULT_DIR)
+        self.searcher = self._new_searcher()
+
+    def _new_searcher(self):
+        tablebase = None
+        if self.tablebase_dir and os.path.isdir(self.tablebase_dir):
+            tablebase = Tablebase(self.tablebase_dir)
+        return Searcher(tt_size_mb=self.tt_size_mb, tablebase=tablebase)
+
+    def close(self):
+        """
+        Release what the engine holds between moves; the alpha-beta
+        engine has nothing to release, subclasses may.
+        """
+
+    def book_move(self, game):
+        """
+        Return the book move for the current position, or None.
+        The book is opened on first use.
+        """
+        if self.book is None:
+            if not self.book_path or not os.path.exists(self.book_path):
+                return None
+            self.book = OpeningBook(self.book_path)
+        return self.book.choose(game)
+
+    def choose_move(self, game, pondered=None, exclude=()):
+        """
+        Search the current position and return (from_pos, to_pos), or None
+        if there is no legal move.
+
+        pondered is an optional SearchResult for this position from the
+        background analysis; it is played without searching again once
+        it has reached max_depth. exclude holds encoded moves that must
+        not be chosen (moves a repetition rule has rejected).
+        """
+        move = self.book_move(game)
+        if move is not None and move not in exclude:
+            self.last_result = "book move"
+        elif pondered is not None and pondered.depth >= self.max_depth and pondered.best_move not in exclude:
+            self.last_result = pondered
+            move = pondered.best_move
+        else:
+            self.last_result = self.searcher.search(game, self.max_depth, self.time_limit, exclude=exclude)
+            move = self.last_result.best_move
+        if move is None:
+            return None
+        return SQUARE_POSITIONS[move & 63], SQUARE_POSITIONS[move >> 6]
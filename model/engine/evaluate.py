@@ -0,0 +1,46 @@
+"""
+Static evaluation of a Jungle position, read straight off the bitboards.
+"""
+from ..bitboard import COL_OF, NUM_SQUARES, ROW_OF
+from ..rank import Rank
+
+# Material value of each rank (index = rank value, 0 unused). The rat is
+# worth more than its rank because it is the only piece that can take the
+# elephant and can block river jumps.
+PIECE_VALUES = [0, 450, 200, 250, 300, 500, 800, 900, 1000]
+
+# Bonus for standing close to the opposing den, indexed [side][square]
+DEN_SQUARES = (3, 59)  # (0, 3) is side 0's den, (8, 3) is side 1's den
+ADVANCE = [
+    [
+        max(0, 12 - abs(ROW_OF[sq] - ROW_OF[DEN_SQUARES[1 - side]])
+            - abs(COL_OF[sq] - COL_OF[DEN_SQUARES[1 - side]])) ** 2
+        for sq in range(NUM_SQUARES)
+    ]
+    for side in (0, 1)
+]
+
+RANKS = tuple(Rank)
+
+
+def side_score(board, side):
+    """
+    Material plus advancement of one side.
+    """
+    score = 0
+    advance = ADVANCE[side]
+    pieces = board.piece_bb[side]
+    for rank in RANKS:
+        bb = pieces[rank]
+        while bb:
+            low = bb & -bb
+            bb ^= low
+            score += PIECE_VALUES[rank] + advance[low.bit_length() - 1]
+    return score
+
+
+def evaluate(board, side):
+    """
+    Score the board from the point of view of side (positive = good for side).
+    """
+    return side_score(board, side) - side_score(board, 1 - side)
@@ -0,0 +1,359 @@
+"""
+Monte Carlo Tree Search (UCT) over GameRules move generation.
+
+Each iteration walks down the tree by UCT, expands one untried move,
+plays the game out with fast playouts and backs the result up the path.
+Playouts are cut off after max_playout_plies and scored from the static
+evaluation, so they stay cheap even in the long shuffling middlegames.
+
+Parallelism is across the root: each worker process grows its own tree
+from the same position with a different seed and the root visit counts
+are summed. Trees cannot be shared between processes without copying
+them, so root parallelism is the variant that scales here.
+
+Usage:
+    python -m model.engine.mcts [--playouts 2000] [--time-limit S] [--workers N] [--playout random|heuristic]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ..bitboard import BIT
+from ..game import Game
+from ..game_rules import GameRules
+from ..player import Player
+from ..piece import SQUARE_POSITIONS
+from ..save_game import encode_pieces, layout_from_pieces
+from .engine_player import EnginePlayer
+from .evaluate import PIECE_VALUES, evaluate
+from .search import move_to_str
+
+PLAYOUTS = ("random", "heuristic")
+
+# Evaluation difference (side 0 minus side 1) that maps to a ~73% win
+# chance when a playout is cut off
+EVAL_SCALE = 600.0
+
+
+class MCTSResult:
+    """
+    Outcome of a tree search.
+
+    Attributes:
+        best_move (int): Most visited root move, None if there is no legal move
+        value (float): Estimated win probability of the side to move
+        playouts (int): Iterations run over all workers
+        elapsed (float): Seconds spent searching
+        children (list): (move, visits, value) per root move, most visited first
+    """
+
+    def __init__(self, best_move, value, playouts, elapsed, children):
+        self.best_move = best_move
+        self.value = value
+        self.playouts = playouts
+        self.elapsed = elapsed
+        self.children = children
+
+    @property
+    def playouts_per_sec(self):
+        return int(self.playouts / self.elapsed) if self.elapsed > 0 else 0
+
+    def __str__(self):
+        best = move_to_str(self.best_move) if self.best_move is not None else "none"
+        return (f"mcts {best} value {self.value:.3f} playouts {self.playouts} "
+                f"pps {self.playouts_per_sec}")
+
+
+class _Node:
+    """
+    A tree node; wins are counted for the side that played move.
+    """
+    __slots__ = ("move", "parent", "mover", "children", "untried", "visits", "wins", "winner")
+
+    def __init__(self, move, parent, mover, untried):
+        self.move = move
+        self.parent = parent
+        self.mover = mover
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        # Side that has won once move is played, or None if the game goes on
+        self.winner = None
+
+
+class MCTS:
+    """
+    UCT searcher working on a Game through make_move/unmake_move.
+
+    Terminal positions follow the same rules as the alpha-beta Searcher:
+    a move into the opponent's den or one that takes the opponent's last
+    piece wins, and a side with no legal move loses. With workers > 1
+    the search runs in a process pool that is kept until close().
+    """
+
+    def __init__(self, rules=None, exploration=1.4, playout="heuristic", max_playout_plies=40, workers=1,
+                 seed=None):
+        if playout not in PLAYOUTS:
+            raise ValueError(f"Unknown playout '{playout}'. Choose from {', '.join(PLAYOUTS)}.")
+        self.rules = rules if rules is not None else GameRules()
+        self.exploration = exploration
+        self.playout = playout
+        self.max_playout_plies = max_playout_plies
+        self.workers = max(1, workers)
+        self.rng = random.Random(seed)
+        self._pool = None
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def search(self, game, playouts=2000, time_limit=None, exclude=()):
+        """
+        Search the current position of game.
+
+        Args:
+            game: Game to search; it is restored to its original state on return
+            playouts (int): Iterations to run (split across the workers)
+            time_limit (float): Optional wall-clock limit in seconds
+            exclude: Encoded root moves not to consider
+
+        Returns:
+            MCTSResult
+        """
+        start = time.perf_counter()
+        if self.workers == 1:
+            stats, done = self.root_stats(game, playouts, time_limit, exclude)
+        else:
+            stats, done = self._parallel_stats(game, playouts, time_limit, exclude)
+        children = sorted(((move, visits, wins / visits) for move, (visits, wins) in stats.items() if visits),
+                          key=lambda child: -child[1])
+        if not children:
+            return MCTSResult(None, 0.0, done, time.perf_counter() - start, [])
+        visits = sum(child[1] for child in children)
+        value = sum(stats[move][1] for move, _, _ in children) / visits
+        return MCTSResult(children[0][0], value, done, time.perf_counter() - start, children)
+
+    def root_stats(self, game, playouts, time_limit=None, exclude=()):
+        """
+        Grow one tree in this process.
+
+        Returns ({move: (visits, wins)} for the root moves, playouts run).
+        """
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        side = game.whose_turn
+        moves = [move for move in self.rules.generate_all_moves(game.board, side) if move not in exclude]
+        if not moves:
+            return {}, 0
+        self.rng.shuffle(moves)
+        root = _Node(None, None, 1 - side, moves)
+        done = 0
+        while done < playouts:
+            self._iterate(game, root)
+            done += 1
+            if deadline is not None and not done & 63 and time.perf_counter() > deadline:
+                break
+        return {child.move: (child.visits, child.wins) for child in root.children}, done
+
+    def _parallel_stats(self, game, playouts, time_limit, exclude):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        layout = layout_from_pieces(encode_pieces(game.board))
+        share = -(-playouts // self.workers)
+        options = (self.exploration, self.playout, self.max_playout_plies)
+        jobs = [(layout, game.whose_turn, options, self.rng.randrange(1 << 30), share, time_limit, tuple(exclude))
+                for _ in range(self.workers)]
+        stats = {}
+        done = 0
+        for worker_stats, worker_done in self._pool.map(_root_stats_job, jobs):
+            done += worker_done
+            for move, (visits, wins) in worker_stats.items():
+                total = stats.get(move, (0, 0.0))
+                stats[move] = (total[0] + visits, total[1] + wins)
+        return stats, done
+
+    def _iterate(self, game, root):
+        board = game.board
+        rules = self.rules
+        node = root
+        made = 0
+        # Selection: descend through fully expanded nodes
+        while not node.untried and node.children and node.winner is None:
+            node = self._select(node)
+            game.make_move(node.move)
+            made += 1
+        # Expansion
+        if node.winner is None and node.untried:
+            move = node.untried.pop()
+            side = game.whose_turn
+            game.make_move(move)
+            made += 1
+            child = _Node(move, node, side, None)
+            if BIT[move >> 6] & board.den_mask[1 - side] or not board.side_bb[1 - side]:
+                child.winner = side
+            else:
+                child.untried = rules.generate_all_moves(board, 1 - side)
+                if child.untried:
+                    self.rng.shuffle(child.untried)
+                else:
+                    child.winner = side
+            node.children.append(child)
+            node = child
+        # Simulation, scored for side 0
+        if node.winner is not None:
+            value = 1.0 - node.winner
+        else:
+            value = self._playout(game)
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            node.wins += value if node.mover == 0 else 1.0 - value
+            node = node.parent
+        for _ in range(made):
+            game.unmake_move()
+
+    def _select(self, node):
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best = None
+        best_score = -1.0
+        for child in node.children:
+            score = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best = child
+        return best
+
+    def _playout(self, game):
+        """
+        Play the game out from the current position and return the result
+        for side 0 (1 = win, 0 = loss, in between when cut off).
+        """
+        board = game.board
+        rules = self.rules
+        rng = self.rng
+        heuristic = self.playout == "heuristic"
+        played = 0
+        value = None
+        for _ in range(self.max_playout_plies):
+            side = game.whose_turn
+            moves = rules.generate_all_moves(board, side)
+            if not moves:
+                value = float(side)
+                break
+            move = self._heuristic_move(board, side, moves) if heuristic else None
+            if move is None:
+                move = moves[rng.randrange(len(moves))]
+            game.make_move(move)
+            played += 1
+            if BIT[move >> 6] & board.den_mask[1 - side] or not board.side_bb[1 - side]:
+                value = 1.0 - side
+                break
+        if value is None:
+            value = 1.0 / (1.0 + math.exp(-evaluate(board, 0) / EVAL_SCALE))
+        for _ in range(played):
+            game.unmake_move()
+        return value
+
+    def _heuristic_move(self, board, side, moves):
+        """
+        Enter the den when possible, otherwise usually take the most
+        valuable capture; None leaves the choice to chance.
+        """
+        enemy_den = board.den_mask[1 - side]
+        squares = board.squares
+        best = None
+        best_value = 0
+        for move in moves:
+            to_sq = move >> 6
+            if BIT[to_sq] & enemy_den:
+                return move
+            victim = squares[to_sq]
+            if victim is not None and PIECE_VALUES[victim.rank] > best_value:
+                best_value = PIECE_VALUES[victim.rank]
+                best = move
+        if best is not None and self.rng.random() < 0.8:
+            return best
+        return None
+
+
+class MCTSPlayer(EnginePlayer):
+    """
+    An EnginePlayer that picks its moves with MCTS instead of alpha-beta.
+    Book moves are still played first when the opening book has one.
+
+    Saved games only record that a seat is engine-controlled, so a
+    loaded game plays this seat with the default EnginePlayer.
+    """
+
+    def __init__(self, name, playouts=2000, time_limit=1.0, workers=1, playout="heuristic", **kwargs):
+        self.playouts = playouts
+        self.workers = workers
+        self.playout = playout
+        self.mcts = MCTS(playout=playout, workers=workers)
+        super().__init__(name, time_limit=time_limit, **kwargs)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("mcts", None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.mcts = MCTS(playout=self.playout, workers=self.workers)
+
+    def close(self):
+        """
+        Shut down the worker processes of a multi-process search.
+        """
+        self.mcts.close()
+
+    def choose_move(self, game, pondered=None, exclude=()):
+        # alpha-beta analysis is not used to pick MCTS moves
+        move = self.book_move(game)
+        if move is not None and move not in exclude:
+            self.last_result = "book move"
+        else:
+            self.last_result = self.mcts.search(game, self.playouts, self.time_limit, exclude)
+            move = self.last_result.best_move
+        if move is None:
+            return None
+        return SQUARE_POSITIONS[move & 63], SQUARE_POSITIONS[move >> 6]
+
+
+def _root_stats_job(job):
+    layout, whose_turn, (exploration, playout, max_playout_plies), seed, playouts, time_limit, exclude = job
+    game = Game(Player("*p1*"), Player("#p2#"))
+    game.setup_position(layout, whose_turn)
+    searcher = MCTS(exploration=exploration, playout=playout, max_playout_plies=max_playout_plies, seed=seed)
+    return searcher.root_stats(game, playouts, time_limit, exclude)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run MCTS on the start position")
+    parser.add_argument("--playouts", type=int, default=2000)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds to search")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--playout", choices=PLAYOUTS, default="heuristic")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    game = Game(Player("*p1*"), Player("#p2#"))
+    searcher = MCTS(playout=args.playout, workers=args.workers, seed=args.seed)
+    try:
+        result = searcher.search(game, args.playouts, args.time_limit)
+    finally:
+        searcher.close()
+    print(result)
+    for move, visits, value in result.children[:5]:
+        print(f"  {move_to_str(move)} visits {visits} value {value:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+Move ordering for the alpha-beta search, with cutoff counters.
+
+Moves from GameRules.generate_all_moves are sorted by, best first:
+
+    transposition table move
+    previous iteration's principal variation move
+    den entries (they win on the spot)
+    captures, most valuable victim first and cheapest attacker first
+    (MVV-LVA)
+    two killer moves per ply (quiet moves that caused a cutoff)
+    other quiet moves by history score, plus escapes from enemy traps
+    and steps towards the enemy den, minus steps onto enemy traps
+
+Attacker ranks come straight from Rank, so the rat (rank 1) is the
+cheapest possible attacker and its capture of the elephant sorts first
+among the elephant captures; the elephant can never take the rat, so
+that capture is never generated. A victim caught in one of our traps
+has rank 0 there but is still worth its full value, while an attacker
+that lands on an enemy trap loses its rank and can be taken back by
+anything, so it sorts after every attacker that stays safe.
+
+Each heuristic can be switched off to measure what it saves, and
+OrderingStats counts nodes and beta cutoffs per ply and by the kind of
+move that cut off.
+
+Usage:
+    python -m model.engine.ordering [--depth 5] [--position NAME]
+"""
+import argparse
+import sys
+import time
+from array import array
+
+from ..bitboard import COL_OF, NUM_SQUARES, ROW_OF
+from .evaluate import DEN_SQUARES, PIECE_VALUES
+
+MAX_PLY = 64
+
+# Sort scores of each move class (higher is searched earlier)
+TT_SCORE = 1 << 28
+PV_SCORE = 1 << 27
+DEN_SCORE = 1 << 26
+CAPTURE_SCORE = 1 << 22
+KILLER_SCORES = (1 << 21, 1 << 20)
+HISTORY_MAX = 1 << 16
+# Added to the attacker rank of captures that land on an enemy trap
+TRAPPED_ATTACKER = 8
+ESCAPE_BONUS = 2000
+TRAP_PENALTY = 3000
+APPROACH_BONUS = 40
+
+# Steps to the enemy den, indexed [side][square]
+DEN_DISTANCE = [
+    [abs(ROW_OF[sq] - ROW_OF[DEN_SQUARES[1 - side]]) + abs(COL_OF[sq] - COL_OF[DEN_SQUARES[1 - side]])
+     for sq in range(NUM_SQUARES)]
+    for side in (0, 1)
+]
+
+# Kinds of move reported by OrderingStats
+KINDS = ("tt", "pv", "den", "capture", "killer", "quiet")
+
+
+class OrderingStats:
+    """
+    Per-ply node and cutoff counters.
+
+    Attributes:
+        nodes (list): Interior nodes whose moves were searched, per ply
+        cutoffs (list): Nodes that failed high, per ply
+        first (list): Cutoffs produced by the first move tried, per ply
+        moves_tried (list): Moves searched before each cutoff, summed per ply
+        kinds (dict): Cutoffs per kind of move (see KINDS)
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.nodes = [0] * MAX_PLY
+        self.cutoffs = [0] * MAX_PLY
+        self.first = [0] * MAX_PLY
+        self.moves_tried = [0] * MAX_PLY
+        self.kinds = dict.fromkeys(KINDS, 0)
+
+    def report(self):
+        """
+        Return the counters as printable lines, one per ply reached.
+        """
+        lines = ["ply     nodes   cutoffs   rate  first  moves/cut"]
+        for ply in range(MAX_PLY):
+            nodes = self.nodes[ply]
+            if not nodes:
+                continue
+            cutoffs = self.cutoffs[ply]
+            rate = cutoffs / nodes
+            first = self.first[ply] / cutoffs if cutoffs else 0.0
+            tried = self.moves_tried[ply] / cutoffs if cutoffs else 0.0
+            lines.append(f"{ply:>3} {nodes:>9} {cutoffs:>9} {rate:6.1%} {first:6.1%} {tried:10.2f}")
+        total = sum(self.kinds.values()) or 1
+        lines.append("cutoffs by move: " + ", ".join(f"{kind} {count / total:.1%}"
+                                                     for kind, count in self.kinds.items()))
+        return lines
+
+
+class MoveOrdering:
+    """
+    Killer and history tables plus the sort used by Searcher.
+
+    Attributes:
+        killers (list): Two killer moves per ply
+        history (list): history[side][move] cutoff score of quiet moves
+        stats (OrderingStats): Counters of the current search
+    """
+
+    def __init__(self, mvv_lva=True, killers=True, history=True, positional=True):
+        self.use_mvv_lva = mvv_lva
+        self.use_killers = killers
+        self.use_history = history
+        self.use_positional = positional
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.history = [array("i", bytes(4 * 4096)) for _ in (0, 1)]
+        self.stats = OrderingStats()
+
+    def new_search(self):
+        """
+        Forget the killers, age the history scores and reset the counters.
+        """
+        for pair in self.killers:
+            pair[0] = pair[1] = 0
+        for table in self.history:
+            for move, score in enumerate(table):
+                if score:
+                    table[move] = score >> 1
+        self.stats.clear()
+
+    def order(self, board, moves, side, ply, tt_move=0, pv_move=None):
+        """
+        Sort moves in place, best first, and return them.
+        """
+        squares = board.squares
+        enemy_den = board.den_mask[1 - side]
+        enemy_trap = board.trap_mask[1 - side]
+        mvv_lva = self.use_mvv_lva
+        killer1, killer2 = self.killers[ply] if self.use_killers else (0, 0)
+        history = self.history[side] if self.use_history else None
+        distance = DEN_DISTANCE[side] if self.use_positional else None
+
+        def key(move):
+            if move == tt_move:
+                return -TT_SCORE
+            if move == pv_move:
+                return -PV_SCORE
+            to_sq = move >> 6
+            to_bit = 1 << to_sq
+            if to_bit & enemy_den:
+                return -DEN_SCORE
+            victim = squares[to_sq]
+            if victim is not None:
+                if not mvv_lva:
+                    return -CAPTURE_SCORE
+                attacker = squares[move & 63].rank
+                if to_bit & enemy_trap:
+                    attacker += TRAPPED_ATTACKER
+                return -(CAPTURE_SCORE + (PIECE_VALUES[victim.rank] << 4) - attacker)
+            if move == killer1:
+                return -KILLER_SCORES[0]
+            if move == killer2:
+                return -KILLER_SCORES[1]
+            score = history[move] if history is not None else 0
+            if distance is not None:
+                from_sq = move & 63
+                if (1 << from_sq) & enemy_trap:
+                    score += ESCAPE_BONUS
+                if to_bit & enemy_trap:
+                    score -= TRAP_PENALTY
+                score += (distance[from_sq] - distance[to_sq]) * APPROACH_BONUS
+            return -score
+
+        moves.sort(key=key)
+        return moves
+
+    def cutoff(self, board, side, move, depth, ply, index, tt_move=0, pv_move=None):
+        """
+        Record a beta cutoff by move, the index-th move tried at ply.
+        The board must be back in the position the move was played from.
+        """
+        stats = self.stats
+        stats.cutoffs[ply] += 1
+        stats.moves_tried[ply] += index + 1
+        if not index:
+            stats.first[ply] += 1
+        to_sq = move >> 6
+        if move == tt_move:
+            kind = "tt"
+        elif move == pv_move:
+            kind = "pv"
+        elif (1 << to_sq) & board.den_mask[1 - side]:
+            kind = "den"
+        elif board.squares[to_sq] is not None:
+            kind = "capture"
+        else:
+            killers = self.killers[ply]
+            kind = "killer" if self.use_killers and move in killers else "quiet"
+            if move != killers[0]:
+                killers[1] = killers[0]
+                killers[0] = move
+            history = self.history[side]
+            score = history[move] + depth * depth
+            history[move] = score if score < HISTORY_MAX else HISTORY_MAX
+        stats.kinds[kind] += 1
+
+
+def compare(layout, side, depth, configurations):
+    """
+    Search one position with each ordering configuration.
+
+    Returns a list of (name, SearchResult, OrderingStats).
+    """
+    from ..game import Game
+    from ..player import Player
+    from .search import Searcher
+
+    rows = []
+    for name, options in configurations:
+        game = Game(Player("*p1*"), Player("#p2#"))
+        game.setup_position(layout, side)
+        searcher = Searcher(ordering=MoveOrdering(**options))
+        result = searcher.search(game, depth)
+        rows.append((name, result, searcher.ordering.stats))
+    return rows
+
+
+CONFIGURATIONS = (
+    ("none", dict(mvv_lva=False, killers=False, history=False, positional=False)),
+    ("mvv-lva", dict(mvv_lva=True, killers=False, history=False, positional=False)),
+    ("+killers", dict(mvv_lva=True, killers=True, history=False, positional=False)),
+    ("+history", dict(mvv_lva=True, killers=True, history=True, positional=False)),
+    ("all", dict(mvv_lva=True, killers=True, history=True, positional=True)),
+)
+
+
+def main(argv=None):
+    from ..perft import REFERENCE_POSITIONS
+
+    parser = argparse.ArgumentParser(description="Measure what each move-ordering heuristic saves")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--position", choices=sorted(REFERENCE_POSITIONS), default="start")
+    parser.add_argument("--verbose", action="store_true", help="print the per-ply counters of each run")
+    args = parser.parse_args(argv)
+
+    layout, side, _ = REFERENCE_POSITIONS[args.position]
+    start = time.perf_counter()
+    for name, result, stats in compare(layout, side, args.depth, CONFIGURATIONS):
+        print(f"{name:>9}: {result.nodes:>8} nodes  {result.elapsed:6.2f}s  score {result.score}")
+        if args.verbose:
+            for line in stats.report():
+                print("    " + line)
+    print(f"done in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+"""
+Endgame tablebases for positions with few pieces, built by retrograde
+analysis over GameRules.generate_all_moves (so den entry, traps, the
+rat/elephant exception and river jumps follow the game's own rules).
+
+A table covers one material signature, e.g. "L-RE": the top player's
+pieces before the dash, the bottom player's after it. Every placement
+of those pieces and both sides to move gets one byte:
+
+    0         draw (or a placement that cannot occur)
+    odd n     the side to move wins in n plies
+    even n    the side to move loses in n - 2 plies (2 = no legal move)
+
+Pieces never stand on a den and only rats enter the river, so each
+piece is indexed over its reachable squares only (49 for most ranks,
+61 for rats). The index is mixed-radix over those square lists, so a
+probe is one multiply-add per piece plus one byte read from the
+memory-mapped file.
+
+Usage:
+    python -m model.engine.tablebase L-RE E-L [--dir data/tablebase]
+    python -m model.engine.tablebase --all 2
+"""
+import itertools
+import mmap
+import os
+import sys
+import time
+from array import array
+
+from ..bitboard import BIT, NUM_SQUARES
+from ..game_rules import GameRules
+from ..rank import Rank
+
+LETTERS = "RCDWPTLE"
+WIN, DRAW, LOSS = 1, 0, -1
+INVALID = 255
+MAX_DISTANCE = 252
+DEFAULT_DIR = os.path.join("data", "tablebase")
+EXTENSION = ".jtb"
+MAGIC = b"JTB1"
+
+_terrain = None
+
+
+def terrain():
+    """
+    (river_mask, trap_mask, den_mask) of the standard board, read once
+    from a fresh Game.
+    """
+    global _terrain
+    if _terrain is None:
+        from ..game import Game
+        from ..player import Player
+
+        board = Game(Player("*top*"), Player("#bottom#")).board
+        _terrain = (board.river_mask, tuple(board.trap_mask), tuple(board.den_mask))
+    return _terrain
+
+
+def parse_material(name):
+    """
+    Turn "L-RE" into a sorted tuple of (side, rank) pairs.
+    """
+    top, _, bottom = name.upper().partition("-")
+    material = [(0, Rank(LETTERS.index(letter) + 1)) for letter in top]
+    material += [(1, Rank(LETTERS.index(letter) + 1)) for letter in bottom]
+    if not top or not bottom or len(set(material)) != len(material):
+        raise ValueError(f"Bad material signature '{name}'.")
+    return tuple(sorted(material))
+
+
+def material_name(material):
+    """
+    Inverse of parse_material.
+    """
+    top = "".join(LETTERS[rank - 1] for side, rank in material if side == 0)
+    bottom = "".join(LETTERS[rank - 1] for side, rank in material if side == 1)
+    return f"{top}-{bottom}"
+
+
+def board_material(board):
+    """
+    Material signature of a Board.
+    """
+    return tuple((side, rank) for side in (0, 1) for rank in Rank
+                 for _ in range(board.piece_bb[side][rank].bit_count()))
+
+
+class _Layout:
+    """
+    Square lists and index strides of one material signature.
+    """
+
+    def __init__(self, material):
+        river, _, dens = terrain()
+        forbidden = dens[0] | dens[1]
+        self.material = material
+        self.squares = []
+        self.square_index = []
+        for _, rank in material:
+            blocked = forbidden if rank == Rank.RAT else forbidden | river
+            squares = [sq for sq in range(NUM_SQUARES) if not BIT[sq] & blocked]
+            index = [-1] * NUM_SQUARES
+            for i, sq in enumerate(squares):
+                index[sq] = i
+            self.squares.append(squares)
+            self.square_index.append(index)
+        self.strides = []
+        stride = 2
+        for squares in reversed(self.squares):
+            self.strides.append(stride)
+            stride *= len(squares)
+        self.strides.reverse()
+        self.size = stride
+
+    def index(self, placement, side):
+        """
+        Index of pieces on placement (one square per material entry) with side to move.
+        """
+        idx = side
+        for piece, sq in enumerate(placement):
+            idx += self.square_index[piece][sq] * self.strides[piece]
+        return idx
+
+
+class _ScratchBoard:
+    """
+    Just enough of a Board for GameRules.generate_all_moves.
+    """
+
+    class _Piece:
+        __slots__ = ("rank",)
+
+        def __init__(self, rank):
+            self.rank = rank
+
+    def __init__(self):
+        self.river_mask, self.trap_mask, self.den_mask = terrain()
+        self.squares = [None] * NUM_SQUARES
+        self.piece_bb = [[0] * 9, [0] * 9]
+        self.side_bb = [0, 0]
+        self._pieces = {rank: self._Piece(rank) for rank in Rank}
+
+    def set(self, material, placement):
+        squares = self.squares
+        for i in range(NUM_SQUARES):
+            squares[i] = None
+        self.piece_bb = [[0] * 9, [0] * 9]
+        self.side_bb = [0, 0]
+        for (side, rank), sq in zip(material, placement):
+            squares[sq] = self._pieces[rank]
+            self.piece_bb[side][rank] |= BIT[sq]
+            self.side_bb[side] |= BIT[sq]
+
+
+_layouts = {}
+
+
+def layout_of(material):
+    """
+    Cached _Layout of a material signature.
+    """
+    layout = _layouts.get(material)
+    if layout is None:
+        layout = _layouts[material] = _Layout(material)
+    return layout
+
+
+def generate(material, tables=None, log=None):
+    """
+    Build the table of one material signature, generating the tables of
+    every material reachable by a capture first.
+
+    Args:
+        material: Signature from parse_material
+        tables: Dict material -> bytearray of tables already built; filled in
+        log: Optional print-like callable for progress
+
+    Returns the table as a bytearray.
+    """
+    if tables is None:
+        tables = {}
+    if material in tables:
+        return tables[material]
+    # captures lead to these smaller tables (unless they take the last piece)
+    for victim in range(len(material)):
+        rest = material[:victim] + material[victim + 1:]
+        if len({side for side, _ in rest}) == 2:
+            generate(rest, tables, log)
+
+    start = time.perf_counter()
+    layout = layout_of(material)
+    rules = GameRules()
+    board = _ScratchBoard()
+    dens = terrain()[2]
+    size = layout.size
+    strides = layout.strides
+    square_index = layout.square_index
+    sides = [side for side, _ in material]
+    count = [sides.count(0), sides.count(1)]
+
+    table = bytearray(size)
+    remaining = array("H", bytes(2 * size))
+    edge_from = array("I")
+    edge_to = array("I")
+    terminal = []
+    # Retrograde events by distance in plies. At odd distances an event
+    # means "a move wins in this many plies"; at even distances it means
+    # "one more move loses in this many plies".
+    events = {}
+
+    for base, placement in enumerate(itertools.product(*layout.squares)):
+        base *= 2
+        if len(set(placement)) != len(placement):
+            table[base] = table[base + 1] = INVALID
+            continue
+        board.set(material, placement)
+        owner = {sq: piece for piece, sq in enumerate(placement)}
+        for side in (0, 1):
+            idx = base + side
+            moves = rules.generate_all_moves(board, side)
+            if not moves:
+                table[idx] = 2
+                terminal.append(idx)
+                continue
+            remaining[idx] = len(moves)
+            for move in moves:
+                from_sq, to_sq = move & 63, move >> 6
+                mover = owner[from_sq]
+                victim = owner.get(to_sq)
+                if BIT[to_sq] & dens[1 - side] or (victim is not None and count[1 - side] == 1):
+                    events.setdefault(1, []).append(idx)
+                elif victim is not None:
+                    rest = material[:victim] + material[victim + 1:]
+                    moved = list(placement)
+                    moved[mover] = to_sq
+                    del moved[victim]
+                    child = tables[rest][layout_of(rest).index(moved, 1 - side)]
+                    if child % 2:
+                        events.setdefault(child + 1, []).append(idx)
+                    elif child:
+                        events.setdefault(child - 1, []).append(idx)
+                else:
+                    edge_from.append(idx)
+                    edge_to.append(idx + (square_index[mover][to_sq] - square_index[mover][from_sq])
+                                   * strides[mover] + 1 - 2 * side)
+
+    # Predecessors in compressed-row form: the positions with a move to p
+    # are preds[offsets[p]:offsets[p + 1]]
+    offsets = array("I", bytes(4 * (size + 1)))
+    for to in edge_to:
+        offsets[to + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+    fill = array("I", offsets)
+    preds = array("I", bytes(4 * len(edge_from)))
+    for frm, to in zip(edge_from, edge_to):
+        preds[fill[to]] = frm
+        fill[to] += 1
+    del edge_from, edge_to, fill
+
+    for idx in terminal:
+        events.setdefault(1, []).extend(preds[offsets[idx]:offsets[idx + 1]])
+
+    distance = 1
+    while events:
+        batch = events.pop(distance, ())
+        if distance > MAX_DISTANCE and batch:
+            raise ValueError(f"{material_name(material)}: distance to win exceeds {MAX_DISTANCE} plies.")
+        for idx in batch:
+            if table[idx]:
+                continue
+            if distance % 2:
+                table[idx] = distance
+            else:
+                remaining[idx] -= 1
+                if remaining[idx]:
+                    continue
+                table[idx] = distance + 2
+            following = events.setdefault(distance + 1, [])
+            following.extend(pred for pred in preds[offsets[idx]:offsets[idx + 1]] if not table[pred])
+        distance += 1
+
+    # placements that cannot occur read as draws
+    table = table.replace(bytes([INVALID]), b"\0")
+    tables[material] = table
+    if log:
+        wins = sum(1 for value in table if value % 2)
+        log(f"{material_name(material)}: {size} positions, {wins} wins, "
+            f"{time.perf_counter() - start:.1f}s")
+    return table
+
+
+def table_path(directory, material):
+    return os.path.join(directory, material_name(material) + EXTENSION)
+
+
+def write_table(directory, material, table):
+    """
+    Write a generated table: magic b"JTB1", u8 piece count, one byte
+    (side << 4 | rank) per piece, then the table bytes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(table_path(directory, material), "wb") as file:
+        file.write(MAGIC + bytes([len(material)]) + bytes(side << 4 | rank for side, rank in material))
+        file.write(table)
+
+
+
+class Tablebase:
+    """
+    Probes the table files of a directory. Each file is memory-mapped on
+    first use, so a probe is an index computation and one byte read.
+
+    Attributes:
+        directory (str): Where the .jtb files live
+        max_pieces (int): Most pieces of any table present
+    """
+
+    def __init__(self, directory=DEFAULT_DIR):
+        self.directory = directory
+        self._tables = {}
+        self.max_pieces = 0
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(EXTENSION):
+                    pieces = len(name) - len(EXTENSION) - 1
+                    self.max_pieces = max(self.max_pieces, pieces)
+
+    def close(self):
+        for table in self._tables.values():
+            if table is not None:
+                table[0].close()
+                table[1].close()
+        self._tables.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self, material):
+        if material not in self._tables:
+            path = table_path(self.directory, material)
+            if not os.path.exists(path):
+                self._tables[material] = None
+            else:
+                file = open(path, "rb")
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                if data[:len(MAGIC)] != MAGIC:
+                    data.close()
+                    file.close()
+                    raise ValueError(f"'{path}' is not a Jungle tablebase.")
+                self._tables[material] = (data, file, len(MAGIC) + 1 + len(material))
+        return self._tables[material]
+
+    def probe_value(self, board, side):
+        """
+        Return the raw table byte for side to move on board, or None when
+        no table covers the material.
+        """
+        material = board_material(board)
+        if len(material) > self.max_pieces:
+            return None
+        table = self._open(material)
+        if table is None:
+            return None
+        data, _, header = table
+        placement = [(board.piece_bb[s][rank] & -board.piece_bb[s][rank]).bit_length() - 1
+                     for s, rank in material]
+        return data[header + layout_of(material).index(placement, side)]
+
+    def probe(self, board, side):
+        """
+        Return (WIN, DRAW or LOSS, distance in plies) for side to move, or
+        None when no table covers the position.
+        """
+        value = self.probe_value(board, side)
+        if value is None:
+            return None
+        return decode(value)
+
+
+def decode(value):
+    """
+    Turn a table byte into (WIN, DRAW or LOSS, distance in plies).
+    """
+    if value == 0:
+        return DRAW, 0
+    if value % 2:
+        return WIN, value
+    return LOSS, value - 2
+
+
+def all_materials(max_pieces):
+    """
+    Every material signature with 2..max_pieces pieces and at least one piece per side.
+    """
+    pieces = [(side, rank) for side in (0, 1) for rank in Rank]
+    for count in range(2, max_pieces + 1):
+        for material in itertools.combinations(pieces, count):
+            if len({side for side, _ in material}) == 2:
+                yield material
+
+
+def main(argv):
+    directory = DEFAULT_DIR
+    if "--dir" in argv:
+        directory = argv[argv.index("--dir") + 1]
+        argv = [a for a in argv if a not in ("--dir", directory)]
+    if "--all" in argv:
+        args = [a for a in argv if a != "--all"]
+        materials = list(all_materials(int(args[0]) if args else 2))
+    else:
+        materials = [parse_material(name) for name in argv]
+    if not materials:
+        print("Give material signatures such as L-RE, or --all N")
+        return 1
+
+    tables = {}
+    start = time.perf_counter()
+    for material in materials:
+        generate(material, tables, print)
+    for material, table in tables.items():
+        write_table(directory, material, table)
+    print(f"{len(tables)} tables written to '{directory}' in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,115 @@
+"""
+Fixed-size transposition table stored in preallocated arrays.
+"""
+from array import array
+
+# Bound types stored with each entry (0 marks an empty slot)
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+# key (Q) + score (i) + move (H) + depth (b) + bound (B)
+ENTRY_BYTES = 8 + 4 + 2 + 1 + 1
+
+
+class TranspositionTable:
+    """
+    Position-hash keyed cache of search results with a hard memory cap.
+
+    The table is a power-of-two number of two-slot buckets held in
+    parallel ``array`` columns, so its size never changes after
+    construction. Slot 0 of a bucket is depth-preferred: it is only
+    replaced by an entry searched at least as deep (or by the same
+    position). Slot 1 is always-replace and catches everything else.
+
+    Attributes:
+        size_mb (float): Memory cap requested at construction
+        entries (int): Number of slots (2 per bucket)
+        probes, hits, stores (int): Usage counters since the last clear()
+    """
+
+    def __init__(self, size_mb=16):
+        if size_mb <= 0:
+            raise ValueError("Transposition table size must be positive.")
+        self.size_mb = size_mb
+        buckets = max(1, int(size_mb * 1024 * 1024) // (2 * ENTRY_BYTES))
+        # round down to a power of two so the bucket index is a mask
+        buckets = 1 << (buckets.bit_length() - 1)
+        self._mask = buckets - 1
+        self.entries = buckets * 2
+        self.keys = array("Q", bytes(8 * self.entries))
+        self.scores = array("i", bytes(4 * self.entries))
+        self.moves = array("H", bytes(2 * self.entries))
+        self.depths = array("b", bytes(self.entries))
+        self.bounds = array("B", bytes(self.entries))
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    @property
+    def memory_bytes(self):
+        """
+        Bytes held by the table columns.
+        """
+        return self.entries * ENTRY_BYTES
+
+    def clear(self):
+        """
+        Empty every slot and reset the counters.
+        """
+        for column, size in ((self.keys, 8), (self.scores, 4), (self.moves, 2),
+                             (self.depths, 1), (self.bounds, 1)):
+            column[:] = array(column.typecode, bytes(size * self.entries))
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def probe(self, key):
+        """
+        Look up a position.
+
+        Returns:
+            (depth, score, bound, move) or None if the position is not stored
+        """
+        self.probes += 1
+        slot = (key & self._mask) << 1
+        keys = self.keys
+        if keys[slot] != key or not self.bounds[slot]:
+            slot += 1
+            if keys[slot] != key or not self.bounds[slot]:
+                return None
+        self.hits += 1
+        return self.depths[slot], self.scores[slot], self.bounds[slot], self.moves[slot]
+
+    def best_move(self, key):
+        """
+        Return the stored best move of a position, or 0 if none.
+        """
+        slot = (key & self._mask) << 1
+        if self.keys[slot] == key and self.bounds[slot]:
+            return self.moves[slot]
+        if self.keys[slot + 1] == key and self.bounds[slot + 1]:
+            return self.moves[slot + 1]
+        return 0
+
+    def store(self, key, depth, score, bound, move):
+        """
+        Store a search result using the depth-preferred / always-replace policy.
+        """
+        self.stores += 1
+        slot = (key & self._mask) << 1
+        if self.keys[slot] != key and self.bounds[slot] and depth < self.depths[slot]:
+            slot += 1
+        if not move and self.keys[slot] == key:
+            move = self.moves[slot]  # keep the known best move
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.scores[slot] = score
+        self.bounds[slot] = bound
+        self.moves[slot] = move
+
+    def usage(self):
+        """
+        Fraction of slots in use.
+        """
+        return sum(1 for bound in self.bounds if bound) / self.entries
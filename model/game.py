@@ -1,12 +1,13 @@
-from .board import Board
+from .board import Board, UNDO_CAPACITY
 from .player import Player
 from .piece import Piece, Position
-from .game_rules import GameRules
+from .game_rules import GameRules, REPETITION_RULES
+from .move_cache import LegalMoveCache
 from view.userinterface import UserInterface
 from .save_game import SaveGame
 from typing import Tuple
 from .rank import Rank
-import copy
+from .zobrist import SIDE_KEY
 
 def convert_indices_to_coordinate(row, col):
     """
@@ -78,13 +79,80 @@ class Game:
         self.players = [player1, player2]
         pieces = self.initialize_piece()
         cells = self.initialize_cell()
-        self.board = Board(pieces, cells)
+        self.board = Board(pieces, cells, self.players)
         self.rules = GameRules()
         self.whose_turn = 0
         self.move_stack = []
         self.move_history = []
         self.recording = False
         self.completed = False
+        self.repetition_rule = "draw"
+        self.repetition_limit = 3
+        self.chase_rule = "draw"
+        self.chase_limit = 6
+        self.draw_reason = None
+        self.move_cache = LegalMoveCache()
+        self._init_undo_buffer()
+        self._init_position_history()
+
+    def __getstate__(self):
+        """
+        Pickle the game without the make/unmake ring buffer or the move cache.
+        """
+        state = self.__dict__.copy()
+        state.pop("_undo_recorded", None)
+        state.pop("_undo_index", None)
+        state.pop("move_cache", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.move_cache = LegalMoveCache()
+        self._init_undo_buffer()
+        # Games saved before repetition tracking start their history here
+        for name, default in (("repetition_rule", "draw"), ("repetition_limit", 3),
+                              ("chase_rule", "draw"), ("chase_limit", 6), ("draw_reason", None)):
+            self.__dict__.setdefault(name, default)
+        if "position_history" not in state:
+            self._init_position_history()
+            # Placeholder keys (never equal to a real one) for the moves
+            # already on the undo stack, so undoing them stays balanced
+            placeholders = list(range(-len(self.move_stack), 0))
+            self.position_history[:0] = placeholders
+            self.position_counts.update(dict.fromkeys(placeholders, 1))
+
+    def _init_undo_buffer(self):
+        """
+        Preallocate the flags telling unmake_move which plies were recorded.
+        """
+        self._undo_recorded = bytearray(UNDO_CAPACITY)
+        self._undo_index = 0
+
+    def _init_position_history(self):
+        """
+        Start the position history with the current position.
+
+        position_history is a stack of position keys (see position_key),
+        one per position reached, and position_counts maps each key to
+        how often it is on the stack, so repetitions are found in O(1).
+        """
+        key = self.position_key()
+        self.position_history = [key]
+        self.position_counts = {key: 1}
+
+    def _push_position(self, key):
+        self.position_history.append(key)
+        counts = self.position_counts
+        counts[key] = counts.get(key, 0) + 1
+
+    def _pop_position(self):
+        key = self.position_history.pop()
+        counts = self.position_counts
+        count = counts[key] - 1
+        if count:
+            counts[key] = count
+        else:
+            del counts[key]
 
     
     def initialize_piece(self):
@@ -140,6 +208,37 @@ class Game:
                 ret.append((i,j,cell))
         return ret
     
+    def setup_position(self, layout, whose_turn=0):
+        """
+        Replace the position with a custom layout, e.g. for analysis or tests.
+
+        layout is 9 strings of 7 characters in PIECE_MAP notation, except that
+        the owner comes from the letter case: lowercase pieces belong to
+        players[0] (top), uppercase pieces to players[1] (bottom).
+        Move stacks and history are cleared.
+        """
+        ret = []
+        for player in self.players:
+            player.clear_pieces()
+            player.moved_this_turn = False
+        for i, line in enumerate(layout):
+            for j, chr in enumerate(line):
+                if chr == '.':
+                    continue
+                owner = self.players[0] if chr.islower() else self.players[1]
+                piece = Piece(chr.upper(), RANK_MAP[chr.upper()], owner, Position(i, j))
+                owner.add_piece(piece)
+                ret.append((i, j, piece))
+        self.board.setup_board(ret, self.initialize_cell())
+        self.board._init_undo_buffer()
+        self._init_undo_buffer()
+        self.whose_turn = whose_turn
+        self.move_stack = []
+        self.move_history = []
+        self.completed = False
+        self.draw_reason = None
+        self._init_position_history()
+
     # def initial_board_setup(self):
     #     self.board.setup_board(self.initialize_piece(), self.initialize_cell())
 
@@ -171,10 +270,11 @@ class Game:
         # store move information for undoing
         undo_object = {
             "piece": mover,
-            "from_pos": copy.deepcopy(from_pos),
-            "to_pos": copy.deepcopy(to_pos),
+            "from_pos": from_pos,
+            "to_pos": to_pos,
             "captured_piece": result,
-            "prev_turn": self.whose_turn
+            "prev_turn": self.whose_turn,
+            "attacks": (),
         }
         self.move_stack.append(undo_object) #record move for undo
         result2 = result
@@ -188,13 +288,62 @@ class Game:
             
         # Move piece on board
         self.board.move_piece(mover, to_pos)
+        undo_object["attacks"] = self.rules.attacked_pieces(self.board, mover)
+        self._push_position(self.board.zobrist if self.whose_turn else self.board.zobrist ^ SIDE_KEY)
 
         # Add to history
         if not self.recording:
             self.record_move(mover.name, from_pos.row, from_pos.col, to_pos.row, to_pos.col, result2)
         self.players[self.whose_turn].moved_this_turn = True
+
+        forbidden = self.forbidden_by_repetition(self.whose_turn)
+        if forbidden:
+            self.undo_move()
+            return False, forbidden
         return True,"Move successful."
 
+    def make_move(self, move, record=False):
+        """
+        Apply an encoded move (from_sq | to_sq << 6) and pass the turn.
+
+        Lightweight counterpart of move_piece for search and simulation:
+        no validation, no undo dict, no moved_this_turn flag and no
+        move_history entry unless record is True. The move must be legal
+        in the current position, e.g. one from GameRules.generate_all_moves.
+
+        Returns the captured piece, or None.
+        """
+        mover = self.board.squares[move & 63]
+        captured = self.board.make_move(move)
+        if captured is not None:
+            captured.is_alive = False
+            captured.owner.remove_piece(captured)
+        index = (self._undo_index + 1) & (UNDO_CAPACITY - 1)
+        self._undo_recorded[index] = record
+        self._undo_index = index
+        if record:
+            from_sq, to_sq = move & 63, move >> 6
+            self.record_move(mover.name, from_sq // 7, from_sq % 7, to_sq // 7, to_sq % 7, captured)
+        self.whose_turn = 1 - self.whose_turn
+        self._push_position(self.position_key())
+        return captured
+
+    def unmake_move(self):
+        """
+        Revert the most recent make_move, including the turn switch.
+        """
+        captured = self.board.unmake_move()
+        if captured is not None:
+            captured.is_alive = True
+            captured.owner.add_piece(captured)
+        self._pop_position()
+        index = self._undo_index
+        if self._undo_recorded[index] and self.move_history:
+            self.move_history.pop()
+        self._undo_index = (index - 1) & (UNDO_CAPACITY - 1)
+        self.whose_turn = 1 - self.whose_turn
+        return captured
+
     def record_move(self,piece_id,from_posx, from_posy, to_posx, to_posy, captured_piece):
         """
         Store readable move:
@@ -242,6 +391,7 @@ class Game:
             self.board.place(captured_piece, to_pos)
             captured_piece.owner.add_piece(captured_piece)
 
+        self._pop_position()
         self.whose_turn = prev_turn 
         self.players[self.whose_turn].moved_this_turn = False
         if self.move_history:
@@ -249,6 +399,103 @@ class Game:
         
         return True,"Move undone."
 
+    def legal_moves(self, piece=None):
+        """
+        Return the legal destinations of piece, or a {piece: destinations}
+        dict for every living piece of the side to move, served from the
+        move cache.
+        """
+        if piece is not None:
+            return self.move_cache.moves(self.rules, self.board, piece)
+        return {piece: self.move_cache.moves(self.rules, self.board, piece)
+                for piece in self.players[self.whose_turn].get_alive_pieces()}
+
+    def position_key(self):
+        """
+        Return the 64-bit Zobrist key of the position and side to move.
+        The board keeps its part up to date on every mutation, so this is O(1).
+        """
+        if self.whose_turn:
+            return self.board.zobrist ^ SIDE_KEY
+        return self.board.zobrist
+
+    def repetition_count(self, key=None):
+        """
+        Return how often a position (by default the current one, with the
+        next side to move) has occurred in this game. O(1).
+        """
+        if key is None:
+            key = self.position_history[-1]
+        return self.position_counts.get(key, 0)
+
+    def perpetual_chase(self, side):
+        """
+        Return the enemy piece that side is chasing perpetually, or None.
+
+        A chase is perpetual once side's last chase_limit moves were all
+        made by the same piece, each left it attacking the same enemy
+        piece, and the position after the last of them has occurred before.
+        """
+        if self.repetition_count() < 2:
+            return None
+        moves = [entry for entry in self.move_stack[-2 * self.chase_limit:] if entry["prev_turn"] == side]
+        if len(moves) < self.chase_limit:
+            return None
+        moves = moves[-self.chase_limit:]
+        chaser = moves[0]["piece"]
+        chased = set(moves[0]["attacks"])
+        for entry in moves[1:]:
+            if entry["piece"] is not chaser:
+                return None
+            chased.intersection_update(entry["attacks"])
+        return next(iter(chased), None)
+
+    def forbidden_by_repetition(self, side):
+        """
+        Return why the move side has just played breaks a 'forbid'
+        repetition rule, or None if it is allowed.
+        """
+        if self.repetition_rule == "forbid" and self.repetition_count() >= self.repetition_limit:
+            return f"Repeating a position {self.repetition_limit} times is not allowed."
+        if self.chase_rule == "forbid":
+            chased = self.perpetual_chase(side)
+            if chased is not None:
+                return f"Perpetually chasing the {chased.name} is not allowed."
+        return None
+
+    def check_draw(self):
+        """
+        Draw if, under a 'draw' rule,
+        1. The position has occurred repetition_limit times
+        2. A side is chasing an enemy piece perpetually
+
+        Returns (True, reason) or (False, None)
+        """
+        if self.repetition_rule == "draw" and self.repetition_count() >= self.repetition_limit:
+            return True, f"the position occurred {self.repetition_limit} times"
+        if self.chase_rule == "draw":
+            for side in (0, 1):
+                chased = self.perpetual_chase(side)
+                if chased is not None:
+                    return True, f"{self.players[side].name} is perpetually chasing the {chased.name}"
+        return False, None
+
+    def set_repetition_rules(self, repetition_rule=None, repetition_limit=None, chase_rule=None, chase_limit=None):
+        """
+        Configure the repetition rules; each rule is one of REPETITION_RULES.
+        """
+        for rule in (repetition_rule, chase_rule):
+            if rule is not None and rule not in REPETITION_RULES:
+                raise ValueError(f"Unknown repetition rule '{rule}'. Choose from {', '.join(REPETITION_RULES)}.")
+        if repetition_rule is not None:
+            self.repetition_rule = repetition_rule
+        if repetition_limit is not None:
+            self.repetition_limit = repetition_limit
+        if chase_rule is not None:
+            self.chase_rule = chase_rule
+        if chase_limit is not None:
+            self.chase_limit = chase_limit
+
     def switch_turn(self):
         """
         Switch current player. False moved_this_turn flag.
@@ -267,10 +514,7 @@ class Game:
         """
         Return True if the player has any alive pieces.
         """
-        
-        player = self.players[owner_idx]
-        
-        return len(player.get_alive_pieces()) > 0
+        return self.players[owner_idx].alive_count > 0
     
     def check_victory(self,mover,to_pos):
         """
@@ -1,7 +1,14 @@
-from .piece import Piece, Position, Rank 
+from .piece import SQUARE_POSITIONS, Piece, Position, Rank 
 from .board import Board  
 from typing import Tuple, Union, Optional
 from .player import Player
+from .bitboard import BIT, NEIGHBOUR_MASK, jump_table, square_of
+
+# Enum iteration is slow in hot loops, so keep a plain tuple of the ranks
+RANKS = tuple(Rank)
+
+# What Game does about repeated positions and perpetual chasing
+REPETITION_RULES = ("off", "draw", "forbid")
 
 class GameRules:
   def __init__(self):
@@ -135,69 +142,116 @@ class GameRules:
     # Move one cell at a time until reaching destination
     r, c = fr + row_step, fc + col_step
     found_river_cells = False
+    rats = board.piece_bb[0][Rank.RAT] | board.piece_bb[1][Rank.RAT]
     while (r != tr or c != tc):
       if not (0 <= r < board.rows and 0 <= c < board.cols):
         return False
-        
-      _, cell = board.grid[r][c]
-      terrain, _ = cell if cell else ("land", None)
-      terrain, _ = board.cell_at(Position(r, c))
-      if terrain != "~":
+
+      bit = BIT[square_of(r, c)]
+      if not bit & board.river_mask:
         return False
         
       found_river_cells = True
-      piece_in_path = board.piece_at(Position(r, c))
-      if piece_in_path and piece_in_path.rank == Rank.RAT:
+      if bit & rats:
           return False
         
       r += row_step
       c += col_step
 
-    dest_terrain, _ = board.cell_at(to_pos)
-    if dest_terrain == "~":
+    if BIT[square_of(tr, tc)] & board.river_mask:
       return False
 
     return found_river_cells
 
+  def _can_capture_bits(self, attacker_rank, victim_rank, from_bit, to_bit, board, side):
+    """Bitboard version of _can_capture for the move generator."""
+    if to_bit & board.trap_mask[side]:
+      return True
+    if attacker_rank == Rank.ELEPHANT and victim_rank == Rank.RAT:
+      return False
+    if attacker_rank == Rank.RAT:
+      river = board.river_mask
+      if bool(from_bit & river) != bool(to_bit & river):
+        return False
+      if victim_rank == Rank.ELEPHANT:
+        return True
+    return attacker_rank >= victim_rank
+
+  def _target_mask(self, board, sq, rank, side, rats, jumps):
+    """Bitboard of every square the piece of (rank, side) on sq can move to."""
+    from_bit = BIT[sq]
+    blocked = board.side_bb[side] | board.den_mask[side]
+    if rank != Rank.RAT:
+      blocked |= board.river_mask
+    targets = NEIGHBOUR_MASK[sq] & ~blocked
+
+    if rank == Rank.LION or rank == Rank.TIGER:
+      for landing, path in jumps[sq]:
+        if not path & rats:
+          targets |= BIT[landing] & ~blocked
+
+    # drop captures the rank rules do not allow
+    captures = targets & board.side_bb[1 - side]
+    while captures:
+      to_bit = captures & -captures
+      captures ^= to_bit
+      victim = board.squares[to_bit.bit_length() - 1]
+      if not self._can_capture_bits(rank, victim.rank, from_bit, to_bit, board, side):
+        targets ^= to_bit
+    return targets
+
+  def attacked_pieces(self, board, piece):
+    """Return the enemy pieces that piece could capture from where it stands."""
+    side = board.side_of(piece.owner)
+    sq = square_of(piece.position.row, piece.position.col)
+    rats = board.piece_bb[0][Rank.RAT] | board.piece_bb[1][Rank.RAT]
+    targets = self._target_mask(board, sq, piece.rank, side, rats, jump_table(board.river_mask))
+    targets &= board.side_bb[1 - side]
+    pieces = []
+    while targets:
+      to_bit = targets & -targets
+      targets ^= to_bit
+      pieces.append(board.squares[to_bit.bit_length() - 1])
+    return pieces
+
+  def generate_all_moves(self, board, side):
+    """Return every legal move of one side as encoded ints (from_sq | to_sq << 6).
+
+    Uses the precomputed neighbour and jump tables from model.bitboard, so
+    no Position objects are created and validate_move is never called.
+    """
+    moves = []
+    append = moves.append
+    rats = board.piece_bb[0][Rank.RAT] | board.piece_bb[1][Rank.RAT]
+    jumps = jump_table(board.river_mask)
+    side_pieces = board.piece_bb[side]
+    for rank in RANKS:
+      bb = side_pieces[rank]
+      while bb:
+        low = bb & -bb
+        bb ^= low
+        sq = low.bit_length() - 1
+        targets = self._target_mask(board, sq, rank, side, rats, jumps)
+        while targets:
+          to_bit = targets & -targets
+          targets ^= to_bit
+          append(sq | (to_bit.bit_length() - 1) << 6)
+    return moves
+
   def get_valid_moves(self, piece, board):
     """Return all valid destination positions for the given piece."""
     
     if piece is None or not piece.is_alive:
         return []
 
-    moves = []
-
-    # Four directions
-    directions = [
-        (1, 0),
-        (-1, 0),
-        (0, 1),
-        (0, -1),
-    ]
-
     from_pos = piece.position
-
-    for dr, dc in directions:
-        to_row = from_pos.row + dr
-        to_col = from_pos.col + dc
-        to_pos = Position(to_row, to_col)
-
-        # 1) Skip out-of-bound moves
-        if not (0 <= to_row < board.rows and 0 <= to_col < board.cols):
-            continue
-
-        # 2) Lion/Tiger river jump attempt
-        if piece.rank in (Rank.LION, Rank.TIGER):
-            if self._is_river_jump(from_pos, to_pos, board):
-                # If jump is valid
-                is_valid, _ = self.validate_move(piece, from_pos, to_pos, board)
-                if is_valid:
-                    moves.append(to_pos)
-                continue  # Don't try 1-step move for this direction
-
-        # 3) Normal one-step move
-        is_valid, _ = self.validate_move(piece, from_pos, to_pos, board)
-        if is_valid:
-            moves.append(to_pos)
-
-    return moves
\ No newline at end of file
+    rats = board.piece_bb[0][Rank.RAT] | board.piece_bb[1][Rank.RAT]
+    targets = self._target_mask(board, square_of(from_pos.row, from_pos.col), piece.rank,
+                                board.side_of(piece.owner), rats, jump_table(board.river_mask))
+    moves = []
+    while targets:
+        to_bit = targets & -targets
+        targets ^= to_bit
+        to_sq = to_bit.bit_length() - 1
+        moves.append(SQUARE_POSITIONS[to_sq])
+    return moves
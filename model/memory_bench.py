@@ -0,0 +1,73 @@
+"""
+Memory benchmark: how many bytes a hosted Game costs.
+
+Builds many Games (each with its own two Players, like the game server
+does) while tracemalloc is tracing and reports the traced memory per
+game, plus the allocations made by playing random moves through
+move_piece and undoing them.
+
+Usage:
+    python -m model.memory_bench [--games 500] [--moves 40]
+"""
+import argparse
+import random
+import sys
+import tracemalloc
+
+from .bitboard import COL_OF, ROW_OF
+from .game import Game
+from .piece import Position
+from .player import Player
+
+
+def bytes_per_game(games):
+    """
+    Return the traced memory of one Game (averaged over games Games).
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    hosted = [Game(Player("Player 1"), Player("Player 2")) for _ in range(games)]
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del hosted
+    return size / games
+
+
+def bytes_per_move(moves, seed=0):
+    """
+    Play moves random legal moves with move_piece/switch_turn (then undo
+    them all) and return the peak memory allocated per move played.
+    """
+    rng = random.Random(seed)
+    game = Game(Player("Player 1"), Player("Player 2"))
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    played = 0
+    for _ in range(moves):
+        legal = game.rules.generate_all_moves(game.board, game.whose_turn)
+        if not legal:
+            break
+        move = rng.choice(legal)
+        from_sq, to_sq = move & 63, move >> 6
+        game.move_piece(Position(ROW_OF[from_sq], COL_OF[from_sq]), Position(ROW_OF[to_sq], COL_OF[to_sq]))
+        game.switch_turn()
+        played += 1
+    peak = tracemalloc.get_traced_memory()[1] - start
+    tracemalloc.stop()
+    while game.move_stack:
+        game.undo_move()
+    return peak / max(played, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the memory cost of hosted games")
+    parser.add_argument("--games", type=int, default=500, help="games to build")
+    parser.add_argument("--moves", type=int, default=40, help="random moves to play")
+    args = parser.parse_args(argv)
+    print(f"{bytes_per_game(args.games):.0f} bytes per Game ({args.games} games)")
+    print(f"{bytes_per_move(args.moves):.0f} bytes per move played ({args.moves} moves)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
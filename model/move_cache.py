@@ -0,0 +1,95 @@
+"""
+Cached legal-move sets for the pieces of one Game.
+
+A piece's moves only depend on the squares around it: its own square,
+its four neighbours and, for the lion and tiger, the river squares it
+jumps over and the squares it lands on. Each cache entry keeps that
+dependency mask. When the board has changed since the last lookup, the
+squares whose occupant changed are found by comparing against a copy
+of the board, and only the entries whose mask meets them are dropped.
+A move therefore costs the cache a 63-square comparison on the next
+lookup and the recomputation of a handful of pieces, instead of every
+piece, and moves played and taken back (engine searches, undo) cost
+nothing at all because the Zobrist key is unchanged.
+"""
+from .bitboard import BIT, NEIGHBOUR_MASK, jump_table, square_of
+from .rank import Rank
+
+
+class LegalMoveCache:
+    """
+    Legal destinations per piece, kept valid across board changes.
+
+    Attributes:
+        hits (int): Lookups served from the cache
+        misses (int): Lookups that had to generate the moves
+        invalidated (int): Entries dropped because their squares changed
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.clear()
+
+    def clear(self):
+        """
+        Forget every entry (the statistics are kept).
+        """
+        self._entries = {}
+        self._board = None
+        self._squares = None
+        self._zobrist = None
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "invalidated": self.invalidated,
+                "entries": len(self._entries)}
+
+    def _sync(self, board):
+        """
+        Drop the entries made stale by changes to board since the last lookup.
+        """
+        if board is not self._board:
+            self.clear()
+            self._board = board
+        elif board.zobrist == self._zobrist:
+            return
+        else:
+            changed = 0
+            for sq, (now, before) in enumerate(zip(board.squares, self._squares)):
+                if now is not before:
+                    changed |= BIT[sq]
+            entries = self._entries
+            stale = [piece for piece, (_, depends) in entries.items() if depends & changed]
+            for piece in stale:
+                del entries[piece]
+            self.invalidated += len(stale)
+        self._squares = list(board.squares)
+        self._zobrist = board.zobrist
+
+    def moves(self, rules, board, piece):
+        """
+        Return the legal destinations of piece as a list of Positions,
+        like GameRules.get_valid_moves.
+        """
+        if piece is None or not piece.is_alive:
+            return []
+        self._sync(board)
+        entry = self._entries.get(piece)
+        if entry is not None:
+            self.hits += 1
+            return list(entry[0])
+        self.misses += 1
+        moves = tuple(rules.get_valid_moves(piece, board))
+        sq = square_of(piece.position.row, piece.position.col)
+        depends = BIT[sq] | NEIGHBOUR_MASK[sq]
+        if piece.rank == Rank.LION or piece.rank == Rank.TIGER:
+            for landing, path in jump_table(board.river_mask)[sq]:
+                depends |= path | BIT[landing]
+        self._entries[piece] = (moves, depends)
+        return list(moves)
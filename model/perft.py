@@ -0,0 +1,249 @@
+"""
+Perft: count the leaf nodes of the legal-move tree to a fixed depth.
+
+Used both as a move-generation benchmark (nodes per second) and as a
+regression check: the fast generator (GameRules.generate_all_moves) is
+compared against the reference rules (GameRules.validate_move tried on
+every square), and both against the known node counts of the positions
+in REFERENCE_POSITIONS.
+
+A move that enters the opponent's den or takes the opponent's last
+piece ends the game, so it counts as a leaf at depth 1 and is not
+expanded further (like checkmate in chess perft).
+
+Usage:
+    python -m model.perft [depth] [--divide] [--position NAME] [--reference]
+    python -m model.perft --suite [max_depth]
+"""
+import sys
+import time
+
+from .bitboard import BIT, ROW_OF, square_of
+from .game import Game
+from .piece import SQUARE_POSITIONS
+from .player import Player
+
+# name -> (layout, side to move, {depth: leaf nodes}); layouts use the
+# Game.setup_position notation (lowercase = top player, uppercase = bottom)
+REFERENCE_POSITIONS = {
+    "start": ([
+        "l.....t",
+        ".d...c.",
+        "r.p.w.e",
+        ".......",
+        ".......",
+        ".......",
+        "E.W.P.R",
+        ".C...D.",
+        "T.....L",
+    ], 0, {1: 24, 2: 576, 3: 12240, 4: 260099}),
+    # Jump lanes with a rat blocking some of them
+    "river-jump": ([
+        ".......",
+        "...c...",
+        ".t.....",
+        ".......",
+        ".R.l...",
+        ".......",
+        "..L....",
+        ".......",
+        "......E",
+    ], 0, {1: 9, 2: 90, 3: 890, 4: 8676}),
+    # Enemies standing in their opponent's traps can be taken by anything
+    "trap-captures": ([
+        "..E.Ld.",
+        "..cT...",
+        ".......",
+        ".......",
+        ".......",
+        ".......",
+        ".......",
+        "..Rl...",
+        ".......",
+    ], 0, {1: 11, 2: 126, 3: 932, 4: 9974}),
+    # Rat/elephant exception: land rat takes elephant, river rat cannot
+    "rat-vs-elephant": ([
+        ".......",
+        ".......",
+        "....rE.",
+        "Er.....",
+        ".R.....",
+        ".......",
+        "eR.....",
+        ".......",
+        ".......",
+    ], 0, {1: 9, 2: 105, 3: 983, 4: 10846}),
+}
+
+
+def game_from_layout(layout, whose_turn=0):
+    """
+    Build a Game with two anonymous players set up from a layout.
+    """
+    game = Game(Player("*top*"), Player("#bottom#"))
+    game.setup_position(layout, whose_turn)
+    return game
+
+
+def reference_moves(game):
+    """
+    Generate the side to move's moves by asking validate_move about every
+    destination square. Slow, but it is the rules as written.
+    """
+    board = game.board
+    moves = []
+    for piece in game.players[game.whose_turn].pieces:
+        if not piece.is_alive:
+            continue
+        from_pos = piece.position
+        from_sq = square_of(from_pos.row, from_pos.col)
+        for to_sq in range(len(ROW_OF)):
+            valid, _ = game.rules.validate_move(piece, from_pos, SQUARE_POSITIONS[to_sq], board)
+            if valid:
+                moves.append(from_sq | to_sq << 6)
+    return moves
+
+
+def _legal_moves(game, reference):
+    if reference:
+        return reference_moves(game)
+    return game.rules.generate_all_moves(game.board, game.whose_turn)
+
+
+def _ends_game(game, move, side):
+    """
+    True if the move (already made) entered the enemy den or emptied the enemy side.
+    """
+    board = game.board
+    return bool(BIT[move >> 6] & board.den_mask[1 - side]) or not board.side_bb[1 - side]
+
+
+def perft(game, depth, reference=False):
+    """
+    Count the leaf nodes depth plies below the current position of game.
+    The game is left unchanged.
+    """
+    if depth <= 0:
+        return 1
+    moves = _legal_moves(game, reference)
+    if depth == 1:
+        return len(moves)
+    side = game.whose_turn
+    nodes = 0
+    for move in moves:
+        game.make_move(move)
+        if not _ends_game(game, move, side):
+            nodes += perft(game, depth - 1, reference)
+        game.unmake_move()
+    return nodes
+
+
+def divide(game, depth, reference=False):
+    """
+    Return {encoded root move: leaf nodes below it} for depth >= 1.
+    """
+    side = game.whose_turn
+    counts = {}
+    for move in _legal_moves(game, reference):
+        game.make_move(move)
+        if depth == 1:
+            counts[move] = 1
+        elif _ends_game(game, move, side):
+            counts[move] = 0
+        else:
+            counts[move] = perft(game, depth - 1, reference)
+        game.unmake_move()
+    return counts
+
+
+def compare_generators(game, depth):
+    """
+    Walk the tree to depth and return the first position (as a list of
+    encoded moves from the root) where generate_all_moves and the reference
+    generator disagree, or None if they agree everywhere.
+    """
+    path = []
+
+    def walk(remaining):
+        fast = game.rules.generate_all_moves(game.board, game.whose_turn)
+        if sorted(fast) != sorted(reference_moves(game)):
+            return list(path)
+        if remaining <= 1:
+            return None
+        side = game.whose_turn
+        for move in fast:
+            game.make_move(move)
+            path.append(move)
+            mismatch = None if _ends_game(game, move, side) else walk(remaining - 1)
+            path.pop()
+            game.unmake_move()
+            if mismatch is not None:
+                return mismatch
+        return None
+
+    return walk(depth)
+
+
+def timed_perft(game, depth, reference=False):
+    """
+    Return (leaf nodes, seconds, nodes per second).
+    """
+    start = time.perf_counter()
+    nodes = perft(game, depth, reference)
+    elapsed = time.perf_counter() - start
+    return nodes, elapsed, int(nodes / elapsed) if elapsed > 0 else 0
+
+
+def run_suite(max_depth=3, reference=False):
+    """
+    Run perft on every reference position up to max_depth.
+
+    Returns a list of (name, depth, expected, actual, nodes_per_second).
+    """
+    results = []
+    for name, (layout, turn, counts) in REFERENCE_POSITIONS.items():
+        for depth in sorted(counts):
+            if depth > max_depth:
+                continue
+            game = game_from_layout(layout, turn)
+            nodes, _, nps = timed_perft(game, depth, reference)
+            results.append((name, depth, counts[depth], nodes, nps))
+    return results
+
+
+def main(argv):
+    from .engine.search import move_to_str
+
+    if "--suite" in argv:
+        args = [a for a in argv if not a.startswith("--")]
+        max_depth = int(args[0]) if args else 3
+        failures = 0
+        for name, depth, expected, actual, nps in run_suite(max_depth, "--reference" in argv):
+            status = "ok" if expected == actual else "MISMATCH"
+            failures += expected != actual
+            print(f"{name:16} depth {depth}: {actual:>10} (expected {expected:>10}) {nps:>9} nodes/s {status}")
+        return 1 if failures else 0
+
+    reference = "--reference" in argv
+    name = "start"
+    if "--position" in argv:
+        name = argv[argv.index("--position") + 1]
+    args = [a for a in argv if not a.startswith("--") and a != name]
+    depth = int(args[0]) if args else 3
+    layout, turn, _ = REFERENCE_POSITIONS[name]
+    game = game_from_layout(layout, turn)
+
+    if "--divide" in argv:
+        counts = divide(game, depth, reference)
+        for move, nodes in sorted(counts.items(), key=lambda item: move_to_str(item[0])):
+            print(f"{move_to_str(move)}: {nodes}")
+        print(f"total: {sum(counts.values())}")
+        return 0
+
+    nodes, elapsed, nps = timed_perft(game, depth, reference)
+    print(f"perft({depth}) {name}: {nodes} nodes in {elapsed:.3f}s ({nps} nodes/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
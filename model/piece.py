@@ -1,23 +1,65 @@
+from .bitboard import COL_OF, COLS, NUM_SQUARES, ROW_OF, ROWS
 from .rank import Rank
 from .player import Player
 
 class Position:
+    """
+    An immutable board coordinate.
+
+    Positions on the board are interned: Position(row, col) returns the
+    shared object from SQUARE_POSITIONS, so creating one allocates nothing
+    and positions can be compared, hashed and stored freely. Off-board
+    coordinates (e.g. from bad user input) get a fresh object so they can
+    still be rejected by the rules.
+    """
+    __slots__ = ("row", "col")
     row: int
     col: int
 
-    def __init__(self,row,col):
-        self.row = row
-        self.col = col
-        
+    def __new__(cls, row=None, col=None):
+        if row is not None and 0 <= row < ROWS and 0 <= col < COLS:
+            return SQUARE_POSITIONS[row * COLS + col]
+        return _new_position(row, col)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
+    def __reduce__(self):
+        return Position, (self.row, self.col)
+
+    def __setstate__(self, state):
+        # Positions pickled before __slots__ carry their attributes in a dict
+        if isinstance(state, tuple):
+            state = state[1]
+        object.__setattr__(self, "row", state["row"])
+        object.__setattr__(self, "col", state["col"])
+
     def __eq__(self, other):
         return isinstance(other, Position) and self.row == other.row and self.col == other.col
+
+    def __hash__(self):
+        return hash((self.row, self.col))
+
+    def __repr__(self):
+        return f"Position({self.row}, {self.col})"
+
+def _new_position(row, col):
+    position = object.__new__(Position)
+    object.__setattr__(position, "row", row)
+    object.__setattr__(position, "col", col)
+    return position
+
+# One shared Position per square, indexed by square number (row * COLS + col)
+SQUARE_POSITIONS = tuple(_new_position(ROW_OF[sq], COL_OF[sq]) for sq in range(NUM_SQUARES))
+
 class Piece:
+    __slots__ = ("id", "name", "rank", "owner", "position", "is_alive", "symbol")
     id: int
     name: str
     rank: Rank
     owner: Player
     position: Position
-    is_alive: bool = True
+    is_alive: bool
 
     def __init__(self, char, rank: Rank, owner: Player, position: Position):
         self.id = id(self)
@@ -26,7 +68,17 @@ class Piece:
         self.rank = rank
         self.owner = owner
         self.position = position
+        self.is_alive = True
         self.symbol = owner.name[0] + name + str(self.rank.value)
+
+    def __setstate__(self, state):
+        # Pieces pickled before __slots__ carry a plain dict, and only had
+        # is_alive set once they were captured
+        if isinstance(state, tuple):
+            state = state[1]
+        self.is_alive = True
+        for key, value in state.items():
+            setattr(self, key, value)
     
     def remove_piece(self):
         self.is_alive = False
@@ -52,4 +104,4 @@ class Piece:
         if char not in animal_map:
             raise ValueError(f"Unknown animal character: '{char}'")
         
-        return animal_map[char]
\ No newline at end of file
+        return animal_map[char]
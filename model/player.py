@@ -1,22 +1,73 @@
 class Player:
+    """
+    A player and the index of their pieces on the board.
+
+    Attributes:
+        pieces (dict): Pieces on the board, in the order they were added
+            (used as an insertion-ordered set; values are unused)
+        by_rank (list): Set of pieces per rank value (index 0 unused)
+        alive_count (int): Number of pieces on the board
+        material (int): Sum of the rank values of those pieces
+
+    Game keeps the index in sync through add_piece/remove_piece on every
+    capture and undo, so all of these are O(1) to read and update.
+    """
+    __slots__ = ("id", "name", "pieces", "undos", "moved_this_turn", "by_rank", "alive_count", "material")
+
+    # Attributes that are pickled; the index is rebuilt from pieces
+    _STATE = ("id", "name", "pieces", "undos", "moved_this_turn")
+
     def __init__(self, name):
         self.id = id(self)
         self.name=name
-        self.pieces=[]
+        self.pieces={}
         self.undos=3
         self.moved_this_turn=False
+        self._reset_index()
+
+    def __getstate__(self):
+        state = {key: getattr(self, key) for key in self._STATE}
+        # Subclasses such as EnginePlayer keep their own attributes in __dict__
+        state.update(getattr(self, "__dict__", {}))
+        return state
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+        # Games saved before the index existed hold a plain list
+        self.pieces = dict.fromkeys(self.pieces)
+        self._reset_index()
+        for piece in self.pieces:
+            self._index(piece)
+
+    def _reset_index(self):
+        self.by_rank = [set() for _ in range(9)]
+        self.alive_count = 0
+        self.material = 0
+
+    def _index(self, piece):
+        self.by_rank[piece.rank].add(piece)
+        self.alive_count += 1
+        self.material += piece.rank
 
     def add_piece(self, piece):
         if piece not in self.pieces:
-            self.pieces.append(piece)
+            self.pieces[piece] = None
+            self._index(piece)
 
     def remove_piece(self, piece):
         if piece in self.pieces:
-            self.pieces.remove(piece)
+            del self.pieces[piece]
+            self.by_rank[piece.rank].discard(piece)
+            self.alive_count -= 1
+            self.material -= piece.rank
+
+    def clear_pieces(self):
+        self.pieces = {}
+        self._reset_index()
 
     def get_alive_pieces(self):
         return [piece for piece in self.pieces if piece.is_alive]
-        
-    def __str__(self):
-        return f"Player({self.name}) with {len(self.get_alive_pieces())} active pieces"
 
+    def __str__(self):
+        return f"Player({self.name}) with {self.alive_count} active pieces"
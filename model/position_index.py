@@ -0,0 +1,235 @@
+"""
+On-disk index of the positions reached in archived games.
+
+Each archived file (save or record) is replayed once through Game and
+every position it passes through is stored in an SQLite table keyed by
+its Zobrist key (Game.position_key), together with the move played from
+it. Queries are then index lookups instead of replays:
+
+    index = PositionIndex("data/positions.sqlite")
+    index.update()                                  # ingest new/changed files in data/
+    index.games_reaching(game)                      # [(path, ply), ...]
+    index.move_stats(rank=Rank.LION, from_sq=15, jumps_only=True)   # (played, won)
+
+Ingestion is incremental: a file is only replayed again when its size
+or modification time changes.
+
+Usage:
+    python -m model.position_index [--db PATH] [--rebuild] [directory]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+from .bitboard import BIT, NEIGHBOUR_MASK
+from .record import apply_record_move, open_record
+from .save_game import SaveGame
+from .zobrist import SIDE_KEY
+
+DEFAULT_DB = os.path.join("data", "positions.sqlite")
+UNKNOWN = -1  # result of a game that did not end on the board (unfinished or resigned)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    plies INTEGER NOT NULL,
+    result INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER NOT NULL,
+    game_id INTEGER NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+    ply INTEGER NOT NULL,
+    side INTEGER NOT NULL,
+    rank INTEGER,
+    from_sq INTEGER,
+    to_sq INTEGER,
+    jump INTEGER
+);
+CREATE INDEX IF NOT EXISTS positions_key ON positions(key);
+CREATE INDEX IF NOT EXISTS positions_move ON positions(rank, from_sq);
+"""
+
+
+def _signed(key):
+    """
+    SQLite integers are signed 64-bit; store the unsigned key's bit pattern.
+    """
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def replay_positions(path):
+    """
+    Replay a file and return (plies, result, rows) where rows are
+    (key, ply, side, rank, from_sq, to_sq, jump) for every position
+    reached; the final position has no move. Replay stops at the first
+    illegal move. Raises on undecodable files.
+    """
+    with open_record(path) as reader:
+        game = reader.game_at(0)
+        rows = []
+        result = UNKNOWN
+        ply = 0
+        for move in reader.iter_moves():
+            from_sq, to_sq = move & 63, move >> 6
+            mover = game.board.squares[from_sq]
+            if mover is None:
+                break
+            side = game.board.side_of(mover.owner)
+            # the position as seen by the mover (apply_record_move hands it the turn)
+            key = game.board.zobrist ^ SIDE_KEY if side else game.board.zobrist
+            valid, _ = apply_record_move(game, move)
+            if not valid:
+                break
+            jump = not BIT[to_sq] & NEIGHBOUR_MASK[from_sq]
+            rows.append((_signed(key), ply, side, int(mover.rank), from_sq, to_sq, int(jump)))
+            ply += 1
+            board = game.board
+            if BIT[to_sq] & board.den_mask[1 - side] or not board.side_bb[1 - side]:
+                result = side
+                break
+        rows.append((_signed(game.position_key()), ply, game.whose_turn, None, None, None, None))
+    return ply, result, rows
+
+
+class PositionIndex:
+    """
+    SQLite-backed position index over the game archive.
+
+    Attributes:
+        path (str): Database file
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest(self, paths):
+        """
+        Index the given files, skipping those unchanged since they were
+        last indexed. Files that cannot be decoded are skipped.
+
+        Returns (indexed, unchanged, failed) counts.
+        """
+        indexed = unchanged = failed = 0
+        db = self.connection
+        for path in paths:
+            stat = os.stat(path)
+            row = db.execute("SELECT size, mtime FROM games WHERE path = ?", (path,)).fetchone()
+            if row == (stat.st_size, stat.st_mtime):
+                unchanged += 1
+                continue
+            try:
+                plies, result, rows = replay_positions(path)
+            except Exception:
+                failed += 1
+                continue
+            with db:
+                db.execute("DELETE FROM games WHERE path = ?", (path,))
+                game_id = db.execute(
+                    "INSERT INTO games (path, size, mtime, plies, result) VALUES (?, ?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime, plies, result)).lastrowid
+                db.executemany(
+                    "INSERT INTO positions (key, game_id, ply, side, rank, from_sq, to_sq, jump) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(key, game_id, *rest) for key, *rest in rows])
+            indexed += 1
+        return indexed, unchanged, failed
+
+    def update(self):
+        """
+        Ingest the save and record files in data/ listed by SaveGame.
+        """
+        names = SaveGame.get_jungle_save_files() + SaveGame.get_jungle_record_files()
+        return self.ingest(os.path.join("data", name) for name in sorted(names))
+
+    def games_reaching(self, position):
+        """
+        Return [(path, ply)] of archived games that reached position, which
+        is a Game or a key from Game.position_key().
+        """
+        key = position.position_key() if hasattr(position, "position_key") else position
+        return self.connection.execute(
+            "SELECT games.path, positions.ply FROM positions JOIN games ON games.id = positions.game_id "
+            "WHERE positions.key = ? ORDER BY games.path, positions.ply", (_signed(key),)).fetchall()
+
+    def move_stats(self, rank=None, from_sq=None, to_sq=None, jumps_only=False, position=None):
+        """
+        Count archived moves matching the filters and how many of them
+        were played by the side that went on to win.
+
+        Returns:
+            (played, won)
+        """
+        clauses, params = ["positions.rank IS NOT NULL"], []
+        if rank is not None:
+            clauses.append("positions.rank = ?")
+            params.append(int(rank))
+        if from_sq is not None:
+            clauses.append("positions.from_sq = ?")
+            params.append(from_sq)
+        if to_sq is not None:
+            clauses.append("positions.to_sq = ?")
+            params.append(to_sq)
+        if jumps_only:
+            clauses.append("positions.jump = 1")
+        if position is not None:
+            key = position.position_key() if hasattr(position, "position_key") else position
+            clauses.append("positions.key = ?")
+            params.append(_signed(key))
+        played, won = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(games.result = positions.side), 0) "
+            "FROM positions JOIN games ON games.id = positions.game_id WHERE " + " AND ".join(clauses),
+            params).fetchone()
+        return played, won
+
+    def counts(self):
+        """
+        Return (games, positions) currently indexed.
+        """
+        games = self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+        positions = self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        return games, positions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Jungle archive position index")
+    parser.add_argument("directory", nargs="?", default=None, help="index every file below this directory")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--rebuild", action="store_true", help="drop the index and ingest everything again")
+    args = parser.parse_args(argv)
+
+    if args.rebuild and os.path.exists(args.db):
+        os.remove(args.db)
+    with PositionIndex(args.db) as index:
+        if args.directory is None:
+            indexed, unchanged, failed = index.update()
+        else:
+            paths = sorted(os.path.join(root, name) for root, _, files in os.walk(args.directory)
+                           for name in files if name.endswith((".record", ".jungle")))
+            indexed, unchanged, failed = index.ingest(paths)
+        games, positions = index.counts()
+    print(f"{indexed} files indexed, {unchanged} unchanged, {failed} failed; "
+          f"{games} games and {positions} positions in '{args.db}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Move-list record files for playback.
+
+A record stores the starting position once and then only the encoded
+moves, so any move can be read in O(1) by offset. Keyframe snapshots of
+the full position every KEYFRAME_INTERVAL plies let a reader jump to
+any ply by replaying at most KEYFRAME_INTERVAL - 1 moves.
+
+Layout (little-endian):
+    header:    magic b"JREC", version u8, player names (u8 length + UTF-8) x2,
+               start pieces (u8 count + u16 per piece), start side u8
+    moves:     u16 per ply (from_sq | to_sq << 6)
+    keyframes: per keyframe: side to move u8, u8 count + u16 per piece
+    index:     u32 file offset per keyframe
+    footer:    u32 plies, u32 index offset, u16 keyframes, u16 interval, b"JREC"
+"""
+import io
+import os
+import pickle
+import struct
+from array import array
+
+from .game import Game
+from .piece import Position
+from .player import Player
+from . import save_game
+from .save_game import SaveGame, encode_name, encode_pieces, layout_from_pieces
+
+MAGIC = b"JREC"
+VERSION = 1
+KEYFRAME_INTERVAL = 32
+FOOTER = struct.Struct("<IIHH4s")
+
+
+def record_bytes(game, interval=KEYFRAME_INTERVAL):
+    """
+    Encode the moves played in game (its undo stack) as a record.
+    """
+    pieces, moves = SaveGame.start_position(game)
+    return encode_record([player.name for player in game.players], pieces, game.whose_turn, moves, interval)
+
+
+def encode_record(names, pieces, whose_turn, moves, interval=KEYFRAME_INTERVAL):
+    """
+    Encode a start position and moves as a record. The moves are not
+    validated; only the ones leading up to the last keyframe are played,
+    so with interval > len(moves) none are.
+    """
+    start_side = whose_turn
+    if moves:
+        # the side to move first owns the piece on the first move's origin
+        start_side = next(((code >> 6) & 1 for code in pieces if code & 63 == moves[0] & 63), whose_turn)
+
+    parts = [MAGIC, bytes([VERSION])]
+    for name in names:
+        name = encode_name(name)
+        parts.append(bytes([len(name)]) + name)
+    parts.append(bytes([len(pieces)]) + pieces.tobytes() + bytes([start_side]))
+    parts.append(moves.tobytes())
+
+    # Replay on a scratch game to take the keyframe snapshots
+    scratch = Game(Player(names[0]), Player(names[1]))
+    scratch.setup_position(layout_from_pieces(pieces), start_side)
+    offset = sum(len(part) for part in parts)
+    index = array("I")
+    last_keyframe = len(moves) - len(moves) % interval
+    for ply in range(last_keyframe + 1):
+        if ply % interval == 0:
+            snapshot = encode_pieces(scratch.board)
+            blob = bytes([scratch.whose_turn, len(snapshot)]) + snapshot.tobytes()
+            index.append(offset)
+            parts.append(blob)
+            offset += len(blob)
+        if ply < last_keyframe:
+            move = moves[ply]
+            scratch.whose_turn = scratch.board.side_of(scratch.board.squares[move & 63].owner)
+            scratch.make_move(move)
+    parts.append(index.tobytes())
+    parts.append(FOOTER.pack(len(moves), offset, len(index), interval, MAGIC))
+    return b"".join(parts)
+
+
+def write_record(filename, game, interval=KEYFRAME_INTERVAL):
+    """
+    Write game's moves to a record file. Returns True on success.
+    """
+    try:
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, "wb") as file:
+            file.write(record_bytes(game, interval))
+        return True
+    except Exception as e:
+        print(f"Error recording game: {e}")
+        return False
+
+
+def is_record_file(filename):
+    """
+    True if filename starts with the record magic.
+    """
+    try:
+        with open(filename, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def open_record(filename):
+    """
+    Open any record or save file as a RecordReader. Saves and records
+    pickled before the move-list format are converted in memory.
+    Raises on files that cannot be decoded.
+    """
+    if is_record_file(filename):
+        return RecordReader(filename)
+    with open(filename, "rb") as file:
+        data = file.read()
+    if data.startswith(save_game.MAGIC):
+        # Keep the saved moves as they are (a single keyframe means none
+        # is replayed here), so a reader can report an illegal one
+        names, _, whose_turn, _, pieces, moves, _ = SaveGame.decode(data)
+        return RecordReader(encode_record(names, pieces, whose_turn, moves, interval=min(len(moves) + 1, 0xFFFF)))
+    game = pickle.loads(data)
+    return RecordReader(record_bytes(game))
+
+
+class RecordReader:
+    """
+    Random-access reader over a record file or bytes.
+
+    Opening only reads the header, footer and keyframe index; moves are
+    read from disk on demand.
+
+    Attributes:
+        names (tuple): Player names
+        interval (int): Plies between keyframes
+    """
+
+    def __init__(self, source):
+        """
+        Args:
+            source: A filename, bytes, or an open binary file object
+        """
+        if isinstance(source, (bytes, bytearray)):
+            self._file = io.BytesIO(source)
+        elif isinstance(source, str):
+            self._file = open(source, "rb")
+        else:
+            self._file = source
+        file = self._file
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a Jungle record file.")
+        version = file.read(1)[0]
+        if version != VERSION:
+            raise ValueError(f"Unsupported record version {version}.")
+        names = []
+        for _ in range(2):
+            length = file.read(1)[0]
+            names.append(file.read(length).decode("utf-8"))
+        self.names = tuple(names)
+        count = file.read(1)[0]
+        self._start_pieces = array("H")
+        self._start_pieces.frombytes(file.read(2 * count))
+        self._start_side = file.read(1)[0]
+        self._moves_offset = file.tell()
+
+        file.seek(-FOOTER.size, os.SEEK_END)
+        plies, index_offset, keyframes, interval, magic = FOOTER.unpack(file.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError("Record file is truncated.")
+        self._plies = plies
+        self.interval = interval
+        file.seek(index_offset)
+        self._index = array("I")
+        self._index.frombytes(file.read(4 * keyframes))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._plies
+
+    def move(self, ply):
+        """
+        Return the encoded move played at ply (0-based) in O(1).
+        """
+        if not 0 <= ply < self._plies:
+            raise IndexError("Ply out of range.")
+        self._file.seek(self._moves_offset + 2 * ply)
+        data = self._file.read(2)
+        return data[0] | data[1] << 8
+
+    def iter_moves(self, start=0, chunk=256):
+        """
+        Lazily yield encoded moves from ply start onwards, reading in chunks.
+        """
+        ply = start
+        while ply < self._plies:
+            count = min(chunk, self._plies - ply)
+            self._file.seek(self._moves_offset + 2 * ply)
+            moves = array("H")
+            moves.frombytes(self._file.read(2 * count))
+            yield from moves
+            ply += count
+
+    def _keyframe(self, i):
+        self._file.seek(self._index[i])
+        side, count = self._file.read(2)
+        pieces = array("H")
+        pieces.frombytes(self._file.read(2 * count))
+        return side, pieces
+
+    def game_at(self, ply=0):
+        """
+        Build a Game positioned after ply moves, starting from the nearest
+        keyframe at or before ply.
+        """
+        ply = max(0, min(ply, self._plies))
+        i = min(ply // self.interval, len(self._index) - 1)
+        side, pieces = self._keyframe(i)
+        game = Game(Player(self.names[0]), Player(self.names[1]))
+        game.setup_position(layout_from_pieces(pieces), side)
+        current = i * self.interval
+        for move in self.iter_moves(current, chunk=self.interval):
+            if current >= ply:
+                break
+            apply_record_move(game, move)
+            current += 1
+        return game
+
+
+def apply_record_move(game, move):
+    """
+    Play an encoded record move through move_piece and end the turn.
+    The move must be made by the side to move, so a history in which one
+    side moves twice in a row is rejected.
+    Returns (valid, message) from move_piece.
+    """
+    from_sq, to_sq = move & 63, move >> 6
+    valid, message = game.move_piece(Position(from_sq // 7, from_sq % 7), Position(to_sq // 7, to_sq % 7))
+    if valid:
+        game.switch_turn()
+    return valid, message
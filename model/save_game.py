@@ -1,12 +1,281 @@
 import pickle
 import os
+import struct
+from array import array
+
+# Compact save format (all integers little-endian):
+#   magic b"JNGL", version u8, flags u8, whose_turn u8, undos u8 x2
+#   player names: u8 length + UTF-8 bytes, x2
+#   initial pieces: u8 count + u16 per piece (square | side << 6 | rank << 7)
+#   moves: u16 count + u16 per move (from_sq | to_sq << 6), i.e. the undo stack
+# Version 2 adds:
+#   rules: repetition_rule u8, repetition_limit u8, chase_rule u8, chase_limit u8
+#          (rules are indices into REPETITION_RULES)
+#   engine settings, for each seat with its FLAG_ENGINE bit in seat order:
+#          kind u8 (ENGINE_KINDS), max_depth u8, time_limit f32 (< 0 for none),
+#          tt_size_mb u16, and for MCTS also playouts u32, workers u8,
+#          playout u8 (index into mcts.PLAYOUTS)
+# The board is rebuilt from CELL_MAP and the initial pieces, then the moves
+# are replayed through Game.move_piece so undo information is restored.
+# Version 1 saves load with the default rules and engine settings.
+MAGIC = b"JNGL"
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+HEADER = struct.Struct("<4sBBBBB")
+RULES = struct.Struct("<BBBB")
+ENGINE = struct.Struct("<BBfH")
+MCTS_SETTINGS = struct.Struct("<IBB")
+ENGINE_KINDS = ("alphabeta", "mcts")
+
+FLAG_RECORDING = 1
+FLAG_COMPLETED = 2
+FLAG_MOVED = (4, 8)      # moved_this_turn of player 0 / 1
+FLAG_ENGINE = (16, 32)   # player 0 / 1 is an EnginePlayer
+
+
+def encode_pieces(board):
+    """
+    Encode the pieces on a board as a u16 array, ordered by square.
+    """
+    return array("H", (sq | board.side_of(piece.owner) << 6 | int(piece.rank) << 7
+                       for sq, piece in enumerate(board.squares) if piece is not None))
+
+
+def encode_name(name):
+    """
+    Encode a player name as UTF-8, cut to at most 255 bytes on a
+    character boundary so it always decodes again.
+    """
+    return name.encode("utf-8")[:255].decode("utf-8", "ignore").encode("utf-8")
+
+
+def layout_from_pieces(pieces):
+    """
+    Turn an encoded piece list into a Game.setup_position layout.
+    """
+    layout = [["."] * 7 for _ in range(9)]
+    for code in pieces:
+        sq, side, rank = code & 63, (code >> 6) & 1, code >> 7
+        letter = "RCDWPTLE"[rank - 1]
+        layout[sq // 7][sq % 7] = letter.lower() if side == 0 else letter
+    return ["".join(row) for row in layout]
+
 
 class SaveGame:
 
+    @staticmethod
+    def start_position(game):
+        """
+        Return (encoded start pieces, encoded moves) such that replaying the
+        moves from the start pieces reproduces the game's undo stack.
+        """
+        board = game.board
+        # Walk the undo stack backwards over plain (side, rank) data to find
+        # the position the stored moves start from
+        squares = {}
+        for sq, piece in enumerate(board.squares):
+            if piece is not None:
+                squares[sq] = (board.side_of(piece.owner), int(piece.rank))
+        moves = array("H")
+        for entry in reversed(game.move_stack):
+            from_sq = entry["from_pos"].row * 7 + entry["from_pos"].col
+            to_sq = entry["to_pos"].row * 7 + entry["to_pos"].col
+            squares[from_sq] = squares.pop(to_sq)
+            captured = entry["captured_piece"]
+            if captured is not None:
+                squares[to_sq] = (board.side_of(captured.owner), int(captured.rank))
+            moves.append(from_sq | to_sq << 6)
+        moves.reverse()
+        pieces = array("H", (sq | side << 6 | rank << 7 for sq, (side, rank) in sorted(squares.items())))
+        return pieces, moves
+
+    @staticmethod
+    def to_bytes(game) -> bytes:
+        """
+        Encode a Game in the compact binary save format.
+        """
+        from .engine.engine_player import EnginePlayer
+        from .game_rules import REPETITION_RULES
+
+        players = game.players
+        pieces, moves = SaveGame.start_position(game)
+
+        flags = 0
+        if game.recording:
+            flags |= FLAG_RECORDING
+        if game.completed:
+            flags |= FLAG_COMPLETED
+        for idx, player in enumerate(players):
+            if player.moved_this_turn:
+                flags |= FLAG_MOVED[idx]
+            if isinstance(player, EnginePlayer):
+                flags |= FLAG_ENGINE[idx]
+
+        parts = [HEADER.pack(MAGIC, VERSION, flags, game.whose_turn,
+                             max(0, min(255, players[0].undos)), max(0, min(255, players[1].undos)))]
+        for player in players:
+            name = encode_name(player.name)
+            parts.append(bytes([len(name)]) + name)
+        parts.append(bytes([len(pieces)]) + pieces.tobytes())
+        parts.append(struct.pack("<H", len(moves)) + moves.tobytes())
+        parts.append(RULES.pack(REPETITION_RULES.index(game.repetition_rule), min(255, game.repetition_limit),
+                                REPETITION_RULES.index(game.chase_rule), min(255, game.chase_limit)))
+        for player in players:
+            if isinstance(player, EnginePlayer):
+                parts.append(SaveGame._engine_bytes(player))
+        return b"".join(parts)
+
+    @staticmethod
+    def _engine_bytes(player):
+        from .engine.mcts import PLAYOUTS, MCTSPlayer
+
+        mcts = isinstance(player, MCTSPlayer)
+        time_limit = player.time_limit if player.time_limit is not None else -1.0
+        data = ENGINE.pack(ENGINE_KINDS.index("mcts" if mcts else "alphabeta"), min(255, player.max_depth),
+                           time_limit, min(0xFFFF, player.tt_size_mb))
+        if mcts:
+            data += MCTS_SETTINGS.pack(player.playouts, min(255, player.workers), PLAYOUTS.index(player.playout))
+        return data
+
+    @staticmethod
+    def _engine_player(name, settings):
+        """
+        Create the engine player for a seat from its decoded settings
+        (None for a version 1 save: a default EnginePlayer).
+        """
+        from .engine.engine_player import EnginePlayer
+        from .engine.mcts import MCTSPlayer
+
+        if settings is None:
+            return EnginePlayer(name)
+        options = dict(settings)
+        kind = options.pop("kind")
+        return MCTSPlayer(name, **options) if kind == "mcts" else EnginePlayer(name, **options)
+
+    _start_codes = None
+
+    @staticmethod
+    def _start_pieces(game):
+        """
+        Encoded piece list of a freshly created game (computed once).
+        """
+        if SaveGame._start_codes is None:
+            SaveGame._start_codes = encode_pieces(game.board)
+        return SaveGame._start_codes
+
+    @staticmethod
+    def decode(data: bytes):
+        """
+        Split compact save data into its fields without replaying the moves.
+        Returns (names, flags, whose_turn, (undos0, undos1), pieces, moves,
+        settings), where settings is None for a version 1 save, otherwise
+        {"rules": (repetition_rule, repetition_limit, chase_rule, chase_limit),
+        "engines": [engine options per seat, None for humans]}.
+        Raises ValueError if the data is not a valid save.
+        """
+        from .engine.mcts import PLAYOUTS
+        from .game_rules import REPETITION_RULES
+
+        if len(data) < HEADER.size:
+            raise ValueError("Save data is truncated.")
+        magic, version, flags, whose_turn, undos0, undos1 = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a Jungle save file.")
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported save format version {version}.")
+        offset = HEADER.size
+        names = []
+        for _ in range(2):
+            length = data[offset]
+            names.append(data[offset + 1:offset + 1 + length].decode("utf-8"))
+            offset += 1 + length
+        count = data[offset]
+        pieces = array("H")
+        pieces.frombytes(data[offset + 1:offset + 1 + 2 * count])
+        offset += 1 + 2 * count
+        (move_count,) = struct.unpack_from("<H", data, offset)
+        moves = array("H")
+        moves.frombytes(data[offset + 2:offset + 2 + 2 * move_count])
+        if len(moves) != move_count:
+            raise ValueError("Save data is truncated.")
+        if version == 1:
+            return names, flags, whose_turn, (undos0, undos1), pieces, moves, None
+
+        offset += 2 + 2 * move_count
+        try:
+            repetition, repetition_limit, chase, chase_limit = RULES.unpack_from(data, offset)
+            offset += RULES.size
+            rules = (REPETITION_RULES[repetition], repetition_limit, REPETITION_RULES[chase], chase_limit)
+            engines = []
+            for idx in range(2):
+                if not flags & FLAG_ENGINE[idx]:
+                    engines.append(None)
+                    continue
+                kind, max_depth, time_limit, tt_size_mb = ENGINE.unpack_from(data, offset)
+                offset += ENGINE.size
+                options = {"kind": ENGINE_KINDS[kind], "max_depth": max_depth,
+                           "time_limit": time_limit if time_limit >= 0 else None, "tt_size_mb": tt_size_mb}
+                if options["kind"] == "mcts":
+                    playouts, workers, playout = MCTS_SETTINGS.unpack_from(data, offset)
+                    offset += MCTS_SETTINGS.size
+                    options.update(playouts=playouts, workers=workers, playout=PLAYOUTS[playout])
+                engines.append(options)
+        except (struct.error, IndexError):
+            raise ValueError("Save data is truncated.")
+        settings = {"rules": rules, "engines": engines}
+        return names, flags, whose_turn, (undos0, undos1), pieces, moves, settings
+
+    @staticmethod
+    def from_bytes(data: bytes):
+        """
+        Rebuild a Game from the compact binary save format.
+        Raises ValueError if the data is not a valid save.
+        """
+        from .game import Game
+        from .piece import Position
+        from .player import Player
+
+        names, flags, whose_turn, (undos0, undos1), pieces, moves, settings = SaveGame.decode(data)
+
+        engines = settings["engines"] if settings else [None, None]
+        players = [SaveGame._engine_player(name, engines[idx]) if flags & FLAG_ENGINE[idx] else Player(name)
+                   for idx, name in enumerate(names)]
+        game = Game(players[0], players[1])
+        if settings:
+            # before the replay: a 'forbid' rule decides which moves are legal
+            repetition, repetition_limit, chase, chase_limit = settings["rules"]
+            game.set_repetition_rules(repetition, repetition_limit, chase, chase_limit)
+        if pieces != SaveGame._start_pieces(game):
+            game.setup_position(layout_from_pieces(pieces))
+
+        # The side that owns the first mover starts; after that the sides
+        # must alternate, as they do in play
+        first = game.board.squares[moves[0] & 63] if moves else None
+        if first is not None:
+            game.whose_turn = game.board.side_of(first.owner)
+        for move in moves:
+            from_sq, to_sq = move & 63, move >> 6
+            if game.board.squares[from_sq] is None:
+                raise ValueError("Save data contains an invalid move.")
+            valid, message = game.move_piece(Position(from_sq // 7, from_sq % 7), Position(to_sq // 7, to_sq % 7))
+            if not valid:
+                raise ValueError(f"Save data contains an illegal move: {message}")
+            game.switch_turn()
+
+        game.whose_turn = whose_turn
+        players[0].undos, players[1].undos = undos0, undos1
+        for idx, player in enumerate(players):
+            player.moved_this_turn = bool(flags & FLAG_MOVED[idx])
+        game.recording = bool(flags & FLAG_RECORDING)
+        game.completed = bool(flags & FLAG_COMPLETED)
+        if game.completed:
+            game.draw_reason = game.check_draw()[1]
+        return game
+
     @staticmethod
     def save_game(game, filename: str = "game.jungle"):
         """
-        Saves a Game object to the specified filename.
+        Saves a Game object to the specified filename in the compact binary format.
         Respects the path as provided by the caller.
         """
 
@@ -17,7 +286,7 @@ class SaveGame:
                 os.makedirs(directory, exist_ok=True)
 
             with open(filename, "wb") as file:
-                pickle.dump(game, file)
+                file.write(SaveGame.to_bytes(game))
 
             return True
 
@@ -30,6 +299,8 @@ class SaveGame:
     def load_game(filename: str = "game.jungle"):
         """
         Loads and returns a Game object.
+        Files written before the compact format (whole-object pickles) are
+        still accepted.
         Returns None if file does not exist or loading fails.
         """
 
@@ -38,7 +309,10 @@ class SaveGame:
 
         try:
             with open(filename, "rb") as file:
-                return pickle.load(file)
+                data = file.read()
+            if data.startswith(MAGIC):
+                return SaveGame.from_bytes(data)
+            return pickle.loads(data)
         except Exception as e:
             print(f"Error loading game: {e}")
             return None
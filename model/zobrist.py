@@ -0,0 +1,22 @@
+"""
+Zobrist keys for Jungle positions.
+
+A position key is the XOR of one random 64-bit key per (side, rank,
+square) occupied on the board, plus SIDE_KEY when player 2 (side 1) is
+to move. Because XOR is its own inverse, placing or removing a piece
+updates the key with a single XOR.
+"""
+import random
+
+from .bitboard import NUM_SQUARES
+
+# Fixed seed so keys (and anything stored by key) stay stable across runs
+_rng = random.Random(0x4A554E474C45)
+
+# PIECE_KEYS[side][rank][square], rank index 0 unused
+PIECE_KEYS = [
+    [[_rng.getrandbits(64) for _ in range(NUM_SQUARES)] for _ in range(9)]
+    for _ in range(2)
+]
+SIDE_KEY = _rng.getrandbits(64)
+del _rng
@@ -1,5 +1,10 @@
 import sys, os
+import asyncio
+import tempfile
+import time
+import pickle
 import unittest
+from array import array
 
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
@@ -8,8 +13,30 @@ from model.game_rules import GameRules
 from model.piece import Piece, Position
 from model.player import Player
 from model.rank import Rank
-from model.save_game import SaveGame
+from model.save_game import ENGINE, MCTS_SETTINGS, RULES, SaveGame
+from model import record
+from model.position_index import PositionIndex
 from model.board import Board
+from model.engine.search import Searcher, MATE, move_to_str
+from model.engine.mcts import MCTS, MCTSPlayer
+from model.engine import ordering
+from model.engine.ordering import MoveOrdering
+from model.engine.engine_player import EnginePlayer
+from model.engine.transposition import TranspositionTable, EXACT, LOWER
+from model import perft
+from model.engine import batch_eval
+from model.engine.evaluate import evaluate
+from model.engine.book import BookBuilder, OpeningBook
+from model.engine import tablebase
+from controller import selfplay
+from controller import replay
+from controller import server as game_server
+from controller.client import JungleClient
+from controller.script_driver import run_script
+from controller.analysis import BackgroundAnalyzer
+from controller.game_controller import GameController
+from view.userinterface import ScriptedInput, UserInterface
+from view.board_renderer import BoardRenderer
 
 """
 Assessment Rubric Coverage:
@@ -57,6 +84,21 @@ class TestJungleChessModel(unittest.TestCase):
         print_result("test_piece_creation", expected, actual)
         self.assertEqual(actual, expected)
 
+    def test_position_interning(self):
+        # On-board positions are shared, hashable and immutable; pieces carry no __dict__
+        pos = Position(2, 3)
+        try:
+            pos.row = 4
+            mutated = True
+        except AttributeError:
+            mutated = False
+        piece = self.board.grid[0][0][0]
+        expected = (True, True, Position(2, 3), False, False, False)
+        actual = (pos is Position(2, 3), pos in {Position(2, 3)}, pickle.loads(pickle.dumps(pos)), mutated,
+                  hasattr(piece, "__dict__"), Position(9, 0) is Position(9, 0))
+        print_result("test_position_interning", expected, actual)
+        self.assertEqual(actual, expected)
+
     def test_piece_removal(self):
         p = Piece("T", Rank.TIGER, self.player1, Position(1, 1))
         p.remove_piece()
@@ -80,6 +122,21 @@ class TestJungleChessModel(unittest.TestCase):
         print_result("test_player_piece_collection", expected, actual)
         self.assertEqual(actual, expected)
 
+    def test_player_alive_index(self):
+        # Counters and rank buckets follow a capture and its undo
+        self.game.setup_position([".......", "..c....", ".......", "r......", "E......",
+                                  ".......", ".......", "......L", "......."])
+        elephant = self.board.grid[4][0][0]
+        self.game.move_piece(Position(3, 0), Position(4, 0))
+        captured = (self.player2.alive_count, self.player2.material, len(self.player2.by_rank[Rank.ELEPHANT]),
+                    self.game.has_alive_pieces(1))
+        self.game.undo_move()
+        expected = ((1, 7, 0, True), (2, 15, {elephant}), (2, 3))
+        actual = (captured, (self.player2.alive_count, self.player2.material, self.player2.by_rank[Rank.ELEPHANT]),
+                  (self.player1.alive_count, self.player1.material))
+        print_result("test_player_alive_index", expected, actual)
+        self.assertEqual(actual, expected)
+
     # ======================= RANK =======================
 
     def test_rank_ordering(self):
@@ -108,6 +165,28 @@ class TestJungleChessModel(unittest.TestCase):
         print_result("test_board_place_and_remove", expected, actual)
         self.assertEqual(actual, expected)
 
+    def test_board_terrain_masks(self):
+        # 12 river squares, one trap set and one den per side
+        expected = (12, 3, 3, 1, 1)
+        actual = (bin(self.board.river_mask).count("1"),
+                  bin(self.board.trap_mask[0]).count("1"),
+                  bin(self.board.trap_mask[1]).count("1"),
+                  bin(self.board.den_mask[0]).count("1"),
+                  bin(self.board.den_mask[1]).count("1"))
+        print_result("test_board_terrain_masks", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_board_bitboards_follow_moves(self):
+        # Moving the top rat (2,0) -> (3,0) must move its bit as well
+        rat = self.board.piece_at(Position(2, 0))
+        self.board.move_piece(rat, Position(3, 0))
+        rats = self.board.piece_bb[0][Rank.RAT]
+        expected = (False, True, 8)
+        actual = (bool(rats & (1 << 14)), bool(rats & (1 << 21)),
+                  bin(self.board.side_bb[0]).count("1"))
+        print_result("test_board_bitboards_follow_moves", expected, actual)
+        self.assertEqual(actual, expected)
+
     def test_invalid_board_access(self):
         try:
             self.board.cell_at(Position(99, 99))
@@ -195,6 +274,54 @@ class TestJungleChessModel(unittest.TestCase):
         print_result("test_undo", expected, actual)
         self.assertEqual(actual, expected)
 
+    def test_make_unmake_move(self):
+        # Top rat (2,0) -> (3,0) is square 14 -> 21
+        before = [row[:] for row in self.board.grid]
+        bitboards = [side[:] for side in self.board.piece_bb]
+        self.game.make_move(14 | 21 << 6)
+        moved = (self.board.grid[3][0][0] is not None, self.game.whose_turn, len(self.game.move_history))
+        self.game.unmake_move()
+        expected = ((True, 1, 0), True, True, 0)
+        actual = (moved, self.board.grid == before, self.board.piece_bb == bitboards, self.game.whose_turn)
+        print_result("test_make_unmake_move", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_make_move_capture_and_record(self):
+        # Top rat walks down column a (14 -> 21 -> 28 -> 35) and takes the bottom elephant on 42
+        for move in (14 | 21 << 6, None, 21 | 28 << 6, None, 28 | 35 << 6, None):
+            if move is None:
+                self.game.whose_turn = 1 - self.game.whose_turn
+            else:
+                self.game.make_move(move)
+        elephant = self.board.squares[42]
+        captured = self.game.make_move(35 | 42 << 6, record=True)
+        after_capture = (elephant in self.player2.pieces, elephant.is_alive, self.game.move_history[-1])
+        self.game.unmake_move()
+        expected = (elephant, (False, False, ("Rat", "a4", "a3", "Elephant")), True, 0)
+        actual = (captured, after_capture, elephant.is_alive and self.board.squares[42] is elephant,
+                  len(self.game.move_history))
+        print_result("test_make_move_capture_and_record", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_position_key_transposition(self):
+        # Two move orders reaching the same position share a key; unmaking restores the start key
+        start = self.game.position_key()
+        first_order = (14 | 21 << 6, 48 | 41 << 6, 12 | 13 << 6, 50 | 49 << 6)
+        second_order = (12 | 13 << 6, 50 | 49 << 6, 14 | 21 << 6, 48 | 41 << 6)
+        for move in first_order:
+            self.game.make_move(move)
+        first_key = self.game.position_key()
+        for _ in first_order:
+            self.game.unmake_move()
+        restored = self.game.position_key()
+        for move in second_order:
+            self.game.make_move(move)
+        expected = (first_key, start)
+        actual = (self.game.position_key(), restored)
+        print_result("test_position_key_transposition", expected, actual)
+        self.assertEqual(actual, expected)
+        self.assertNotEqual(first_key, start)
+
     # ======================= SAVE / LOAD =======================
 
     def test_save_and_load(self):
@@ -207,14 +334,125 @@ class TestJungleChessModel(unittest.TestCase):
         self.assertEqual(actual, expected)
         os.remove(fname)
 
+    def test_compact_save_roundtrip(self):
+        # Position, history, undo counters and the undo stack survive a save/load in a few hundred bytes
+        fname = "test_compact.jungle"
+        for move in (14 | 21 << 6, 48 | 41 << 6, 21 | 28 << 6, 41 | 34 << 6):
+            from_sq, to_sq = move & 63, move >> 6
+            self.game.move_piece(Position(from_sq // 7, from_sq % 7), Position(to_sq // 7, to_sq % 7))
+            self.game.switch_turn()
+        self.player2.undos = 1
+        SaveGame.save_game(self.game, fname)
+        size = os.path.getsize(fname)
+        loaded = SaveGame.load_game(fname)
+        os.remove(fname)
+        state = (loaded.position_key(), loaded.move_history[:], loaded.players[1].undos)
+        undone, _ = loaded.undo_move()
+        expected = (True, (self.game.position_key(), self.game.move_history, 1), True, 3)
+        actual = (size < 200, state, undone, len(loaded.move_stack))
+        print_result("test_compact_save_roundtrip", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_compact_save_long_name(self):
+        # A name longer than 255 UTF-8 bytes is cut on a character boundary and still loads
+        self.player1.name = "**" + "\u00e9" * 130
+        loaded = SaveGame.from_bytes(SaveGame.to_bytes(self.game))
+        expected = ("**" + "\u00e9" * 126, True)
+        actual = (loaded.players[0].name, len(loaded.players[0].name.encode("utf-8")) <= 255)
+        print_result("test_compact_save_long_name", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_compact_save_keeps_settings(self):
+        # Engine seats, their settings and the repetition rules survive a save; a version 1 save loads with defaults
+        game = Game(MCTSPlayer("*M*", playouts=500, time_limit=None, workers=2, playout="random", book_path=None),
+                    EnginePlayer("#E#", max_depth=4, time_limit=0.5, tt_size_mb=8, book_path=None))
+        game.set_repetition_rules(repetition_rule="forbid", repetition_limit=4, chase_rule="off")
+        data = SaveGame.to_bytes(game)
+        loaded = SaveGame.from_bytes(data)
+        mcts, engine = loaded.players
+        settings_size = RULES.size + 2 * ENGINE.size + MCTS_SETTINGS.size
+        legacy = SaveGame.from_bytes(data[:4] + bytes([1]) + data[5:len(data) - settings_size])
+        expected = (("MCTSPlayer", 500, None, 2, "random"), ("EnginePlayer", 4, 0.5, 8), ("forbid", 4, "off", 6),
+                    ("EnginePlayer", "draw"))
+        actual = ((type(mcts).__name__, mcts.playouts, mcts.time_limit, mcts.workers, mcts.playout),
+                  (type(engine).__name__, engine.max_depth, engine.time_limit, engine.tt_size_mb),
+                  (loaded.repetition_rule, loaded.repetition_limit, loaded.chase_rule, loaded.chase_limit),
+                  (type(legacy.players[0]).__name__, legacy.repetition_rule))
+        print_result("test_compact_save_keeps_settings", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_load_legacy_pickle(self):
+        # Saves written before the compact format still load
+        legacy = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rattest.jungle")
+        loaded = SaveGame.load_game(legacy)
+        expected = (True, 12, len(loaded.move_history))
+        actual = (isinstance(loaded, Game), len(loaded.move_stack), len(SaveGame.from_bytes(SaveGame.to_bytes(loaded)).move_history))
+        print_result("test_load_legacy_pickle", expected, actual)
+        self.assertEqual(actual, expected)
+
     def test_load_missing(self):
         expected = None
         actual = SaveGame.load_game("nope.jungle")
         print_result("test_load_missing", expected, actual)
         self.assertEqual(actual, expected)
 
+    def test_record_seek_matches_replay(self):
+        # Seeking through keyframes gives the same position as replaying every move
+        selfplay_moves = selfplay.play_game(1, ("random", "random"), seed=3, max_plies=80)[2]
+        game = Game(Player("A"), Player("B"))
+        keys = [game.position_key()]
+        for move in selfplay_moves:
+            record.apply_record_move(game, move)
+            keys.append(game.position_key())
+        reader = record.RecordReader(record.record_bytes(game, interval=8))
+        expected = (len(selfplay_moves), selfplay_moves, keys)
+        actual = (len(reader), [reader.move(ply) for ply in range(len(reader))],
+                  [reader.game_at(ply).position_key() for ply in range(len(reader) + 1)])
+        print_result("test_record_seek_matches_replay", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_record_file_from_legacy_record(self):
+        # Pickled .record files convert to the move-list format without losing moves
+        legacy = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rattest.record")
+        fname = "test_record.record"
+        loaded = SaveGame.load_game(legacy)
+        record.write_record(fname, loaded)
+        with record.RecordReader(fname) as reader:
+            replayed = reader.game_at(len(reader))
+            actual = (record.is_record_file(fname), record.is_record_file(legacy), len(reader),
+                      replayed.board.zobrist, replayed.move_history)
+        os.remove(fname)
+        expected = (True, False, 12, loaded.board.zobrist, loaded.move_history)
+        print_result("test_record_file_from_legacy_record", expected, actual)
+        self.assertEqual(actual, expected)
+
     # ======================= MOVE GENERATION =======================
 
+    def test_generate_all_moves_matches_validate_move(self):
+        # Every (piece, destination) accepted by validate_move must be generated, and nothing else
+        for side in (0, 1):
+            reference = set()
+            for piece in self.game.players[side].pieces:
+                for row in range(9):
+                    for col in range(7):
+                        valid, _ = self.rules.validate_move(piece, piece.position, Position(row, col), self.board)
+                        if valid:
+                            from_sq = piece.position.row * 7 + piece.position.col
+                            reference.add(from_sq | (row * 7 + col) << 6)
+            generated = self.rules.generate_all_moves(self.board, side)
+            expected = (reference, 24)
+            actual = (set(generated), len(generated))
+            print_result("test_generate_all_moves_matches_validate_move", expected, actual)
+            self.assertEqual(actual, expected)
+
+    def test_get_valid_moves_includes_river_jump(self):
+        lion = self.board.piece_at(Position(0, 0))
+        self.board.move_piece(lion, Position(2, 1))
+        expected = [(6, 1)]
+        actual = [(p.row, p.col) for p in self.rules.get_valid_moves(lion, self.board)]
+        print_result("test_get_valid_moves_includes_river_jump", expected, actual)
+        self.assertEqual(actual, expected)
+
     def test_all_ranks_generate_moves(self):
         results = []
         for rank in Rank:
@@ -227,5 +465,556 @@ class TestJungleChessModel(unittest.TestCase):
         self.assertEqual(actual, expected)
 
 
+    def test_setup_position(self):
+        self.game.setup_position(["l......", ".......", ".......", ".......", ".......",
+                                  ".......", ".......", ".......", "......R"], whose_turn=1)
+        expected = (1, 1, 1, self.player1, Rank.RAT, 1)
+        actual = (len(self.player1.pieces), len(self.player2.pieces),
+                  bin(self.board.side_bb[0]).count("1"), self.board.piece_at(Position(0, 0)).owner,
+                  self.board.piece_at(Position(8, 6)).rank, self.game.whose_turn)
+        print_result("test_setup_position", expected, actual)
+        self.assertEqual(actual, expected)
+
+    # ======================= PERFT =======================
+
+    def test_perft_reference_counts(self):
+        # Known node counts of every reference position, fast generator
+        results = perft.run_suite(max_depth=3)
+        expected = [(name, depth, count) for name, depth, count, _, _ in results]
+        actual = [(name, depth, nodes) for name, depth, _, nodes, _ in results]
+        print_result("test_perft_reference_counts", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_perft_generators_agree(self):
+        # generate_all_moves must match validate_move in every node two plies deep
+        mismatches = []
+        for name, (layout, turn, _) in perft.REFERENCE_POSITIONS.items():
+            game = perft.game_from_layout(layout, turn)
+            mismatches.append(perft.compare_generators(game, 2))
+        expected = [None] * len(perft.REFERENCE_POSITIONS)
+        actual = mismatches
+        print_result("test_perft_generators_agree", expected, actual)
+        self.assertEqual(actual, expected)
+
+    # ======================= ENGINE =======================
+
+    def test_search_finds_den_entry(self):
+        # Top lion next to the bottom den must walk in: e1 -> d1 wins immediately
+        lion = self.board.piece_at(Position(0, 0))
+        self.board.move_piece(lion, Position(8, 2))
+        result = Searcher().search(self.game, max_depth=3)
+        expected = (58 | 59 << 6, MATE - 1, [58 | 59 << 6])
+        actual = (result.best_move, result.score, result.pv)
+        print_result("test_search_finds_den_entry", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_search_restores_game(self):
+        key = self.game.position_key()
+        result = Searcher().search(self.game, max_depth=3)
+        expected = (key, 0, 3, True)
+        actual = (self.game.position_key(), self.game.whose_turn, result.depth,
+                  result.best_move in self.rules.generate_all_moves(self.board, 0))
+        print_result("test_search_restores_game", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_move_ordering_and_counters(self):
+        # Rat-takes-elephant sorts before rat-takes-rat (the river rat cannot take the land elephant);
+        # full ordering searches fewer nodes for the same score, one root node per iteration
+        layout, side, _ = perft.REFERENCE_POSITIONS["rat-vs-elephant"]
+        self.game.setup_position(layout, side)
+        moves = MoveOrdering().order(self.board, self.rules.generate_all_moves(self.board, 0), 0, 0)
+        victims = [self.board.squares[move >> 6].name if self.board.squares[move >> 6] else None for move in moves[:4]]
+        runs = ordering.compare(layout, side, 6, (ordering.CONFIGURATIONS[0], ordering.CONFIGURATIONS[-1]))
+        (_, plain, _), (_, ordered, stats) = runs
+        expected = (["Elephant", "Rat", None, None], True, plain.score, 6, True)
+        actual = (victims, ordered.nodes < plain.nodes, ordered.score, stats.nodes[0], stats.cutoffs[1] > 0)
+        print_result("test_move_ordering_and_counters", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_transposition_table_replacement(self):
+        # Keys 5 and 5 + 2**40 share a bucket in a small table
+        tt = TranspositionTable(size_mb=1)
+        tt.store(5, 6, 120, EXACT, 77)
+        tt.store(5 + 2 ** 40, 2, -30, LOWER, 12)   # shallower: goes to the always-replace slot
+        tt.store(5 + 2 ** 41, 1, 10, LOWER, 13)    # evicts the always-replace slot only
+        expected = ((6, 120, EXACT, 77), None, (1, 10, LOWER, 13), True)
+        actual = (tt.probe(5), tt.probe(5 + 2 ** 40), tt.probe(5 + 2 ** 41), tt.memory_bytes <= 1024 * 1024)
+        print_result("test_transposition_table_replacement", expected, actual)
+        self.assertEqual(actual, expected)
+
+    @unittest.skipUnless(batch_eval.np is not None, "NumPy not installed")
+    def test_batch_evaluation_matches_scalar(self):
+        # Without the extra terms the batch score equals evaluate(); with them a river rat
+        # and an enemy elephant standing in a top trap both count for the top player
+        other = Game(Player("A"), Player("B"))
+        other.setup_position(["..E....", ".......", ".......", ".r.....", ".......",
+                              ".......", ".......", ".......", "......L"], whose_turn=1)
+        planes, sides = batch_eval.encode_games([self.game, other])
+        plain = batch_eval.BatchEvaluator(self.board, trap_weight=0, river_weight=0)
+        full = batch_eval.BatchEvaluator(self.board)
+        expected = ((2, 16, 9, 7), [evaluate(self.board, 0), evaluate(other.board, 1)],
+                    evaluate(other.board, 0) + batch_eval.RIVER_WEIGHT + batch_eval.TRAP_WEIGHT)
+        actual = (planes.shape, [int(s) for s in plain.evaluate(planes, sides)],
+                  int(full.evaluate(planes)[1]))
+        print_result("test_batch_evaluation_matches_scalar", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_engine_player_choose_move(self):
+        engine = EnginePlayer("Engine", max_depth=2, time_limit=None)
+        game = Game(engine, Player("Human"))
+        origin, destination = engine.choose_move(game)
+        valid, _ = game.move_piece(origin, destination)
+        expected = True
+        actual = valid
+        print_result("test_engine_player_choose_move", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_mcts_finds_den_entry(self):
+        # Top lion on the bottom trap next to the den; one process and a two-process player agree, and close() ends the pool
+        self.game.setup_position(["R......", "...e...", ".......", ".......", ".......",
+                                  ".......", ".......", ".......", "..l...."], 0)
+        key = self.game.position_key()
+        single = MCTS(seed=1).search(self.game, 300)
+        player = MCTSPlayer("*E*", playouts=300, workers=2, book_path=None, tablebase_dir=None)
+        try:
+            player.choose_move(self.game)
+            pooled = player.mcts._pool is not None
+        finally:
+            player.close()
+        split = player.last_result
+        expected = ("c1d1", "c1d1", 300, True, (True, None))
+        actual = (move_to_str(single.best_move), move_to_str(split.best_move), split.playouts,
+                  self.game.position_key() == key, (pooled, player.mcts._pool))
+        print_result("test_mcts_finds_den_entry", expected, actual)
+        self.assertEqual(actual, expected)
+
+
+    def test_opening_book_lookup(self):
+        # Move counts aggregate per position; the engine plays the most played book move
+        builder = BookBuilder(max_plies=4)
+        games = [selfplay.play_game(game_id, ("greedy", "random"), seed=13, max_plies=30) for game_id in range(5)]
+        for _, result, moves in games:
+            builder.add_game(Game(Player("A"), Player("B")), moves, result)
+        first_moves = [moves[0] for _, _, moves in games]
+        popular = max(set(first_moves), key=lambda move: (first_moves.count(move), -move))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.book")
+            builder.write(path)
+            with OpeningBook(path) as book:
+                counts = {move: played for move, played, _ in book.lookup(self.game.position_key())}
+            engine = EnginePlayer("Engine", max_depth=1, book_path=path)
+            origin, destination = engine.choose_move(Game(engine, Player("Human")))
+            engine.book.close()
+        expected = ({move: first_moves.count(move) for move in first_moves}, popular, "book move")
+        actual = (counts, origin.row * 7 + origin.col | (destination.row * 7 + destination.col) << 6, engine.last_result)
+        print_result("test_opening_book_lookup", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_tablebase_probe_and_search(self):
+        # Top lion two steps from the bottom den wins in 3 plies whoever moves first
+        # in this layout; the search agrees and uses the table below the root
+        layout = [".......", ".......", ".......", ".......", ".......",
+                  ".......", "...l...", ".......", "E......"]
+        tables = {}
+        tablebase.generate(tablebase.parse_material("L-E"), tables)
+        with tempfile.TemporaryDirectory() as directory:
+            for material, table in tables.items():
+                tablebase.write_table(directory, material, table)
+            with tablebase.Tablebase(directory) as tb:
+                game = Game(Player("A"), Player("B"))
+                game.setup_position(layout, whose_turn=0)
+                probed = [tb.probe(game.board, 0), tb.probe(game.board, 1), tb.probe(self.board, 0)]
+                result = Searcher(tablebase=tb).search(game, max_depth=4)
+        expected = ([(tablebase.WIN, 3), (tablebase.LOSS, 4), None], MATE - 3)
+        actual = (probed, result.score)
+        print_result("test_tablebase_probe_and_search", expected, actual)
+        self.assertEqual(actual, expected)
+
+    # ======================= SELF-PLAY =======================
+
+    def test_selfplay_stream_roundtrip(self):
+        # Games streamed to disk read back identically and replay legally through move_piece
+        fname = "test_selfplay.games"
+        stats = selfplay.run_selfplay(3, 1, ("greedy", "random"), fname, seed=7, max_plies=60)
+        games = list(selfplay.read_games(fname))
+        os.remove(fname)
+        replay = Game(Player("A"), Player("B"))
+        legal = True
+        for move in games[0][2]:
+            from_sq, to_sq = move & 63, move >> 6
+            ok, _ = replay.move_piece(Position(from_sq // 7, from_sq % 7), Position(to_sq // 7, to_sq % 7))
+            legal = legal and ok
+            replay.switch_turn()
+        expected = (3, [0, 1, 2], stats["plies"], True, games[0])
+        actual = (len(games), [g[0] for g in games], sum(len(g[2]) for g in games), legal,
+                  selfplay.play_game(0, ("greedy", "random"), seed=7, max_plies=60))
+        print_result("test_selfplay_stream_roundtrip", expected, actual)
+        self.assertEqual(actual, expected)
+
+
+    def test_replay_validates_files(self):
+        # A good record, a record with a move from an empty square, and an undecodable save
+        moves = selfplay.play_game(2, ("random", "random"), seed=5, max_plies=70)[2]
+        game = Game(Player("A"), Player("B"))
+        for move in moves:
+            record.apply_record_move(game, move)
+        good = record.record_bytes(game, interval=16)
+        offset = good.index(array("H", moves).tobytes())
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "good.record"), "wb") as file:
+                file.write(good)
+            with open(os.path.join(directory, "bad.record"), "wb") as file:
+                file.write(good[:offset] + array("H", [30 | 37 << 6]).tobytes() + good[offset + 2:])
+            with open(os.path.join(directory, "junk.jungle"), "wb") as file:
+                file.write(b"not a save")
+            results, stats = replay.run_replay(replay.find_files(directory))
+        expected = ([("bad.record", replay.ILLEGAL, 0), ("good.record", replay.OK, len(moves)),
+                     ("junk.jungle", replay.CORRUPT, 0)], 2)
+        actual = ([(os.path.basename(path), status, plies) for path, status, plies, _, _ in results], stats["failed"])
+        print_result("test_replay_validates_files", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_replay_flags_illegal_save_move(self):
+        # A compact .jungle save whose third move jumps the rat two squares is illegal, not corrupt
+        game = Game(Player("A"), Player("B"))
+        for move in selfplay.play_game(4, ("random", "random"), seed=3, max_plies=6)[2]:
+            record.apply_record_move(game, move)
+        data = SaveGame.to_bytes(game)
+        moves = SaveGame.decode(data)[5]
+        offset = data.index(moves.tobytes()) + 4
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bad.jungle")
+            with open(path, "wb") as file:
+                file.write(data[:offset] + array("H", [14 | 28 << 6]).tobytes() + data[offset + 2:])
+            _, status, plies, _, message = replay.replay_file(path)
+        expected = (replay.ILLEGAL, 2, True)
+        actual = (status, plies, message.startswith("move 3:"))
+        print_result("test_replay_flags_illegal_save_move", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_replay_rejects_moves_out_of_turn(self):
+        # The bottom elephant moving three times in a row is illegal in a record and in a compact save
+        elephant = array("H", [42 | 35 << 6, 35 | 28 << 6, 28 | 21 << 6])
+        game = Game(Player("A"), Player("B"))
+        pieces = SaveGame.start_position(game)[0]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "twice.record")
+            with open(path, "wb") as file:
+                file.write(record.encode_record(["A", "B"], pieces, 1, elephant))
+            _, status, plies, _, message = replay.replay_file(path)
+        data = SaveGame.to_bytes(game)
+        try:
+            cut = len(data) - RULES.size - 2
+            SaveGame.from_bytes(data[:cut] + len(elephant).to_bytes(2, "little") + elephant.tobytes() + data[cut + 2:])
+            loaded = True
+        except ValueError:
+            loaded = False
+        expected = (replay.ILLEGAL, 1, "move 2: Not your turn.", False)
+        actual = (status, plies, message, loaded)
+        print_result("test_replay_rejects_moves_out_of_turn", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_playback_reports_invalid_move(self):
+        # Playback stops at a recorded move that cannot be played, and closing playback closes the record
+        elephant = array("H", [42 | 35 << 6, 35 | 28 << 6])
+        pieces = SaveGame.start_position(Game(Player("A"), Player("B")))[0]
+        lines = []
+        controller = GameController(UserInterface(output=lambda *args, **kwargs: lines.append(" ".join(map(str, args))),
+                                                  pace=0), ponder=False)
+        reader = record.RecordReader(record.encode_record(["A", "B"], pieces, 1, elephant))
+        controller.playback_reader = reader
+        controller.game = reader.game_at(0)
+        controller.play_next_move()
+        controller.play_next_move()
+        controller.close_playback()
+        expected = (1, "Recorded move 2 cannot be played: Not your turn.", True, None)
+        actual = (controller.playback_ply, lines[-1], reader._file.closed, controller.playback_reader)
+        print_result("test_playback_reports_invalid_move", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_position_index_queries(self):
+        # Two archived games from the start position; the second ingest replays nothing
+        with tempfile.TemporaryDirectory() as directory:
+            paths, plies = [], 0
+            for game_id in (0, 1):
+                game = Game(Player("A"), Player("B"))
+                for move in selfplay.play_game(game_id, ("greedy", "random"), seed=11, max_plies=40)[2]:
+                    record.apply_record_move(game, move)
+                    plies += 1
+                paths.append(os.path.join(directory, f"g{game_id}.record"))
+                record.write_record(paths[-1], game)
+            with PositionIndex(os.path.join(directory, "index.sqlite")) as index:
+                first = index.ingest(paths)
+                second = index.ingest(paths)
+                start = index.games_reaching(Game(Player("A"), Player("B")))
+                played, _ = index.move_stats()
+                counts = index.counts()
+        expected = ((2, 0, 0), (0, 2, 0), [(paths[0], 0), (paths[1], 0)], plies, (2, plies + 2))
+        actual = (first, second, start, played, counts)
+        print_result("test_position_index_queries", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_repetition_and_chase(self):
+        # Two lions shuffle back and forth: the start position recurs, the draw rule ends it, 'forbid' rejects it
+        layout = ["l......", ".......", ".......", ".......", ".......",
+                  ".......", ".......", ".......", "......L"]
+        shuffle = [((0, 0), (0, 1)), ((8, 6), (8, 5)), ((0, 1), (0, 0)), ((8, 5), (8, 6))] * 2
+
+        def play(game):
+            for origin, dest in shuffle:
+                result, message = game.move_piece(Position(*origin), Position(*dest))
+                if not result:
+                    return message
+                game.switch_turn()
+            return None
+
+        self.game.setup_position(layout, 0)
+        play(self.game)
+        counts = (self.game.repetition_count(), self.game.check_draw()[0])
+        for _ in shuffle:
+            self.game.undo_move()
+        restored = (self.game.repetition_count(), len(self.game.position_history), self.game.check_draw()[0])
+        self.game.set_repetition_rules(repetition_rule="forbid")
+        forbidden = play(self.game)
+        expected = ((3, True), (1, 1, False), "Repeating a position 3 times is not allowed.",
+                    ("Lion", "b9", "a9", "None"))
+        actual = (counts, restored, forbidden, self.game.move_history[-1])
+        print_result("test_repetition_and_chase", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_perpetual_chase(self):
+        # A lion following a dog round a square attacks it after each of its moves: a draw after 6, or rejected
+        layout = [".......", "lD.....", ".......", ".......", ".......",
+                  ".......", ".......", ".......", "......."]
+        cycle = [(1, 1), (2, 1), (2, 0), (1, 0)]
+        moves = []
+        for i in range(6):
+            moves.append((cycle[i % 4], cycle[(i + 1) % 4]))
+            moves.append((cycle[(i + 3) % 4], cycle[i % 4]))
+
+        def play(game):
+            results = []
+            for origin, dest in moves:
+                result, message = game.move_piece(Position(*origin), Position(*dest))
+                if not result:
+                    return results, message
+                results.append(game.check_draw()[0])
+                game.switch_turn()
+            return results, None
+
+        self.game.setup_position(layout, 1)
+        drawn, _ = play(self.game)
+        reason = self.game.check_draw()[1]
+        self.game.setup_position(layout, 1)
+        self.game.set_repetition_rules(chase_rule="forbid")
+        played, rejected = play(self.game)
+        # The engine searches again without the rejected move
+        chase = 8 | 15 << 6  # b8 -> b7, the rejected lion move
+        best = Searcher().search(self.game, 3, exclude={chase}).best_move
+        expected = ([False] * 11 + [True], "White is perpetually chasing the Dog", 11,
+                    "Perpetually chasing the Dog is not allowed.", True)
+        actual = (drawn, reason, len(played), rejected,
+                  best != chase and best in self.rules.generate_all_moves(self.board, 0))
+        print_result("test_perpetual_chase", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_legal_move_cache(self):
+        # Through a self-play game the cache always agrees with get_valid_moves and regenerates few pieces
+        mismatches, lookups = 0, 0
+        for move in selfplay.play_game(3, ("greedy", "random"), seed=5, max_plies=30)[2]:
+            for player in self.game.players:
+                for piece in player.get_alive_pieces():
+                    lookups += 1
+                    if self.game.legal_moves(piece) != self.rules.get_valid_moves(piece, self.board):
+                        mismatches += 1
+            record.apply_record_move(self.game, move)
+        cache = self.game.move_cache
+        expected = (0, lookups, True, True)
+        actual = (mismatches, cache.hits + cache.misses, cache.hit_rate > 0.6, cache.invalidated > 0)
+        print_result("test_legal_move_cache", expected, actual)
+        self.assertEqual(actual, expected)
+
+    # ======================= SCRIPTED CONTROLLER =======================
+
+    def test_scripted_controller_run(self):
+        # The whole console stack runs from a script at machine speed and ends cleanly at EOF
+        script = ["new", "Alice", "Bob", "none",
+                  "move", "a7", "a6", "endturn",
+                  "move", "g3", "g4", "endturn",
+                  "undo", "bogus"]
+        lines = []
+        start = time.perf_counter()
+        controller = run_script(script, output=lambda *args, **kwargs: lines.append(" ".join(map(str, args))))
+        elapsed = time.perf_counter() - start
+        expected = ("*Alice*", [("Rat", "a7", "a6", "None")], 1, True, True)
+        actual = (controller.game.players[0].name, controller.game.move_history, controller.game.whose_turn,
+                  any("Invalid command" in line for line in lines), elapsed < 2)
+        print_result("test_scripted_controller_run", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_background_hint(self):
+        # Pondering runs between commands; 'hint' reports the pondered den entry and the thread stops at the end
+        self.game.setup_position(["R......", "...e...", ".......", ".......", ".......",
+                                  ".......", ".......", ".......", "..l...."], 0)
+        analyzer = BackgroundAnalyzer(max_depth=4)
+        analyzer.analyze(self.game)
+        result = analyzer.wait(5)
+        analyzer.stop()
+        lines = []
+        controller = run_script(["new", "Alice", "Bob", "none", "hint"], echo=False, ponder=True,
+                                output=lambda *args, **kwargs: lines.append(" ".join(map(str, args))))
+        expected = ("c1d1", True, None)
+        actual = (move_to_str(result.best_move), any(line.startswith("Hint for *Alice*:") for line in lines),
+                  controller.analyzer._thread)
+        print_result("test_background_hint", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_hint_stops_without_pondering(self):
+        # With pondering off the hint search is stopped as soon as the hint is shown
+        lines = []
+        ui = UserInterface(ScriptedInput([]), lambda *args, **kwargs: lines.append(" ".join(map(str, args))), 0)
+        controller = GameController(ui, ponder=False, hint_wait=0.5)
+        controller.game = self.game
+        controller.handle_hint()
+        expected = (1, None)
+        actual = (sum(line.startswith(("Hint for", "No analysis yet")) for line in lines), controller.analyzer._thread)
+        print_result("test_hint_stops_without_pondering", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_engine_uses_pondered_search(self):
+        # The engine plays the pondered result for its position and keeps searching from the analyser's table
+        lines = []
+        idle = GameController(UserInterface(output=lambda *args, **kwargs: None), ponder=False)
+        controller = GameController(UserInterface(output=lambda *args, **kwargs: lines.append(" ".join(map(str, args))), pace=0))
+        engine = EnginePlayer("#E#", max_depth=3, book_path=None, tablebase_dir=None)
+        controller.game = Game(Player("*A*"), engine)
+        controller.game.setup_position(["......R", ".......", ".......", ".......", ".......",
+                                        ".......", ".......", ".......", "l.....E"], 1)
+        analyzer = controller.analyzer
+        analyzer.max_depth = 3
+        analyzer.analyze(controller.game)
+        analyzer._thread.join(5)
+        pondered = analyzer.result
+        controller.handle_engine_move()
+        expected = (None, True, True, "f9")
+        actual = (idle._analyzer, engine.last_result is pondered, engine.searcher.tt is analyzer.searcher.tt,
+                  controller.game.move_history[-1][2])
+        print_result("test_engine_uses_pondered_search", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_board_renderer_frames(self):
+        # A full frame is one string; after a move the ANSI frame rewrites just the two changed cells
+        renderer = BoardRenderer()
+        frame = renderer.frame(self.board.grid).split("\n")
+        renderer.reset()
+        renderer.ansi_frame(self.board.grid, terminal_rows=60)
+        self.game.move_piece(Position(2, 0), Position(3, 0))
+        update = renderer.ansi_frame(self.board.grid, terminal_rows=60)
+        expected = (41, "7 |   WRat1    |            |", 2, "\x1b[17;4H   WRat1    ")
+        actual = (len(frame), frame[12][:29], update.count("\x1b[") - 2, update[update.index("\x1b[17;"):update.index("\x1b[17;") + 19])
+        print_result("test_board_renderer_frames", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_board_renderer_short_terminal(self):
+        # On a terminal shorter than the board every ANSI frame is the plain full frame, without cursor moves
+        renderer = BoardRenderer()
+        first = renderer.ansi_frame(self.board.grid, terminal_rows=24)
+        self.game.move_piece(Position(2, 0), Position(3, 0))
+        second = renderer.ansi_frame(self.board.grid, terminal_rows=24)
+        actual = (second, "\x1b[" in first + second, renderer.labels)
+        expected = (renderer.frame(self.board.grid) + "\n", False, None)
+        print_result("test_board_renderer_short_terminal", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_ansi_play_mode_updates_in_place(self):
+        # In ANSI play mode only the first board clears the screen; after a move just the changed cells are sent
+        lines = []
+        output = lambda *args, **kwargs: lines.append(" ".join(map(str, args)))
+        ui = UserInterface(ScriptedInput(["new", "Alice", "Bob", "none", "move", "a7", "a6", "endturn"]),
+                           output, 0, ansi=True)
+        ui.renderer.terminal_rows = 60
+        controller = GameController(ui, ponder=False)
+        try:
+            controller.initialize_game()
+            controller.start_game_loop()
+        except (SystemExit, EOFError):
+            pass
+        frames = [line for line in lines if line.startswith("\x1b[")]
+        expected = (1, True, False)
+        actual = (sum(frame.startswith("\x1b[H\x1b[2J") for frame in frames),
+                  any("*Rat1" in frame and not frame.startswith("\x1b[H") for frame in frames),
+                  any("AVAILABLE COMMANDS" in line for line in lines))
+        print_result("test_ansi_play_mode_updates_in_place", expected, actual)
+        self.assertEqual(actual, expected)
+
+    # ======================= SERVER =======================
+
+    def test_server_commands(self):
+        # Turn order, pushed updates, undo accounting and resignation on one hosted game
+        class Client:
+            def __init__(self):
+                self.messages = []
+
+            def send(self, message):
+                self.messages.append(message)
+
+        server, alice, bob = game_server.GameServer(), Client(), Client()
+        game_id = server.handle(alice, {"cmd": "create", "name": "Alice"})["game"]
+        early = server.handle(alice, {"cmd": "move", "game": game_id, "from": "a7", "to": "a6"})
+        server.handle(bob, {"cmd": "join", "game": game_id, "name": "Bob"})
+        wrong_turn = server.handle(bob, {"cmd": "move", "game": game_id, "from": "a3", "to": "a4"})
+        moved = server.handle(alice, {"cmd": "move", "game": game_id, "from": "a7", "to": "a6"})
+        undone = server.handle(alice, {"cmd": "undo", "game": game_id})
+        server.handle(bob, {"cmd": "resign", "game": game_id})
+        expected = ([False, False, True, True], "Not your turn.", 4, 4, "r......",
+                    [2, 3], (True, 0))
+        final = bob.messages[-1]
+        actual = ([early["ok"], wrong_turn["ok"], moved["ok"], undone["ok"]], wrong_turn["error"],
+                  len(alice.messages), len(bob.messages), alice.messages[1]["board"][3],
+                  final["undos"], (final["completed"], final["winner"]))
+        print_result("test_server_commands", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_server_rejects_malformed_requests(self):
+        # Wrongly typed fields get an error response instead of an exception that would drop the client
+        class Client:
+            def send(self, message):
+                pass
+
+        server, alice = game_server.GameServer(), Client()
+        game_id = server.handle(alice, {"cmd": "create", "name": "Alice"})["game"]
+        responses = [server.handle(alice, request) for request in
+                     ({"cmd": ["x"]}, {"cmd": "state", "game": [game_id]},
+                      {"cmd": "save", "game": game_id, "filename": ["x"]}, {"cmd": "moves", "game": game_id, "from": 7})]
+        expected = ([False] * 4, "Unknown command ['x'].", [alice, None])
+        actual = ([response["ok"] for response in responses], responses[0]["error"],
+                  server.sessions[game_id].clients)
+        print_result("test_server_rejects_malformed_requests", expected, actual)
+        self.assertEqual(actual, expected)
+
+    def test_server_socket_roundtrip(self):
+        # Two clients over TCP: create, join, move, and both receive the board update
+        async def scenario():
+            listener = await game_server.start(port=0)
+            port = listener.sockets[0].getsockname()[1]
+            alice = await JungleClient.connect(port=port)
+            bob = await JungleClient.connect(port=port)
+            game_id = (await alice.request("create", name="Alice"))["game"]
+            joined = await bob.request("join", game=game_id, name="Bob")
+            await alice.next_update(game_id)
+            await bob.next_update(game_id)
+            moved = await alice.request("move", game=game_id, **{"from": "g7", "to": "g6"})
+            seen = [(await client.next_update(game_id))["board"][3] for client in (alice, bob)]
+            await alice.close()
+            await bob.close()
+            listener.close()
+            await listener.wait_closed()
+            return joined["side"], moved["ok"], seen
+
+        expected = (1, True, ["......e", "......e"])
+        actual = asyncio.run(scenario())
+        print_result("test_server_socket_roundtrip", expected, actual)
+        self.assertEqual(actual, expected)
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -0,0 +1,137 @@
+"""
+Buffered board rendering for the console UI.
+
+The board frame is the same drawing UserInterface.display_board has
+always printed, but it is built as one string from a cached template:
+the borders, blank lines and column labels never change, so only the
+63 cell labels are filled in per frame and the result is written with
+a single call.
+
+In ANSI mode the first frame clears the screen and later frames only
+rewrite the cells whose label changed, using cursor positioning, then
+clear everything below the board so status lines and prompts follow it.
+The cursor rows are absolute, so this only works while the board and
+the lines printed under it fit on the terminal; on a shorter terminal
+every frame is drawn in full instead.
+"""
+import shutil
+
+CELL_WIDTH = 12
+ROWS = 9
+COLS = 7
+
+# Character column where the label of board column c starts (0-based):
+# FIRST_CELL_COLUMN + c * COLUMN_STEP
+FIRST_CELL_COLUMN = 3
+COLUMN_STEP = CELL_WIDTH + 1
+
+# Terminal rows kept free under the board for status lines and the prompt
+STATUS_LINES = 8
+
+
+def cell_label(cell):
+    """
+    Text shown in a square: the piece symbol, or the terrain name
+    (nothing for plain land).
+    """
+    piece, terrain = cell
+    if piece is not None:
+        return piece.symbol
+    return terrain[0] if terrain[0] != "land" else ""
+
+
+def pad(label):
+    """
+    Center label in a cell, with the extra space (if any) on the right.
+    """
+    left = (CELL_WIDTH - len(label)) // 2
+    return " " * left + label + " " * (CELL_WIDTH - left - len(label))
+
+
+class BoardRenderer:
+    """
+    Renders board grids (rows of (piece, cell) tuples) to strings.
+
+    Attributes:
+        labels (list): Cell labels of the last rendered frame, row-major
+    """
+
+    def __init__(self, terminal_rows=None):
+        """
+        Args:
+            terminal_rows (int): Terminal height to assume, None to ask
+                                 the terminal on every frame
+        """
+        self.terminal_rows = terminal_rows
+        header = "\n        " + "            ".join("abcdefg")
+        border = "  " + COLS * ("+" + CELL_WIDTH * "-") + "+"
+        blank = "  " + COLS * ("|" + CELL_WIDTH * " ") + "|"
+        # Template lines; None marks the content line of a board row
+        self._template = header.split("\n")
+        self._content_lines = []
+        for row in range(ROWS):
+            self._template += [border, blank]
+            self._content_lines.append(len(self._template))
+            self._template += [None, blank]
+        self._template += [border] + header.split("\n")
+        self.height = len(self._template)
+        self.labels = None
+
+    def labels_of(self, grid):
+        return [cell_label(grid[row][col]) for row in range(ROWS) for col in range(COLS)]
+
+    def frame(self, grid):
+        """
+        Return the full board drawing as one string (no trailing newline).
+        """
+        labels = self.labels_of(grid)
+        self.labels = labels
+        lines = list(self._template)
+        for row, index in enumerate(self._content_lines):
+            cells = "|".join(pad(label) for label in labels[row * COLS:(row + 1) * COLS])
+            lines[index] = f"{9 - row} |{cells}| {9 - row}"
+        return "\n".join(lines)
+
+    def fits(self, terminal_rows=None, extra_lines=STATUS_LINES):
+        """
+        True if the board and extra_lines lines under it fit on a terminal
+        of terminal_rows rows (by default self.terminal_rows, or the
+        current terminal).
+        """
+        if terminal_rows is None:
+            terminal_rows = self.terminal_rows
+        if terminal_rows is None:
+            terminal_rows = shutil.get_terminal_size().lines
+        return self.height + extra_lines <= terminal_rows
+
+    def ansi_frame(self, grid, terminal_rows=None):
+        """
+        Return the escape sequence that brings the screen up to date:
+        the whole frame the first time, afterwards only changed cells.
+        When the board does not fit, the plain full frame is returned
+        every time, since the screen scrolls under it.
+        """
+        if not self.fits(terminal_rows):
+            frame = self.frame(grid)
+            self.labels = None
+            return frame + "\n"
+        previous = self.labels
+        if previous is None:
+            return "\x1b[H\x1b[2J" + self.frame(grid) + "\n"
+        labels = self.labels_of(grid)
+        self.labels = labels
+        parts = []
+        for sq, label in enumerate(labels):
+            if label != previous[sq]:
+                row, col = divmod(sq, COLS)
+                line = self._content_lines[row] + 1
+                column = FIRST_CELL_COLUMN + col * COLUMN_STEP + 1
+                parts.append(f"\x1b[{line};{column}H{pad(label)}")
+        parts.append(f"\x1b[{self.height + 1};1H\x1b[J")
+        return "".join(parts)
+
+    def reset(self):
+        """
+        Forget the last frame so the next ANSI frame redraws everything.
+        """
+        self.labels = None
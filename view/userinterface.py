@@ -1,10 +1,52 @@
 import random
 import string
 from model.save_game import SaveGame
+from view.board_renderer import STATUS_LINES, BoardRenderer
 import time
 
+class ScriptedInput:
+    """
+    Input source that answers prompts from a list, file or any iterable
+    of lines instead of the keyboard. Raises EOFError when the script
+    runs out, like input() at the end of stdin.
+    """
+
+    def __init__(self, lines, echo=None):
+        """
+        Args:
+            lines: Iterable of answers (trailing newlines are stripped)
+            echo: Optional print-like callable; prompt and answer are shown
+                  through it so transcripts read like an interactive session
+        """
+        self._lines = iter(lines)
+        self.echo = echo
+
+    def __call__(self, prompt=""):
+        try:
+            line = next(self._lines).rstrip("\n")
+        except StopIteration:
+            raise EOFError from None
+        if self.echo is not None:
+            self.echo(f"{prompt}{line}")
+        return line
+
+
 class UserInterface:
-    def __init__(self):
+    def __init__(self, input_func=input, output=print, pace=0.5, ansi=False):
+        """
+        Args:
+            input_func: input()-like callable used for every prompt
+            output: print()-like callable used for every message
+            pace (float): Seconds to pause after messages meant to be read;
+                          0 runs at machine speed
+            ansi (bool): Keep the board in place at the top of the terminal
+                         and redraw only changed cells
+        """
+        self.input = input_func
+        self.output = output
+        self.pace = pace
+        self.ansi = ansi
+        self.renderer = BoardRenderer()
         self.commands = {
             'help': 'Show available commands',
             'move': 'Make a move (e.g., "e2 e4")',
@@ -17,29 +59,36 @@ class UserInterface:
             'load': 'Load a saved game',
             'record': 'Record move history to a file',
             'playback': 'Play back a recorded game',
+            'hint': 'Show the best move found by the background analysis',
             'quit': 'Exit the game'
             
         }
         self.playback_commands = {
             'next': 'Show next move in playback',
+            'seek': 'Jump to move N in playback (e.g., "seek 10")',
             'exit': 'Exit playback mode'
         }
     
+    def pause(self):
+        """Wait self.pace seconds so a message can be read (no-op when 0)"""
+        if self.pace:
+            time.sleep(self.pace)
+
     def display_welcome2(self):
         # Display a welcome message
-        print("=" * 50)
-        print("           WELCOME TO JUNGLE CHESS")
-        print("=" * 50)
+        self.output("=" * 50)
+        self.output("           WELCOME TO JUNGLE CHESS")
+        self.output("=" * 50)
         while True:
-            choice = input("Load saved game or start new? (load/new) or 'quit' to exit: ").strip().lower()
-            print()
+            choice = self.input("Load saved game or start new? (load/new) or 'quit' to exit: ").strip().lower()
+            self.output()
             if choice in ('quit', 'exit', 'q'):
                 return "quit"
             if choice in ("load", "new"):
                 return choice
-            print("Please type 'load' or 'new'.")
-            print()
-            time.sleep(0.5)
+            self.output("Please type 'load' or 'new'.")
+            self.output()
+            self.pause()
         
 
 
@@ -47,30 +96,30 @@ class UserInterface:
     def get_user_input(self):
         # Get command input from the user
         try:
-            user_input = input("\nEnter command: ").strip().lower()
+            user_input = self.input("\nEnter command: ").strip().lower()
             return user_input
         except (EOFError, KeyboardInterrupt):
             return "quit"
     #not used i think       
     def prompt_load_or_new(self) -> str:
         while True:
-            choice = input("Load saved game or start new? (load/new): ").strip().lower()
-            print()
+            choice = self.input("Load saved game or start new? (load/new): ").strip().lower()
+            self.output()
             if choice in ("load", "new"):
                 return choice
-            print("Please type 'load' or 'new'.")
-            print()
-            time.sleep(0.5)
+            self.output("Please type 'load' or 'new'.")
+            self.output()
+            self.pause()
 
     def prompt_filename_load(self) -> str:
         while True: #try to remove this one
             available_files = SaveGame.get_jungle_save_files()
             if available_files:
-                print("Available save files:")
+                self.output("Available save files:")
                 for f in available_files:
-                    print(f" - {f}")
-            filename = input("Enter filename you want to load(default 'game.jungle') or 'quit' to exit: ").strip()
-            print()
+                    self.output(f" - {f}")
+            filename = self.input("Enter filename you want to load(default 'game.jungle') or 'quit' to exit: ").strip()
+            self.output()
             if filename == "":
                 filename = "game.jungle"
             if filename.lower() in ('quit', 'exit', 'q'):
@@ -80,19 +129,19 @@ class UserInterface:
                     filename += ".jungle"
             if filename in available_files:
                 return filename
-            print(f"File '{filename}' does not exist give an existing file name.")
-            print()
-            time.sleep(0.5)
+            self.output(f"File '{filename}' does not exist give an existing file name.")
+            self.output()
+            self.pause()
 
     def prompt_filename_playback(self) -> str:
         while True:
             available_files = SaveGame.get_jungle_record_files()
             if available_files:
-                print("Available record files:")
+                self.output("Available record files:")
                 for f in available_files:
-                    print(f" - {f}")
-            filename = input("Enter filename you want to playback (default 'game.record') or 'quit' to exit: ").strip()
-            print()
+                    self.output(f" - {f}")
+            filename = self.input("Enter filename you want to playback (default 'game.record') or 'quit' to exit: ").strip()
+            self.output()
             if filename == "":
                 filename = "game.record"
             if filename.lower() in ('quit', 'exit', 'q'):
@@ -102,17 +151,17 @@ class UserInterface:
                     filename += ".record"
             if filename in available_files:
                 return filename
-            print(f"File '{filename}' does not exist give an existing file name.")
-            print()
-            time.sleep(0.5)
+            self.output(f"File '{filename}' does not exist give an existing file name.")
+            self.output()
+            self.pause()
         
     def prompt_filename_save(self) -> str:
         available_files = SaveGame.get_jungle_save_files()
         if available_files:
-            print("Existing save files (don't pick the same name as it will overwrite):")
+            self.output("Existing save files (don't pick the same name as it will overwrite):")
             for f in available_files:
-                print(f" - {f}")
-        filename = input("Enter filename to save the game (default 'game.jungle') or 'quit' to exit: ").strip()
+                self.output(f" - {f}")
+        filename = self.input("Enter filename to save the game (default 'game.jungle') or 'quit' to exit: ").strip()
         if filename == "":
             filename = "game.jungle"
         if filename.lower() in ('quit', 'exit', 'q'):
@@ -125,10 +174,10 @@ class UserInterface:
     def prompt_filename_record(self) -> str:
         available_files = SaveGame.get_jungle_record_files()
         if available_files:
-            print("Existing save files (don't pick the same name as it will overwrite):")
+            self.output("Existing save files (don't pick the same name as it will overwrite):")
             for f in available_files:
-                print(f" - {f}")
-        filename = input("Enter filename to record the game (default 'game.record') or 'quit' to exit: ").strip()
+                self.output(f" - {f}")
+        filename = self.input("Enter filename to record the game (default 'game.record') or 'quit' to exit: ").strip()
         if filename == "":
             filename = "game.record"
         if filename.lower() in ('quit', 'exit', 'q'):
@@ -139,14 +188,14 @@ class UserInterface:
         return filename
 
     def confirm(self, prompt: str) -> bool:
-        ans = input(prompt).strip().lower()
+        ans = self.input(prompt).strip().lower()
         return ans in ("y", "yes")
     
     def get_player_names(self):
         """Get player names from user input"""
-        print("=== NEW GAME SETUP ===")
-        player1 = input("Enter name for Player 1 (White): ").strip()
-        player2 = input("Enter name for Player 2 (Black): ").strip()
+        self.output("=== NEW GAME SETUP ===")
+        player1 = self.input("Enter name for Player 1 (White): ").strip()
+        player2 = self.input("Enter name for Player 2 (Black): ").strip()
         
         def generate_random_name():
             return ''.join(random.choices(string.ascii_letters + string.digits, k=8))
@@ -161,13 +210,27 @@ class UserInterface:
         
         return player1, player2
 
+    def prompt_engine_sides(self):
+        """Ask which players the engine should control"""
+        while True:
+            choice = self.input("Let the engine play? (none/1/2/both, default none): ").strip().lower()
+            if choice in ("", "none", "n", "no"):
+                return ()
+            if choice == "1":
+                return (0,)
+            if choice == "2":
+                return (1,)
+            if choice == "both":
+                return (0, 1)
+            self.output("Please type 'none', '1', '2' or 'both'.")
+
     def display_game_status(self, game):
         """Show the current game status"""
         if not game:
-            print("No game in progress.")
+            self.output("No game in progress.")
             return
 
-        print("\n" + "=" * 70)
+        self.output("\n" + "=" * 70)
 
         # Display current player
         
@@ -181,87 +244,71 @@ class UserInterface:
         else:
             current_turn = len(game.move_history)+1
         
-        print(f"Current turn: {current_turn} || Current player: {current_player} ({position})")
+        self.output(f"Current turn: {current_turn} || Current player: {current_player} ({position})")
 
-        print("=" * 70)
+        self.output("=" * 70)
 
     def display_move_history(self, game):
         # Display the history of moves
         history = game.move_history
         if not history:
-            print("No moves have been made yet.")
+            self.output("No moves have been made yet.")
             return
 
-        print("\n" + "=" * 40)
-        print("MOVE HISTORY (piece_moved, from, to, captured_piece)")
-        print("=" * 40)
+        self.output("\n" + "=" * 40)
+        self.output("MOVE HISTORY (piece_moved, from, to, captured_piece)")
+        self.output("=" * 40)
         
         # Display moves in a chess notation format
         for i, move in enumerate(history, 1):
             move_number = (i + 1) // 2
             if i % 2 == 1:  # White's move
-                print(f"{game.players[0].name} move {move_number}. {move}", end="")
+                self.output(f"{game.players[0].name} move {move_number}. {move}", end="")
             else:  # Black's move
-                print(f"{game.players[1].name} move {move_number}. {move}")
+                self.output(f"{game.players[1].name} move {move_number}. {move}")
         
         # If last move was white and no black response yet
         if len(history) % 2 == 1:
-            print()  # New line for incomplete pair
+            self.output()  # New line for incomplete pair
         
-        print("=" * 40)
+        self.output("=" * 40)
 
 
     def display_board(self, board):
-        print("\n        " + "            ".join("abcdefg"))
-
-        for row in range(9):
-            print("  ", end="")
-            print(7*("+"+12*"-")+"+")
-            print("  ", end="")
-            print(7*("|"+12*" ")+"|")
-            print(f"{9-row} ", end="")
-            for col in range(7):
-                
-                cell = board[row][col]
-                if cell[0] == None : 
-                    symbol = cell[1][0] if cell[1][0] != 'land' else ''
-                else :
-                    symbol = cell[0].symbol
-                
-                print("|", end="")
-                #print(symbol, end="        ")
-                for i in range((12-len(symbol))//2):
-                    print(end=" ")
-                print(symbol, end="")
-                for i in range(12-((12-len(symbol))//2)-len(symbol)):
-                    print(end=" ")
-            print("|", end="")
-            print(f" {9-row}")
-            print("  ", end="")
-            print(7*("|"+12*" ")+"|", end="")
-            print()  # New line after each row
-        print("  ", end="")
-        print(7*("+"+12*"-")+"+")
-
-        print("\n        " + "            ".join("abcdefg"))
+        """Draw the board grid in one write (only changed cells in ANSI mode)"""
+        if self.ansi:
+            self.output(self.renderer.ansi_frame(board), end="")
+        else:
+            self.output(self.renderer.frame(board))
 
 
+    def display_turn_help(self):
+        """List the commands under the board; in ANSI mode only say how
+        to list them, so the board stays in place on the screen"""
+        if self.ansi:
+            self.output("Type 'help' to list the commands.")
+        else:
+            self.display_help()
+
     def display_help(self):
         """Display available commands"""
-        print("\n" + "=" * 50)
-        print("AVAILABLE COMMANDS")
-        print("=" * 50)
+        if self.ansi and not self.renderer.fits(extra_lines=STATUS_LINES + 4 + len(self.commands)):
+            # The list scrolls the board away, so the next board is drawn in full
+            self.renderer.reset()
+        self.output("\n" + "=" * 50)
+        self.output("AVAILABLE COMMANDS")
+        self.output("=" * 50)
         for cmd, desc in self.commands.items():
-            print(f"  {cmd:8} - {desc}")
-        print("=" * 50)
+            self.output(f"  {cmd:8} - {desc}")
+        self.output("=" * 50)
 
     def display_help_playback(self):
-        print("\n" + "=" * 50)
-        print("AVAILABLE COMMANDS")
-        print("=" * 50)
+        self.output("\n" + "=" * 50)
+        self.output("AVAILABLE COMMANDS")
+        self.output("=" * 50)
         for cmd, desc in self.playback_commands.items():
-            print(f"  {cmd:8} - {desc}")
-        print("=" * 50)
+            self.output(f"  {cmd:8} - {desc}")
+        self.output("=" * 50)
 
 
     def display_move_prompt(self, game):
@@ -271,7 +318,7 @@ class UserInterface:
         try:
             # Get and validate origin coordinate
             while True:
-                user_input1 = input(f"\n{player_name}'s turn. Which piece do you want to move? Give coordinates (example: a2): ").strip().lower()
+                user_input1 = self.input(f"\n{player_name}'s turn. Which piece do you want to move? Give coordinates (example: a2): ").strip().lower()
                 
                 if user_input1 in ('quit', 'exit', 'q'):
                     return "quit"
@@ -280,11 +327,11 @@ class UserInterface:
                     origin = user_input1
                     break
                 else:
-                    print(f"Invalid coordinate '{user_input1}'. Please use format like 'a2' (a-g and 1-9).")
+                    self.output(f"Invalid coordinate '{user_input1}'. Please use format like 'a2' (a-g and 1-9).")
             
             # Get and validate destination coordinate
             while True:
-                user_input2 = input("Where do you want to move it to? Give coordinates (example: a3): ").strip().lower()
+                user_input2 = self.input("Where do you want to move it to? Give coordinates (example: a3): ").strip().lower()
                 
                 if user_input2 in ('quit', 'exit', 'q'):
                     return "quit"
@@ -293,8 +340,8 @@ class UserInterface:
                     destination = user_input2
                     break
                 else:
-                    print(f"Invalid coordinate '{user_input2}'. Please use format like 'a3' (a-g and 1-9).")
-                    time.sleep(0.5)
+                    self.output(f"Invalid coordinate '{user_input2}'. Please use format like 'a3' (a-g and 1-9).")
+                    self.pause()
             
             return origin, destination
             
@@ -325,26 +372,34 @@ class UserInterface:
 
     def display_game_result(self, winner):
         """Display game result (win, draw, resignation)"""
-        print("\n" + "=" * 50)
-        print("GAME OVER")
-        print("=" * 50)
+        self.output("\n" + "=" * 50)
+        self.output("GAME OVER")
+        self.output("=" * 50)
         
         
-        print(winner + " wins!")
+        self.output(winner + " wins!")
+
+        self.output("=" * 50)
 
-        print("=" * 50)
 
 
 
 
+    def display_draw(self, reason):
+        """Display a drawn game and why it was drawn"""
+        self.output("\n" + "=" * 50)
+        self.output("GAME OVER")
+        self.output("=" * 50)
+        self.output(f"Draw: {reason}.")
+        self.output("=" * 50)
 
     def display_resignation(self, player_name):
         """Display resignation confirmation with validation"""
         while True:
-                response = input(f"\n{player_name}, are you sure you want to resign? (y/n): ").strip().lower()
+                response = self.input(f"\n{player_name}, are you sure you want to resign? (y/n): ").strip().lower()
                 # Handle empty input
                 if response == "":
-                    print("Please enter 'y' for yes or 'n' for no.")
+                    self.output("Please enter 'y' for yes or 'n' for no.")
                     continue
                 # Handle affirmative responses
                 if response in ['y', 'yes', 'quit', 'exit']:
@@ -353,11 +408,11 @@ class UserInterface:
                 if response in ['n', 'no']:
                     return False
                 # Handle invalid input
-                print(f"Invalid response '{response}'. Please enter 'y' for yes or 'n' for no.")
+                self.output(f"Invalid response '{response}'. Please enter 'y' for yes or 'n' for no.")
         
 
     def display_quit_confirmation(self):
         """Ask for confirmation before quitting"""
-        response = input("\nAre you sure you want to quit? (y/n): ").strip().lower()
+        response = self.input("\nAre you sure you want to quit? (y/n): ").strip().lower()
         return response in ['y', 'yes']
     